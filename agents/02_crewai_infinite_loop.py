@@ -35,7 +35,8 @@ sys.path.insert(
     ),
 )
 
-from faramesh import configure, submit_action, wait_for_action
+from faramesh import configure, submit_action
+from action_waiter import shared_waiter
 
 
 FARAMESH_BASE_URL = os.getenv("FARAMESH_BASE_URL", "http://localhost:8000")
@@ -102,11 +103,16 @@ class FarameshProtectedTool:
                     "action_id": action["id"],
                 }
 
-            # Wait for result
-            result = wait_for_action(action["id"], timeout=10)
+            # Wait for result - all tools share one multiplexed poller, so
+            # many agents delegating at once do not each poll on their own
+            result = shared_waiter(FARAMESH_BASE_URL, FARAMESH_TOKEN).wait_sync(
+                action["id"], timeout=10
+            )
+            if result is None:
+                return {"success": False, "status": "timeout", "action_id": action["id"]}
 
             return {
-                "success": result["status"] == "succeeded",
+                "success": result["status"] in ("allowed", "approved", "succeeded"),
                 "result": result.get("reason", ""),
                 "status": result["status"],
             }
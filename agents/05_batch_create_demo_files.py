@@ -47,6 +47,9 @@ from typing import List
 
 from faramesh import submit_action, get_action, report_result
 
+from action_waiter import wait_for_decision
+from poll_policy import PollPolicy
+
 AGENT_ID = os.getenv("FARAMESH_AGENT_ID", "demo-files-agent")
 FOLDER_NAME = "demo-folder"
 FILE_COUNT = 10
@@ -113,21 +116,16 @@ def main() -> None:
         sys.exit(1)
 
     print("⏳ Waiting for approval...")
-    import time
-
-    start_time = time.time()
-    timeout = 600.0
-    poll_interval = 1.0
-    final = initial
-    while time.time() - start_time < timeout:
-        time.sleep(poll_interval)
-        try:
-            final = get_action(action_id)
-            fstatus = final.get("status")
-            if fstatus in ("approved", "denied", "allowed"):
-                break
-        except Exception:
-            continue
+    # Approvals take minutes: back off to one check every 10s while pending
+    stats = {}
+    final = wait_for_decision(
+        action_id,
+        timeout=600.0,
+        fetch=get_action,
+        policy=PollPolicy(per_status={"pending_approval": (0.25, 10.0)}),
+        stats=stats,
+    ) or initial
+    print(f"🔁 Status checks: {stats.get('polls', 0)} ({stats.get('mode')})")
 
     fstatus = final.get("status")
     fdecision = final.get("decision")
@@ -11,6 +11,27 @@ Scenario:
 - Show that security doesn't mean slow
 
 Required: Running Faramesh server locally
+
+Open-loop load modes (fixed arrival rate, latency from scheduled send time):
+    python 07_latency_benchmark.py load --rate 500 --workers 32 --duration 10
+    python 07_latency_benchmark.py sweep --start 50 --stop 2000 --slo-p99 2.0
+
+Add --report results.json (or .csv) to any mode, including the
+non-interactive closed-loop run `bench --samples 10000`, for p50/p90/p99/
+p99.9/max and throughput in a machine-readable form.
+
+Where does the time go (serialize, hash, connect, TLS, server, network, decode):
+    python 07_latency_benchmark.py breakdown --samples 2000
+The breakdown posts through its own traced httpx.Client, not the SDK's
+submit_action, so its phases describe a plain httpx POST of the same
+payload rather than the exact client stack `bench` measures.
+
+Offline, against the in-process mock server (client-side overhead only):
+    python 07_latency_benchmark.py --mock --mock-latency-ms 0.5 bench --samples 5000
+
+Regression gate (exit code 1 when a percentile is significantly slower):
+    python 07_latency_benchmark.py compare before-upgrade --save
+    python 07_latency_benchmark.py compare before-upgrade --threshold 10
 """
 import sys, os as _os
 from pathlib import Path as _Path
@@ -42,12 +63,26 @@ _add_faramesh_src()
 # --- end faramesh source resolution ---
 
 
+import argparse
 import os
 import sys
 import time
-import statistics
-from typing import List
+from typing import Dict, Optional
+
+import httpx
+from action_waiter import is_decided, wait_for_decision
 from demo_utils import ensure_server_available
+from mock_server import MockFarameshServer, parse_decision_mix
+from phase_timing import PhaseBreakdown, timed_submit
+from latency_compare import compare_runs, load_baseline, load_histograms, save_baseline
+from latency_histogram import LatencyHistogram, report_row, write_report
+from load_generator import (
+    LoadResult,
+    max_sustainable_rate,
+    rate_steps,
+    run_open_loop,
+    sweep_rates,
+)
 
 sys.path.insert(
     0,
@@ -56,7 +91,7 @@ sys.path.insert(
     ),
 )
 
-from faramesh import configure, submit_action
+from faramesh import configure, get_action, submit_action
 
 
 FARAMESH_BASE_URL = os.getenv("FARAMESH_BASE_URL", "http://localhost:8000")
@@ -68,9 +103,9 @@ FARAMESH_AGENT_ID = os.getenv("FARAMESH_AGENT_ID", "latency-benchmark-001")
 configure(base_url=FARAMESH_BASE_URL, token=FARAMESH_TOKEN, agent_id=FARAMESH_AGENT_ID)
 
 
-def measure_submission_latency(num_samples: int = 50) -> List[float]:
+def measure_submission_latency(num_samples: int = 50) -> LatencyHistogram:
     """Measure action submission latency."""
-    latencies = []
+    latencies = LatencyHistogram()
 
     print(f"Measuring submission latency ({num_samples} samples)...")
 
@@ -88,30 +123,31 @@ def measure_submission_latency(num_samples: int = 50) -> List[float]:
 
             end = time.perf_counter()
             latency_ms = (end - start) * 1000
-            latencies.append(latency_ms)
+            latencies.record(latency_ms)
 
             # Show progress every 10 samples
             if (i + 1) % 10 == 0:
                 print(f"  {i + 1}/{num_samples} samples...")
 
         except Exception as e:
+            latencies.record_error()
             print(f"  Error on sample {i + 1}: {e}")
             continue
 
     return latencies
 
 
-def measure_evaluation_latency(num_samples: int = 50) -> List[float]:
-    """Measure end-to-end evaluation latency (submit + wait)."""
-    latencies = []
+def measure_evaluation_latency(num_samples: int = 50, decision_timeout: float = 30.0) -> LatencyHistogram:
+    """Measure end-to-end evaluation latency (submit + wait for a terminal decision)."""
+    latencies = LatencyHistogram()
 
-    print(f"\nMeasuring evaluation latency ({num_samples} samples)...")
+    print(f"\nMeasuring submit-to-decision latency ({num_samples} samples)...")
 
     for i in range(num_samples):
         start = time.perf_counter()
 
         try:
-            _ = submit_action(
+            action = submit_action(
                 agent_id=FARAMESH_AGENT_ID,
                 tool="shell",
                 operation="execute",
@@ -119,64 +155,85 @@ def measure_evaluation_latency(num_samples: int = 50) -> List[float]:
                 context={"benchmark": True},
             )
 
-            # Wait for evaluation (not execution)
-            # This measures policy evaluation overhead
+            # Wait for evaluation (not execution): a pending action is only
+            # done once it has a terminal decision
+            if not is_decided(action):
+                action = wait_for_decision(
+                    action["id"],
+                    timeout=decision_timeout,
+                    base_url=FARAMESH_BASE_URL,
+                    token=FARAMESH_TOKEN,
+                    fetch=get_action,
+                )
+                if action is None:
+                    raise TimeoutError(f"no decision within {decision_timeout:g}s")
             end = time.perf_counter()
             latency_ms = (end - start) * 1000
-            latencies.append(latency_ms)
+            latencies.record(latency_ms)
 
             if (i + 1) % 10 == 0:
                 print(f"  {i + 1}/{num_samples} samples...")
 
         except Exception as e:
+            latencies.record_error()
             print(f"  Error on sample {i + 1}: {e}")
             continue
 
     return latencies
 
 
-def print_statistics(latencies: List[float], label: str):
+def print_statistics(latencies: LatencyHistogram, label: str):
     """Print latency statistics."""
-    if not latencies:
+    if not latencies.total_count:
         print(f"  No data for {label}")
         return
 
+    median = latencies.percentile(50)
     print(f"\n📊 {label} Statistics:")
     print("-" * 60)
-    print(f"  Samples: {len(latencies)}")
-    print(f"  Mean: {statistics.mean(latencies):.2f}ms")
-    print(f"  Median: {statistics.median(latencies):.2f}ms")
-    print(f"  Min: {min(latencies):.2f}ms")
-    print(f"  Max: {max(latencies):.2f}ms")
+    print(f"  Samples: {latencies.total_count}")
+    if latencies.errors:
+        print(f"  Errors: {latencies.errors}")
+    print(f"  Mean: {latencies.mean:.2f}ms")
+    print(f"  Median: {median:.2f}ms")
+    print(f"  Min: {latencies.min:.2f}ms")
+    print(f"  Max: {latencies.max:.2f}ms")
     print(
-        f"  Std Dev: {statistics.stdev(latencies):.2f}ms"
-        if len(latencies) > 1
+        f"  Std Dev: {latencies.stdev():.2f}ms"
+        if latencies.total_count > 1
         else "  Std Dev: N/A"
     )
 
     # Percentiles
-    sorted_latencies = sorted(latencies)
-    p50 = sorted_latencies[len(sorted_latencies) // 2]
-    p95 = sorted_latencies[int(len(sorted_latencies) * 0.95)]
-    p99 = sorted_latencies[int(len(sorted_latencies) * 0.99)]
-
-    print(f"  P50: {p50:.2f}ms")
-    print(f"  P95: {p95:.2f}ms")
-    print(f"  P99: {p99:.2f}ms")
+    print(f"  P50: {latencies.percentile(50):.2f}ms")
+    print(f"  P90: {latencies.percentile(90):.2f}ms")
+    print(f"  P99: {latencies.percentile(99):.2f}ms")
+    print(f"  P99.9: {latencies.percentile(99.9):.2f}ms")
+    if latencies.total_count < 1000:
+        print(f"  (p99.9 needs ≥1000 samples to differ from max; have {latencies.total_count})")
 
     # Check if meeting <2ms target
-    if statistics.median(latencies) < 2.0:
+    if median < 2.0:
         print(
-            f"\n  ✅ SUCCESS: Median latency ({statistics.median(latencies):.2f}ms) < 2ms target!"
+            f"\n  ✅ SUCCESS: Median latency ({median:.2f}ms) < 2ms target!"
         )
     else:
         print(
-            f"\n  ⚠️  Median latency ({statistics.median(latencies):.2f}ms) exceeds 2ms target"
+            f"\n  ⚠️  Median latency ({median:.2f}ms) exceeds 2ms target"
         )
         print("     Note: Network latency and server load affect results")
 
 
-def run_benchmark():
+def save_report(path: Optional[str], histograms: Dict[str, LatencyHistogram], elapsed: Dict[str, float]):
+    """Write p50/p90/p99/p99.9/max/throughput per label as JSON or CSV."""
+    if not path:
+        return
+    rows = [report_row(label, hist, elapsed.get(label)) for label, hist in histograms.items()]
+    write_report(path, rows, histograms)
+    print(f"\n📝 Report written to {path}")
+
+
+def run_benchmark(num_samples: int = 50, report: Optional[str] = None):
     """Run complete latency benchmark."""
     print("\n" + "=" * 80)
     print("⚡ Latency Benchmark: Faramesh Overhead Measurement")
@@ -210,8 +267,13 @@ def run_benchmark():
     print("  Warmup complete\n")
 
     # Run benchmarks
-    submission_latencies = measure_submission_latency(num_samples=50)
-    evaluation_latencies = measure_evaluation_latency(num_samples=50)
+    elapsed: Dict[str, float] = {}
+    started = time.perf_counter()
+    submission_latencies = measure_submission_latency(num_samples=num_samples)
+    elapsed["submission"] = time.perf_counter() - started
+    started = time.perf_counter()
+    evaluation_latencies = measure_evaluation_latency(num_samples=num_samples)
+    elapsed["evaluation"] = time.perf_counter() - started
 
     # Print results
     print("\n" + "=" * 80)
@@ -219,7 +281,9 @@ def run_benchmark():
     print("=" * 80)
 
     print_statistics(submission_latencies, "Action Submission Latency")
-    print_statistics(evaluation_latencies, "Policy Evaluation Latency")
+    print_statistics(evaluation_latencies, "Submit-to-Decision Latency")
+    histograms = {"submission": submission_latencies, "evaluation": evaluation_latencies}
+    save_report(report, histograms, elapsed)
 
     # Summary
     print("\n" + "=" * 80)
@@ -227,7 +291,7 @@ def run_benchmark():
     print("=" * 80)
     print()
 
-    if submission_latencies and statistics.median(submission_latencies) < 2.0:
+    if submission_latencies.total_count and submission_latencies.percentile(50) < 2.0:
         print("🎉 SUCCESS: Faramesh adds <2ms overhead!")
         print()
         print("This demonstrates:")
@@ -237,8 +301,8 @@ def run_benchmark():
         print("  - Zero compromise on safety or speed")
     else:
         print("⚠️  Latency results:")
-        if submission_latencies:
-            median = statistics.median(submission_latencies)
+        if submission_latencies.total_count:
+            median = submission_latencies.percentile(50)
             print(f"  Median: {median:.2f}ms")
             print()
             print("Factors that may affect results:")
@@ -254,6 +318,235 @@ def run_benchmark():
     print("  3. Cache policy evaluations when possible")
     print("  4. Use async/await for concurrent requests")
     print()
+    return histograms, elapsed
+
+
+def send_load_action(i: int):
+    """One open-loop request: the same submission the closed-loop run measures."""
+    return submit_action(
+        agent_id=FARAMESH_AGENT_ID,
+        tool="benchmark",
+        operation="load",
+        params={"iteration": i},
+        context={"benchmark": True, "mode": "open_loop"},
+    )
+
+
+def print_load_step(step: LoadResult):
+    """One line per rate step."""
+    s = step.summary()
+    print(
+        f"  {s['target_rps']:>8.1f} rps → {s['throughput_rps']:>8.1f} achieved | "
+        f"p50 {s['p50_ms']:.2f}ms  p90 {s['p90_ms']:.2f}ms  p99 {s['p99_ms']:.2f}ms  "
+        f"max {s['max_ms']:.2f}ms | errors {s['errors']} | "
+        f"send lag {s['max_send_lag_ms']:.2f}ms"
+    )
+
+
+def run_load(
+    rate: float,
+    duration: float,
+    workers: int,
+    slo_p99: float,
+    report: Optional[str] = None,
+    max_error_rate: float = 0.01,
+):
+    """Fixed-rate open-loop run; passes on the same rule as each sweep step."""
+    print(f"\n🚦 Open-loop load: {rate:.0f} rps for {duration:.0f}s across {workers} workers")
+    print("   Latency is measured from each request's scheduled send time\n")
+    step = run_open_loop(send_load_action, rate=rate, duration=duration, workers=workers)
+    print_load_step(step)
+    print_statistics(step.histogram, f"Open-Loop Submission Latency @ {rate:.0f} rps")
+    if report:
+        write_report(report, [step.summary()], {f"open_loop@{rate:g}rps": step.histogram})
+        print(f"\n📝 Report written to {report}")
+    if step.within_slo(slo_p99, max_error_rate):
+        print(f"\n  ✅ p99 {step.percentile(99):.2f}ms within {slo_p99:.2f}ms SLO")
+        return 0
+    if step.completed == 0:
+        print(f"\n  ❌ no request succeeded ({step.errors} errors)")
+    elif step.error_rate > max_error_rate:
+        print(f"\n  ❌ error rate {step.error_rate:.1%} exceeds {max_error_rate:.1%}")
+    else:
+        print(f"\n  ❌ p99 {step.percentile(99):.2f}ms exceeds {slo_p99:.2f}ms SLO")
+    return 1
+
+
+def run_sweep(
+    start: float,
+    stop: float,
+    factor: float,
+    duration: float,
+    workers: int,
+    slo_p99: float,
+    report: Optional[str] = None,
+    max_error_rate: float = 0.01,
+):
+    """Raise the rate until p99 (or the error rate) breaks the SLO."""
+    rates = rate_steps(start, stop, factor)
+    print(f"\n📈 Rate sweep: {rates[0]:.0f} → {rates[-1]:.0f} rps, {duration:.0f}s per step, {workers} workers")
+    print(f"   SLO: p99 ≤ {slo_p99:.2f}ms (latency from scheduled send time)\n")
+    steps = sweep_rates(
+        send_load_action,
+        rates,
+        slo_p99_ms=slo_p99,
+        duration=duration,
+        workers=workers,
+        max_error_rate=max_error_rate,
+        on_step=print_load_step,
+    )
+    best = max_sustainable_rate(steps, slo_p99, max_error_rate)
+    if report:
+        write_report(
+            report,
+            [step.summary() for step in steps],
+            {f"open_loop@{step.rate:g}rps": step.histogram for step in steps},
+        )
+        print(f"\n📝 Report written to {report}")
+    print()
+    if best is None:
+        print(f"❌ p99 exceeded {slo_p99:.2f}ms even at {rates[0]:.0f} rps")
+        return 1
+    if best == steps[-1].rate:
+        print(f"✅ p99 stayed within {slo_p99:.2f}ms up to {best:.0f} rps (sweep limit)")
+    else:
+        print(f"✅ Max sustainable rate: {best:.0f} rps (p99 ≤ {slo_p99:.2f}ms)")
+        print(f"   SLO broken at {steps[-1].rate:.0f} rps: p99 {steps[-1].percentile(99):.2f}ms")
+    return 0
+
+
+def run_compare(
+    name: str,
+    save: bool,
+    from_report: Optional[str],
+    num_samples: int,
+    threshold: float,
+    confidence: float,
+    report: Optional[str] = None,
+):
+    """Save a named baseline, or diff a run against one (exit 1 on regression)."""
+    baseline = None
+    if not save:
+        try:
+            baseline = load_baseline(name)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            print(f"   Save one first: python 07_latency_benchmark.py compare {name} --save")
+            return 2
+
+    if from_report:
+        histograms, elapsed = load_histograms(from_report), {}
+    else:
+        if not ensure_server_available(FARAMESH_BASE_URL):
+            return 1
+        histograms, elapsed = run_benchmark(num_samples=num_samples, report=report)
+
+    if baseline is None:
+        path = save_baseline(name, histograms, elapsed)
+        print(f"\n💾 Baseline '{name}' saved to {path}")
+        return 0
+
+    rows = compare_runs(baseline, histograms, threshold_pct=threshold, confidence=confidence)
+    print("\n" + "=" * 80)
+    print(f"🔬 Comparison against baseline '{name}' ({confidence:.0%} bootstrap CI, threshold +{threshold:g}%)")
+    print("=" * 80)
+    if not rows:
+        print("  No comparable measurements (labels differ or too few samples)")
+        return 2
+    for row in rows:
+        mark = "❌" if row["regressed"] else "✅"
+        print(
+            f"  {mark} {row['label']:<12} p{row['percentile']:<5g} "
+            f"{row['baseline_ms']:>8.3f}ms → {row['candidate_ms']:>8.3f}ms "
+            f"({row['change_pct']:+.1f}%, Δ CI [{row['ci_low_ms']:+.3f}, {row['ci_high_ms']:+.3f}]ms)"
+        )
+    regressed = [r for r in rows if r["regressed"]]
+    print()
+    if regressed:
+        print(f"❌ Latency regressed in {len(regressed)} of {len(rows)} percentiles")
+        return 1
+    print("✅ No significant latency regression")
+    return 0
+
+
+def run_breakdown(num_samples: int, report: Optional[str] = None):
+    """Time each phase of a submission: serialize, hash, connection, server, network, decode.
+
+    Submissions go through a traced ``httpx.Client`` built here, not the
+    SDK's ``submit_action``, so the phases describe that client stack.
+    """
+    try:
+        from faramesh.server.canonicalization import compute_request_hash
+    except ImportError:
+        compute_request_hash = None
+
+    print(f"\n🔍 Per-phase cost breakdown ({num_samples} submissions to {FARAMESH_BASE_URL})")
+    print("  Timed through a traced httpx.Client POST, not the SDK's submit_action:")
+    print("  the phases describe that client stack, not the one `bench` measures.\n")
+    breakdown = PhaseBreakdown()
+    errors = 0
+    started = time.perf_counter()
+    with httpx.Client(timeout=30.0) as client:
+        for i in range(num_samples):
+            payload = {
+                "agent_id": FARAMESH_AGENT_ID,
+                "tool": "benchmark",
+                "operation": "breakdown",
+                "params": {"iteration": i},
+                "context": {"benchmark": True},
+            }
+            try:
+                timed_submit(
+                    client,
+                    FARAMESH_BASE_URL,
+                    FARAMESH_TOKEN,
+                    payload,
+                    breakdown,
+                    hash_fn=compute_request_hash,
+                )
+            except Exception as e:
+                errors += 1
+                if errors <= 3:
+                    print(f"  Error on sample {i + 1}: {e}")
+    elapsed = time.perf_counter() - started
+
+    print(f"  {'Phase':<10} {'P50':>10} {'P99':>10} {'Share':>8}")
+    print("  " + "-" * 42)
+    for name, p50, p99, share in breakdown.rows():
+        print(f"  {name:<10} {p50:>8.3f}ms {p99:>8.3f}ms {share:>7.1%}")
+    total = breakdown.histograms["total"]
+    print("  " + "-" * 42)
+    print(f"  {'total':<10} {total.percentile(50):>8.3f}ms {total.percentile(99):>8.3f}ms")
+    print(f"\n  New connections: {breakdown.new_connections} | errors: {errors}")
+    if compute_request_hash is None:
+        print("  (hash phase skipped: faramesh.server.canonicalization not importable)")
+    if not breakdown.histograms["server"].total_count:
+        print("  (server phase unavailable: no Server-Timing / X-Process-Time header in responses)")
+
+    if report:
+        histograms = {name: h for name, h in breakdown.histograms.items() if h.total_count}
+        rows = [report_row(name, h, elapsed) for name, h in histograms.items()]
+        write_report(report, rows, histograms)
+        print(f"\n📝 Report written to {report}")
+    return 0
+
+
+def use_mock_server(latency_ms: float, mix: str) -> MockFarameshServer:
+    """Point the SDK at an in-process mock server on a loopback port.
+
+    Decisions come back after a fixed ``latency_ms`` from a seeded mix, so
+    what is left in the numbers is client-side cost (serialization, hashing,
+    HTTP stack) rather than the network or a policy engine.
+    """
+    global FARAMESH_BASE_URL
+    server = MockFarameshServer.from_env(
+        decision_latency=latency_ms / 1000.0,
+        decision_mix=parse_decision_mix(mix),
+    ).start()
+    FARAMESH_BASE_URL = server.base_url
+    configure(base_url=FARAMESH_BASE_URL, token=FARAMESH_TOKEN, agent_id=FARAMESH_AGENT_ID)
+    print(f"🧪 Using mock Faramesh server at {FARAMESH_BASE_URL} (decision latency {latency_ms:g}ms)")
+    return server
 
 
 def run_demo():
@@ -276,5 +569,81 @@ def run_demo():
         print()
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Faramesh latency benchmark")
+    parser.add_argument("--mock", action="store_true", help="benchmark against the local mock server")
+    parser.add_argument("--mock-latency-ms", type=float, default=0.0, help="mock decision latency")
+    parser.add_argument("--mock-mix", default="allowed=1", help='mock decisions, e.g. "allowed=0.9,denied=0.1"')
+    sub = parser.add_subparsers(dest="command")
+
+    bench = sub.add_parser("bench", help="closed-loop run without the prompt")
+    bench.add_argument("--samples", type=int, default=50, help="requests per measurement")
+
+    load = sub.add_parser("load", help="open-loop run at a fixed request rate")
+    load.add_argument("--rate", type=float, default=500.0, help="target requests/second")
+
+    sweep = sub.add_parser("sweep", help="raise the rate until p99 breaks the SLO")
+    sweep.add_argument("--start", type=float, default=50.0, help="first rate (rps)")
+    sweep.add_argument("--stop", type=float, default=2000.0, help="last rate (rps)")
+    sweep.add_argument("--factor", type=float, default=1.5, help="rate multiplier per step")
+
+    for p in (load, sweep):
+        p.add_argument("--duration", type=float, default=10.0, help="seconds per rate")
+        p.add_argument("--workers", type=int, default=32, help="concurrent senders")
+        p.add_argument("--slo-p99", type=float, default=2.0, help="p99 latency SLO (ms)")
+        p.add_argument("--max-error-rate", type=float, default=0.01, help="allowed failed fraction")
+    breakdown = sub.add_parser("breakdown", help="per-phase cost of a submission")
+    breakdown.add_argument("--samples", type=int, default=1000, help="submissions to time")
+
+    compare = sub.add_parser("compare", help="save a named baseline or test a run against it")
+    compare.add_argument("name", help="baseline name, e.g. sdk-1.4")
+    compare.add_argument("--save", action="store_true", help="store this run as the baseline")
+    compare.add_argument("--from-report", help="use a JSON --report file instead of running")
+    compare.add_argument("--samples", type=int, default=1000, help="requests per measurement")
+    compare.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown (%%)")
+    compare.add_argument("--confidence", type=float, default=0.95, help="bootstrap CI level")
+
+    for p in (bench, breakdown, load, sweep, compare):
+        p.add_argument("--report", help="write results to this .json or .csv file")
+
+    args = parser.parse_args(argv)
+    if args.mock:
+        use_mock_server(args.mock_latency_ms, args.mock_mix)
+    if args.command is None:
+        run_demo()
+        return 0
+    if args.command == "compare":
+        return run_compare(
+            args.name,
+            args.save,
+            args.from_report,
+            args.samples,
+            args.threshold,
+            args.confidence,
+            args.report,
+        )
+    if not ensure_server_available(FARAMESH_BASE_URL):
+        return 1
+    if args.command == "bench":
+        run_benchmark(num_samples=args.samples, report=args.report)
+        return 0
+    if args.command == "breakdown":
+        return run_breakdown(args.samples, args.report)
+    if args.command == "load":
+        return run_load(
+            args.rate, args.duration, args.workers, args.slo_p99, args.report, args.max_error_rate
+        )
+    return run_sweep(
+        args.start,
+        args.stop,
+        args.factor,
+        args.duration,
+        args.workers,
+        args.slo_p99,
+        args.report,
+        args.max_error_rate,
+    )
+
+
 if __name__ == "__main__":
-    run_demo()
+    sys.exit(main())
@@ -0,0 +1,624 @@
+"""
+Event-driven waiting for Faramesh action decisions.
+
+The demos used to call ``time.sleep(1)`` and then ``get_action()`` up to 120
+times, so every governed tool call paid at least a second even when the policy
+answered ``allowed`` instantly. ``wait_for_decision`` instead subscribes to the
+action's server-sent event stream and returns as soon as a decision exists.
+
+Servers without the stream endpoint fall back to long-poll
+(``GET /v1/actions/{id}?wait=N``); servers that ignore ``wait`` degrade to a
+poll paced by a ``PollPolicy`` (fast first probes, per-status exponential
+backoff, jitter, ``Retry-After``). Which mode a server supports is remembered
+per base URL so the probe only happens once per process. Pass a ``stats``
+dict to learn how many requests a wait took.
+
+When an agent fans out many governed calls, ``ActionWaiter`` tracks all of
+them from one asyncio task: every tick it fetches the pending IDs in a single
+batched ``GET /v1/actions?ids=...`` over one pooled connection and resolves a
+future per action as it reaches a decision. Synchronous callers (CrewAI
+tools, threaded agents) share one waiter through ``shared_waiter()``.
+
+Usage:
+    from action_waiter import wait_for_decision
+
+    action = wait_for_decision(action_id, base_url="http://127.0.0.1:8000",
+                               token="demo-token", fetch=get_action)
+    if action is None:
+        ...  # timed out, still pending
+
+    async with ActionWaiter(base_url="http://127.0.0.1:8000") as waiter:
+        results = await waiter.wait_many(action_ids, timeout=120)
+"""
+
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import httpx
+
+from http_transport import shared_client
+from poll_policy import DEFAULT_POLL_POLICY, PollPolicy, PollSchedule, parse_retry_after
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = os.getenv("FARAMESH_BASE_URL", "http://127.0.0.1:8000")
+DEFAULT_TOKEN = os.getenv("FARAMESH_TOKEN") or os.getenv("FARAMESH_API_KEY")
+
+# Statuses that mean "the decision exists" - everything else keeps us waiting.
+DECIDED_STATUSES = ("allowed", "approved", "denied", "failed", "completed", "succeeded")
+
+# Longest single long-poll request; the server answers earlier on any change.
+LONG_POLL_WAIT = 25.0
+
+# Immediate answers with an unchanged status before long-poll is given up.
+LONG_POLL_QUICK_RETURNS = 2
+
+# base_url -> "stream" | "long_poll" | "poll"
+_SERVER_MODE: Dict[str, str] = {}
+
+
+class StreamUnsupported(Exception):
+    """The server has no event stream for actions."""
+
+
+def is_decided(action_data: Optional[Dict[str, Any]]) -> bool:
+    return bool(action_data) and action_data.get("status") in DECIDED_STATUSES
+
+
+def _headers(token: Optional[str]) -> Dict[str, str]:
+    headers = {}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+def _iter_sse_events(resp: httpx.Response) -> Iterator[Dict[str, Any]]:
+    """Yield decoded JSON payloads from a text/event-stream response."""
+    data_lines = []
+    for line in resp.iter_lines():
+        if line.startswith(":"):
+            continue  # keep-alive comment
+        if line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+            continue
+        if line == "" and data_lines:
+            raw = "\n".join(data_lines)
+            data_lines = []
+            try:
+                yield json.loads(raw)
+            except ValueError:
+                continue
+
+
+def _stream_until_decided(
+    url: str,
+    action_id: str,
+    token: Optional[str],
+    deadline: float,
+    on_update: Callable[[Dict[str, Any]], None],
+    schedule: PollSchedule,
+) -> Optional[Dict[str, Any]]:
+    """Follow the SSE stream for one action, reconnecting until the deadline."""
+    stream_url = f"{url}/v1/actions/{action_id}/events"
+    headers = _headers(token)
+    headers["Accept"] = "text/event-stream"
+
+    status = None
+    while time.monotonic() < deadline:
+        remaining = max(deadline - time.monotonic(), 0.01)
+        timeout = httpx.Timeout(connect=5.0, read=min(remaining, 30.0), write=5.0, pool=5.0)
+        schedule.polls += 1
+        try:
+            with shared_client().stream("GET", stream_url, headers=headers, timeout=timeout) as resp:
+                ctype = resp.headers.get("content-type", "")
+                if resp.status_code in (404, 405, 406, 501) or (
+                    resp.is_success and "text/event-stream" not in ctype
+                ):
+                    raise StreamUnsupported(f"{resp.status_code} {ctype}")
+                resp.raise_for_status()
+                for event in _iter_sse_events(resp):
+                    action_data = event.get("action", event)
+                    on_update(action_data)
+                    if is_decided(action_data):
+                        return action_data
+                    status = action_data.get("status")
+        except httpx.ReadTimeout:
+            continue  # the server held the stream open for the whole read timeout
+        # Closed without a decision: pace reconnects so a misbehaving server
+        # is not hammered in a tight loop.
+        delay = schedule.next_delay(status)
+        time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+    return None
+
+
+def _long_poll_until_decided(
+    url: str,
+    action_id: str,
+    token: Optional[str],
+    deadline: float,
+    fetch: Optional[Callable[[str], Dict[str, Any]]],
+    on_update: Callable[[Dict[str, Any]], None],
+    max_failures: Optional[int],
+    schedule: PollSchedule,
+) -> Optional[Dict[str, Any]]:
+    """Long-poll the action; degrade to scheduled polling if ``wait`` is ignored."""
+    failures = 0
+    supports_wait = _SERVER_MODE.get(url) != "poll"
+    quick_returns = 0
+    last_status = None
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        wait = min(remaining, LONG_POLL_WAIT) if supports_wait else 0.0
+        started = time.monotonic()
+        retry_after = None
+        try:
+            schedule.polls += 1
+            if not supports_wait and fetch is not None:
+                action_data = fetch(action_id)
+            else:
+                resp = shared_client().get(
+                    f"{url}/v1/actions/{action_id}",
+                    params={"wait": f"{wait:.1f}"} if wait else None,
+                    headers=_headers(token),
+                    timeout=wait + 10.0,
+                )
+                retry_after = parse_retry_after(resp.headers.get("retry-after"))
+                resp.raise_for_status()
+                action_data = resp.json()
+            failures = 0
+        except Exception:
+            failures += 1
+            if max_failures is not None and failures >= max_failures:
+                raise
+            delay = schedule.next_delay("error", retry_after)
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            continue
+
+        on_update(action_data)
+        if is_decided(action_data):
+            return action_data
+
+        status = action_data.get("status")
+        elapsed = time.monotonic() - started
+        if wait and elapsed < wait / 2 and last_status is not None and status == last_status:
+            # Answered long before the wait elapsed without a change. Once is
+            # a blip; repeatedly means the server does not hold long-polls.
+            quick_returns += 1
+            if quick_returns >= LONG_POLL_QUICK_RETURNS:
+                supports_wait = False
+                _SERVER_MODE[url] = "poll"
+        else:
+            quick_returns = 0
+        last_status = status
+        if not supports_wait or retry_after is not None:
+            delay = schedule.next_delay(status, retry_after)
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+
+
+def wait_for_decision(
+    action_id: str,
+    timeout: float = 120.0,
+    base_url: Optional[str] = None,
+    token: Optional[str] = None,
+    fetch: Optional[Callable[[str], Dict[str, Any]]] = None,
+    on_pending: Optional[Callable[[Dict[str, Any]], None]] = None,
+    max_failures: Optional[int] = None,
+    policy: Optional[PollPolicy] = None,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Block until the action has a decision and return the action record.
+
+    Args:
+        action_id: Faramesh action ID.
+        timeout: Seconds to wait before giving up (returns None).
+        base_url: Faramesh server URL (defaults to FARAMESH_BASE_URL).
+        token: Bearer token (defaults to FARAMESH_TOKEN / FARAMESH_API_KEY).
+        fetch: Optional ``get_action``-style callable used once the server
+            is known to support neither streaming nor long-poll, so SDK
+            configuration (auth, retries) is reused for plain polling.
+        on_pending: Called once, the first time the action is seen pending.
+        max_failures: Re-raise after this many consecutive fetch errors
+            (None keeps retrying until the timeout).
+        policy: Polling schedule for the fallback path (DEFAULT_POLL_POLICY).
+        stats: If given, filled with ``polls`` (requests or stream
+            connections made), ``mode`` and ``elapsed`` seconds.
+    """
+    url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+    token = token if token is not None else DEFAULT_TOKEN
+    deadline = time.monotonic() + timeout
+    schedule = (policy or DEFAULT_POLL_POLICY).start()
+    pending_seen = []
+
+    def on_update(action_data: Dict[str, Any]) -> None:
+        if not pending_seen and action_data.get("status") == "pending_approval":
+            pending_seen.append(True)
+            if on_pending:
+                on_pending(action_data)
+
+    try:
+        if _SERVER_MODE.get(url, "stream") == "stream":
+            try:
+                result = _stream_until_decided(
+                    url, action_id, token, deadline, on_update, schedule
+                )
+                _SERVER_MODE[url] = "stream"
+                return result
+            except StreamUnsupported:
+                _SERVER_MODE[url] = "long_poll"
+            except httpx.HTTPError:
+                pass  # transient stream failure; poll for the rest of this wait
+
+        return _long_poll_until_decided(
+            url, action_id, token, deadline, fetch, on_update, max_failures, schedule
+        )
+    finally:
+        if stats is not None:
+            stats.update(
+                polls=schedule.polls,
+                mode=_SERVER_MODE.get(url, "stream"),
+                elapsed=schedule.elapsed,
+            )
+
+
+class ActionWaiter:
+    """Multiplexed asyncio waiter for many in-flight actions.
+
+    ``register()`` returns a future that resolves with the action record once
+    its status is in ``DECIDED_STATUSES``. A single background task polls the
+    registered IDs that are due, ``batch_size`` per request; each action keeps
+    its own ``PollSchedule`` so fresh actions are probed within milliseconds
+    while long ``pending_approval`` waits back off. Actions within
+    ``COALESCE`` of their own interval ride along with the current batch, and
+    jitter is applied to the shared tick rather than per action, so one
+    waiter's actions stay grouped into as few requests as possible.
+    If the server ignores the ``ids`` filter the waiter falls back to
+    concurrent per-action GETs on the same client (one HTTP/2 connection
+    when ``h2`` is installed).
+    """
+
+    COALESCE = 0.2
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        token: Optional[str] = None,
+        policy: Optional[PollPolicy] = None,
+        batch_size: int = 200,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.token = token if token is not None else DEFAULT_TOKEN
+        self.policy = policy or DEFAULT_POLL_POLICY
+        self._action_policy = PollPolicy(
+            initial=self.policy.initial,
+            multiplier=self.policy.multiplier,
+            max_interval=self.policy.max_interval,
+            jitter=0.0,
+            per_status=self.policy.per_status,
+            max_retry_after=self.policy.max_retry_after,
+        )
+        self.batch_size = batch_size
+        self.batch_supported: Optional[bool] = None
+        self.requests_sent = 0
+        self._client = client
+        self._owns_client = client is None
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}  # callers sharing each future
+        self._listeners: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._schedules: Dict[str, PollSchedule] = {}
+        self._due: Dict[str, float] = {}
+        self._interval: Dict[str, float] = {}
+        self._retry_after: Optional[float] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "ActionWaiter":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    @property
+    def pending(self) -> int:
+        return len(self._futures)
+
+    def register(self, action_id: str) -> asyncio.Future:
+        """Start tracking ``action_id``; repeated calls share one future.
+
+        Each call counts as one waiter; tracking stops early only once every
+        waiter that gave up has released it.
+        """
+        fut = self._futures.get(action_id)
+        self._waiters[action_id] = self._waiters.get(action_id, 0) + 1
+        if fut is None:
+            fut = asyncio.get_running_loop().create_future()
+            self._futures[action_id] = fut
+            self._schedules[action_id] = self._action_policy.start()
+            self._due[action_id] = time.monotonic()
+            self._interval[action_id] = 0.0
+        self._ensure_running()
+        self._wakeup.set()
+        return fut
+
+    async def wait(
+        self,
+        action_id: str,
+        timeout: Optional[float] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        on_update: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Wait for one action; returns None on timeout and stops tracking it.
+
+        ``stats``, if given, receives ``polls``: how many fetches included
+        this action before it was decided. ``on_update`` is called on the
+        waiter's loop with every undecided record fetched for this action.
+        """
+        fut = self.register(action_id)
+        if on_update is not None:
+            self._listeners.setdefault(action_id, []).append(on_update)
+        try:
+            action_data, polls = await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            if stats is not None:
+                stats["polls"] = self._schedules[action_id].polls if action_id in self._schedules else 0
+            return None
+        finally:
+            if not fut.done():
+                self._release(action_id, fut)  # timed out or cancelled
+            listeners = self._listeners.get(action_id)
+            if on_update is not None and listeners and on_update in listeners:
+                listeners.remove(on_update)
+                if not listeners:
+                    del self._listeners[action_id]
+        if stats is not None:
+            stats["polls"] = polls
+        return action_data
+
+    async def wait_many(
+        self, action_ids: Iterable[str], timeout: Optional[float] = None
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Wait for several actions at once; undecided ones map to None."""
+        ids = list(dict.fromkeys(action_ids))
+        if not ids:
+            return {}
+        futures = [self.register(aid) for aid in ids]
+        await asyncio.wait(futures, timeout=timeout)
+        results = {}
+        for aid, fut in zip(ids, futures):
+            if fut.done() and not fut.cancelled():
+                results[aid] = fut.result()[0]
+            else:
+                self._release(aid, fut)
+                results[aid] = None
+        return results
+
+    def _release(self, action_id: str, fut: asyncio.Future) -> None:
+        """One waiter gave up on ``fut``; stop tracking when it was the last."""
+        if self._futures.get(action_id) is not fut:
+            return  # already decided and forgotten, or re-registered since
+        remaining = self._waiters.get(action_id, 1) - 1
+        if remaining > 0:
+            self._waiters[action_id] = remaining
+        else:
+            self._forget(action_id)
+
+    def _forget(self, action_id: str) -> None:
+        fut = self._futures.pop(action_id, None)
+        self._waiters.pop(action_id, None)
+        self._listeners.pop(action_id, None)
+        self._schedules.pop(action_id, None)
+        self._due.pop(action_id, None)
+        self._interval.pop(action_id, None)
+        if fut is not None and not fut.done():
+            fut.cancel()
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                pass  # already logged and delivered to the pending futures
+            self._task = None
+        for fut in self._futures.values():
+            if not fut.done():
+                fut.cancel()
+        self._futures.clear()
+        self._waiters.clear()
+        self._listeners.clear()
+        self._schedules.clear()
+        self._due.clear()
+        self._interval.clear()
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+            self._client = None
+
+    def _ensure_running(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=_headers(self.token),
+                timeout=10.0,
+                http2=importlib.util.find_spec("h2") is not None,
+            )
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            self._task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        """If the poller dies, fail its pending futures instead of leaving them hanging."""
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        logger.error("ActionWaiter poller stopped: %r", error)
+        for action_id, fut in list(self._futures.items()):
+            if not fut.done():
+                fut.set_exception(error)
+            self._forget(action_id)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._futures:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            now = time.monotonic()
+            ids = [
+                aid for aid, fut in self._futures.items()
+                if not fut.done() and self._due[aid] - now <= self.COALESCE * self._interval[aid]
+            ]
+            self._retry_after = None
+            for start in range(0, len(ids), self.batch_size):
+                chunk = ids[start:start + self.batch_size]
+                try:
+                    actions = await self._fetch(chunk)
+                except Exception as e:  # transport errors, malformed bodies, ...
+                    logger.warning("ActionWaiter fetch of %d actions failed: %r", len(chunk), e)
+                    actions = []  # every action in the chunk backs off
+                by_id = {a.get("id"): a for a in actions}
+                for aid in chunk:
+                    self._after_poll(aid, by_id.get(aid))
+            for aid in [aid for aid, fut in self._futures.items() if fut.done()]:
+                self._forget(aid)
+            if self._futures:
+                self._wakeup.clear()
+                delay = max(min(self._due.values()) - time.monotonic(), 0.0)
+                if self.policy.jitter:
+                    delay *= 1 + random.uniform(0, self.policy.jitter)
+                try:
+                    # register() sets the event so new actions get a fast first probe
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _after_poll(self, action_id: str, action_data: Optional[Dict[str, Any]]) -> None:
+        fut = self._futures.get(action_id)
+        schedule = self._schedules.get(action_id)
+        if fut is None or schedule is None or fut.done():
+            return
+        schedule.polls += 1
+        if is_decided(action_data):
+            fut.set_result((action_data, schedule.polls))
+            return
+        if action_data:
+            for listener in list(self._listeners.get(action_id, ())):
+                try:
+                    listener(action_data)
+                except Exception as e:  # a caller's callback must not stop the poller
+                    logger.warning("ActionWaiter on_update for %s failed: %r", action_id, e)
+        status = action_data.get("status") if action_data else "error"
+        interval = schedule.next_delay(status, self._retry_after)
+        self._interval[action_id] = interval
+        self._due[action_id] = time.monotonic() + interval
+
+    async def _fetch(self, ids: List[str]) -> List[Dict[str, Any]]:
+        if self.batch_supported is not False:
+            actions = await self._fetch_batch(ids)
+            if actions is not None:
+                return actions
+        return await self._fetch_each(ids)
+
+    async def _fetch_batch(self, ids: List[str]) -> Optional[List[Dict[str, Any]]]:
+        self.requests_sent += 1
+        resp = await self._client.get(
+            f"{self.base_url}/v1/actions", params={"ids": ",".join(ids), "limit": len(ids)}
+        )
+        self._retry_after = parse_retry_after(resp.headers.get("retry-after"))
+        if resp.status_code in (404, 405, 422):
+            self.batch_supported = False
+            return None
+        resp.raise_for_status()
+        body = resp.json()
+        if isinstance(body, dict):
+            body = body.get("actions") or body.get("items") or []
+        wanted = set(ids)
+        actions = [a for a in body if isinstance(a, dict)]
+        if any(a.get("id") not in wanted for a in actions):
+            # A server that ignores the filter answers with unrelated actions;
+            # ids that are merely unknown or deleted are just missing.
+            self.batch_supported = False
+            return None
+        self.batch_supported = True
+        return actions
+
+    async def _fetch_each(self, ids: List[str]) -> List[Dict[str, Any]]:
+        async def one(aid: str) -> Optional[Dict[str, Any]]:
+            self.requests_sent += 1
+            resp = await self._client.get(f"{self.base_url}/v1/actions/{aid}")
+            retry_after = parse_retry_after(resp.headers.get("retry-after"))
+            if retry_after is not None:
+                self._retry_after = max(retry_after, self._retry_after or 0.0)
+            if resp.status_code == 404:
+                return None
+            resp.raise_for_status()
+            return resp.json()
+
+        results = await asyncio.gather(*(one(aid) for aid in ids), return_exceptions=True)
+        return [r for r in results if isinstance(r, dict)]
+
+    def wait_sync(
+        self,
+        action_id: str,
+        timeout: Optional[float] = None,
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Block the calling thread on a waiter running in ``shared_waiter()``'s loop."""
+        loop = _shared_loop()
+        return asyncio.run_coroutine_threadsafe(self.wait(action_id, timeout, stats), loop).result()
+
+
+_SHARED_LOCK = threading.Lock()
+_SHARED_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SHARED_WAITERS: Dict[Tuple[str, Optional[str]], ActionWaiter] = {}
+
+
+def _shared_loop() -> asyncio.AbstractEventLoop:
+    global _SHARED_LOOP
+    with _SHARED_LOCK:
+        if _SHARED_LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="action-waiter", daemon=True).start()
+            _SHARED_LOOP = loop
+        return _SHARED_LOOP
+
+
+def shared_waiter(base_url: Optional[str] = None, token: Optional[str] = None) -> ActionWaiter:
+    """Process-wide ``ActionWaiter`` for synchronous callers.
+
+    Every thread that calls ``shared_waiter(...).wait_sync(action_id)`` is
+    served by the same background poller, so a thousand blocked tool calls
+    cost one batched request per tick rather than a thousand poll loops.
+    Callers with different tokens get separate waiters, so nobody polls
+    with another caller's credentials.
+    """
+    url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+    key = (url, token if token is not None else DEFAULT_TOKEN)
+    _shared_loop()
+    with _SHARED_LOCK:
+        waiter = _SHARED_WAITERS.get(key)
+        if waiter is None:
+            waiter = ActionWaiter(base_url=url, token=key[1])
+            _SHARED_WAITERS[key] = waiter
+        return waiter
+
+
+__all__ = [
+    "ActionWaiter",
+    "DECIDED_STATUSES",
+    "StreamUnsupported",
+    "is_decided",
+    "shared_waiter",
+    "wait_for_decision",
+]
@@ -0,0 +1,161 @@
+"""
+In-memory, indexed view of the Stripe destination allowlist file.
+
+``stripe_allowlist.json`` holds a ``destinations`` list of
+``{account_id, label, email, approved, added_at}`` entries. Re-reading and
+scanning it for every lookup costs a file read, a JSON parse and a linear
+scan - several times per transfer. ``AllowlistStore`` keeps a parsed
+``Allowlist`` snapshot with hash indexes instead:
+
+- lookups by account id, label or email are dict hits on the snapshot;
+- ``current()`` only ``stat()``s the file and re-parses it when the inode,
+  mtime or size changed (another process saved it);
+- ``update()`` serializes writers - a thread lock plus an ``flock`` on a
+  sidecar ``.lock`` file across processes - re-reads the file under the
+  lock, applies the change and publishes it with an atomic ``os.replace``,
+  so concurrent writers never lose each other's entries and readers never
+  see a half-written file.
+
+Usage:
+    store = AllowlistStore("stripe_allowlist.json")
+    allow = store.current()
+    acct = allow.account_for("vendor-bob")
+    allow.is_allowlisted(acct), allow.label(acct)
+
+    def approve(data):
+        data["destinations"].append({"account_id": acct, "approved": True})
+    store.update(approve)
+"""
+
+import copy
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers in one process are still serialized
+    fcntl = None
+
+_EMPTY: Dict[str, Any] = {"destinations": []}
+
+
+class Allowlist:
+    """One parsed version of the allowlist file, indexed for O(1) lookups.
+
+    Treat it as read-only; change the file through ``AllowlistStore.update``.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.by_account: Dict[str, Dict[str, Any]] = {}
+        self.by_name: Dict[str, str] = {}  # approved label / email (lowercase) -> account id
+        for entry in data.get("destinations", []):
+            acct = entry.get("account_id")
+            if not acct:
+                continue
+            self.by_account.setdefault(acct, entry)
+            if entry.get("approved"):
+                for name in (entry.get("label"), entry.get("email")):
+                    if name:
+                        self.by_name.setdefault(name.lower(), acct)
+
+    def __len__(self) -> int:
+        return len(self.by_account)
+
+    def entry(self, acct_id: str) -> Optional[Dict[str, Any]]:
+        return self.by_account.get(acct_id)
+
+    def is_allowlisted(self, acct_id: str) -> bool:
+        entry = self.by_account.get(acct_id)
+        return bool(entry and entry.get("approved") is True)
+
+    def label(self, acct_id: str) -> str:
+        entry = self.by_account.get(acct_id)
+        return (entry and entry.get("label")) or acct_id
+
+    def account_for(self, name: str) -> Optional[str]:
+        """Account id of the approved destination labelled or registered as ``name``."""
+        return self.by_name.get((name or "").strip().lower())
+
+
+def _file_key(st: os.stat_result) -> Tuple[int, int, int, int]:
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class AllowlistStore:
+    """Cached ``Allowlist`` for a JSON file, reloaded only when the file changes."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._snapshot = Allowlist(copy.deepcopy(_EMPTY))
+        self._key: Optional[Tuple[int, int, int, int]] = None
+        self.loads = 0
+
+    def ensure_file(self) -> None:
+        if not self.path.exists():
+            self.update(lambda data: None)
+
+    def _read(self) -> Tuple[Dict[str, Any], Optional[Tuple[int, int, int, int]]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return copy.deepcopy(_EMPTY), None
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            data = copy.deepcopy(_EMPTY)
+        if not isinstance(data, dict) or not isinstance(data.get("destinations"), list):
+            data = copy.deepcopy(_EMPTY)
+        self.loads += 1
+        return data, _file_key(st)
+
+    def current(self) -> Allowlist:
+        """Latest snapshot; costs a ``stat()`` unless the file changed on disk."""
+        try:
+            key = _file_key(os.stat(self.path))
+        except FileNotFoundError:
+            key = None
+        with self._lock:
+            if key != self._key:
+                data, self._key = self._read()
+                self._snapshot = Allowlist(data)
+            return self._snapshot
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.path.with_name(self.path.name + ".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def update(self, mutate: Callable[[Dict[str, Any]], None]) -> Allowlist:
+        """Apply ``mutate`` to the on-disk data under the writer lock and save it."""
+        with self._exclusive():
+            data, _ = self._read()
+            mutate(data)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            self._key = _file_key(os.stat(self.path))
+            self._snapshot = Allowlist(data)
+            return self._snapshot
+
+
+__all__ = ["Allowlist", "AllowlistStore"]
@@ -0,0 +1,175 @@
+"""
+Asyncio client for the Faramesh actions API.
+
+The Faramesh SDK's ``submit_action`` / ``get_action`` are blocking, so a
+coroutine tool that calls them stalls its event loop, and every other
+conversation on it, for the whole policy round trip. ``AsyncFarameshClient``
+covers the calls the governed tools need with the same arguments as the
+SDK, over the loop's pooled ``async_client()``:
+
+- ``submit_action(...)``: ``POST /v1/actions``;
+- ``get_action(action_id)``: ``GET /v1/actions/{id}``;
+- ``wait_for_decision(action_id)``: returns at once when the submit response
+  already carries a decision, otherwise waits on an ``ActionWaiter``, so
+  all pending actions on the loop share one batched poll.
+
+Usage:
+    faramesh = shared_async_faramesh("http://127.0.0.1:8000", token="demo-token")
+    action = await faramesh.submit_action(agent_id="refundbot", tool="shopify",
+                                          operation="get_order", params={...})
+    action = await faramesh.wait_for_decision(action, timeout=120)
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from action_waiter import DEFAULT_BASE_URL, DEFAULT_TOKEN, ActionWaiter, is_decided
+from http_transport import async_client
+from poll_policy import PollPolicy
+
+
+class AsyncFarameshClient:
+    """Submit and await Faramesh actions without blocking the event loop."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        token: Optional[str] = None,
+        policy: Optional[PollPolicy] = None,
+        timeout: float = 15.0,
+    ):
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.token = token if token is not None else DEFAULT_TOKEN
+        self.policy = policy
+        self.timeout = timeout
+        self._waiter: Optional[ActionWaiter] = None
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    async def submit_action(
+        self,
+        agent_id: str,
+        tool: str,
+        operation: str,
+        params: Optional[Dict[str, Any]] = None,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Submit an action for policy evaluation; returns the action record."""
+        payload = {
+            "agent_id": agent_id,
+            "tool": tool,
+            "operation": operation,
+            "params": params or {},
+            "context": context or {},
+        }
+        resp = await async_client().post(
+            f"{self.base_url}/v1/actions",
+            json=payload,
+            headers=self._headers(),
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    async def get_action(self, action_id: str) -> Dict[str, Any]:
+        resp = await async_client().get(
+            f"{self.base_url}/v1/actions/{action_id}",
+            headers=self._headers(),
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    async def wait_for_decision(
+        self,
+        action: Union[str, Dict[str, Any]],
+        timeout: float = 120.0,
+        on_pending: Optional[Callable[[Dict[str, Any]], None]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Wait until the action has a decision; None on timeout.
+
+        ``action`` is an action ID or the record ``submit_action`` returned.
+        A record that is already decided is returned without a request.
+        ``on_pending`` is called once, the first time the action is seen
+        ``pending_approval`` - in that record or in any later poll - as the
+        synchronous ``wait_for_decision`` does.
+        """
+        pending_seen = []
+
+        def on_update(action_data: Dict[str, Any]) -> None:
+            if not pending_seen and action_data.get("status") == "pending_approval":
+                pending_seen.append(True)
+                if on_pending:
+                    on_pending(action_data)
+
+        if isinstance(action, dict):
+            if is_decided(action):
+                if stats is not None:
+                    stats["polls"] = 0
+                return action
+            on_update(action)
+            action_id = action["id"]
+        else:
+            action_id = action
+        return await self.waiter.wait(
+            action_id, timeout=timeout, stats=stats, on_update=on_update if on_pending else None
+        )
+
+    @property
+    def waiter(self) -> ActionWaiter:
+        if self._waiter is None:
+            self._waiter = ActionWaiter(base_url=self.base_url, token=self.token, policy=self.policy)
+        return self._waiter
+
+    async def close(self) -> None:
+        if self._waiter is not None:
+            await self._waiter.close()
+            self._waiter = None
+
+    async def __aenter__(self) -> "AsyncFarameshClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+_SHARED_LOCK = threading.Lock()
+_SHARED: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], AsyncFarameshClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def shared_async_faramesh(
+    base_url: Optional[str] = None,
+    token: Optional[str] = None,
+    policy: Optional[PollPolicy] = None,
+) -> AsyncFarameshClient:
+    """One ``AsyncFarameshClient`` per (running loop, base URL, token).
+
+    The client's ``ActionWaiter`` holds futures bound to a loop, so every
+    coroutine on the loop shares it and its batched poll. Callers with
+    different tokens get separate clients; asking for an existing client
+    with a different ``policy`` raises ``ValueError``.
+    """
+    url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+    key = (url, token if token is not None else DEFAULT_TOKEN)
+    loop = asyncio.get_running_loop()
+    with _SHARED_LOCK:
+        clients = _SHARED.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = AsyncFarameshClient(base_url=url, token=key[1], policy=policy)
+            clients[key] = client
+        elif policy is not None and client.policy is not policy:
+            raise ValueError(f"Shared client for {url} already uses a different poll policy")
+        return client
+
+
+__all__ = ["AsyncFarameshClient", "shared_async_faramesh"]
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Batch request hashing across processes, for re-verifying stored actions.
+
+Re-checking an audit log means recomputing ``compute_request_hash`` for
+millions of stored payloads. Canonicalization is CPU-bound, and the GIL
+keeps threads from helping, so ``compute_request_hashes`` shards the
+payloads over a process pool:
+
+- payloads are cut into chunks of ``chunk_size``, and each chunk crosses
+  to a worker as a single ``marshal`` blob. marshal is C-fast, keeps int,
+  float, tuple and non-str key types exactly (a JSON round trip would
+  not), and avoids pickling thousands of small objects one by one;
+- each worker sends back one ASCII blob of concatenated hex digests per
+  chunk;
+- at most ``2 * workers`` chunks are in flight, and results come back in
+  input order, so an unbounded iterable is hashed in bounded memory;
+- ``encoded=True`` takes JSON text or bytes as stored (e.g. rows read
+  from the audit table). The parent then only batches them, and parsing
+  happens in the workers too.
+
+Workers hash with Faramesh's own ``compute_request_hash`` when it is
+importable, and the reference in ``canonical_json`` otherwise. A chunk
+that marshal cannot encode, e.g. one holding a dict subclass, is hashed
+in the parent instead, when its turn comes. Errors surface as they would
+from a plain loop: every hash before the failing payload's chunk is
+yielded first.
+
+Usage:
+    hashes = compute_request_hashes(payloads)                  # list, input order
+    for h in iter_request_hashes(rows, encoded=True): ...      # streaming
+    python canonical_batch.py --count 200000 --workers 1 2 4   # throughput
+"""
+
+import argparse
+import json
+import marshal
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Union
+
+from canonical_json import resolve_request_hash
+
+CHUNK_SIZE = 512  # payloads per worker task
+_HEX = 64
+
+_hash_fn: Optional[Callable[[Any], str]] = None
+
+
+def _init_worker() -> None:
+    global _hash_fn
+    _hash_fn = resolve_request_hash()[0]
+
+
+def _hash_items(items: List[Any], encoded: bool) -> bytes:
+    fn = _hash_fn or resolve_request_hash()[0]
+    if encoded:
+        items = [json.loads(item) for item in items]
+    return "".join([fn(item) for item in items]).encode("ascii")
+
+
+def _hash_blob(blob: bytes, encoded: bool) -> bytes:
+    """Worker task: one marshalled chunk in, one blob of hex digests out."""
+    return _hash_items(marshal.loads(blob), encoded)
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _split(blob: bytes) -> Iterator[str]:
+    text = blob.decode("ascii")
+    for i in range(0, len(text), _HEX):
+        yield text[i:i + _HEX]
+
+
+def iter_request_hashes(
+    payloads: Iterable[Any],
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    encoded: bool = False,
+) -> Iterator[str]:
+    """Yield ``compute_request_hash(p)`` for each payload, in input order.
+
+    ``workers`` defaults to ``os.cpu_count()``; with one worker everything
+    runs in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(payloads, chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _split(_hash_items(chunk, encoded))
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    pending: Deque[Union[Future, Callable[[], bytes]]] = deque()
+
+    def result(item: Union[Future, Callable[[], bytes]]) -> bytes:
+        return item.result() if isinstance(item, Future) else item()
+
+    try:
+        for chunk in chunks:
+            try:
+                pending.append(pool.submit(_hash_blob, marshal.dumps(chunk), encoded))
+            except ValueError:  # unmarshallable object: hash here, in turn, raising the usual error
+                pending.append(partial(_hash_items, chunk, encoded))
+            if len(pending) >= 2 * workers:
+                yield from _split(result(pending.popleft()))
+        while pending:
+            yield from _split(result(pending.popleft()))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def compute_request_hashes(
+    payloads: Iterable[Any],
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    encoded: bool = False,
+) -> List[str]:
+    """Request hashes of ``payloads`` as a list, in input order."""
+    return list(iter_request_hashes(payloads, workers, chunk_size, encoded))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure batch request-hash throughput per worker count")
+    parser.add_argument("--count", type=int, default=100_000, help="payloads to hash per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    from canonical_bench import float_list, nested_params, tiny_get
+
+    shapes = [tiny_get(), nested_params(3, 3), float_list(50)]
+    payloads = [dict(shapes[i % 3], context={"action_id": i}) for i in range(args.count)]
+    source = resolve_request_hash()[1]
+    print(f"\n⚙️  compute_request_hashes: {args.count:,} payloads ({source} hash, {os.cpu_count()} CPUs)\n")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        compute_request_hashes(payloads, workers=workers, chunk_size=args.chunk_size)
+        rate = args.count / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"  workers={workers:<3} {rate:>12,.0f} hashes/s   x{rate / baseline:.2f}")
+    print()
+    return 0
+
+
+__all__ = ["CHUNK_SIZE", "compute_request_hashes", "iter_request_hashes"]
+
+if __name__ == "__main__":
+    sys.exit(main())
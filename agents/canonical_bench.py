@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for request hashing over realistic agent payload shapes.
+
+``compute_request_hash`` runs on every governed call, so its cost has to
+stay small next to the network round trip. This suite times it over a
+generated corpus and reports, per case:
+
+    ns/op        median of repeated ``timeit`` runs
+    alloc        peak bytes allocated during one call (``tracemalloc``)
+    bytes        size of the canonical encoding
+    ns/byte      cost per canonical byte - flat means linear scaling
+
+Corpus: tiny HTTP GETs, deeply nested params, large float lists,
+unicode-heavy strings and multi-megabyte tool outputs. Scaling curves
+repeat a shape at growing size (``size``) and nesting depth (``depth``)
+to show where hashing stops being cheap.
+
+Uses Faramesh's ``compute_request_hash`` when importable, otherwise the
+reference in ``canonical_json``; ``--impl stream`` times the streaming
+``stream_request_hash`` instead, and ``--impl merkle`` the opt-in v2
+Merkle hash (repeated runs hit its sub-tree cache, i.e. the cost of
+resubmitting an identical payload).
+
+Usage:
+    python canonical_bench.py                     # corpus + both curves
+    python canonical_bench.py --quick             # smaller sizes, faster
+    python canonical_bench.py --report bench.json # also write rows (.json/.csv)
+    python canonical_bench.py --impl stream       # streaming encoder + incremental SHA-256
+    python canonical_bench.py --impl merkle       # v2 hash with cached sub-tree digests
+"""
+
+import argparse
+import csv
+import json
+import random
+import statistics
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from canonical_json import canonical_bytes, compute_request_hash, resolve_request_hash, stream_request_hash
+from canonical_merkle import merkle_request_hash
+
+Payload = Dict[str, Any]
+ROW_FIELDS = ["suite", "case", "x", "bytes", "ns_per_op", "ns_per_byte", "alloc_bytes", "ops", "error"]
+
+_WORDS = ["refund", "order", "customer", "ticket", "approve", "transfer", "policy", "agent"]
+_UNICODE = "héllo wörld 你好世界 こんにちは 안녕하세요 Здравствуйте مرحبا 🚀🔒💸 "
+
+
+def _request(tool: str, operation: str, params: Any, context: Any = None) -> Payload:
+    return {
+        "agent_id": "bench-agent",
+        "tool": tool,
+        "operation": operation,
+        "params": params,
+        "context": context or {},
+    }
+
+
+# -- corpus -------------------------------------------------------------------
+
+
+def tiny_get() -> Payload:
+    return _request("http", "get", {"url": "https://api.example.com/v1/orders/1001", "method": "GET"})
+
+
+def nested_params(depth: int, fanout: int = 2) -> Payload:
+    """``depth`` levels of dicts, ``fanout`` children each, leaves mixing types."""
+
+    def build(level: int) -> Any:
+        if level == 0:
+            return {"amount": 12.5, "count": 3, "ok": True, "note": "leaf"}
+        return {f"k{i}": build(level - 1) for i in range(fanout)}
+
+    return _request("config", "apply", build(depth))
+
+
+def deep_chain(depth: int) -> Payload:
+    """A single ``depth``-deep chain of one-key dicts (worst case for recursion)."""
+    node: Any = {"value": 1.0}
+    for i in range(depth):
+        node = {f"level{i}": node}
+    return _request("config", "apply", node)
+
+
+def float_list(n: int, seed: int = 7) -> Payload:
+    rng = random.Random(seed)
+    values = [round(rng.uniform(0, 10_000), rng.choice((0, 1, 2, 6))) for _ in range(n)]
+    return _request("metrics", "ingest", {"series": "latency_ms", "values": values})
+
+
+def unicode_text(chars: int) -> Payload:
+    text = (_UNICODE * (chars // len(_UNICODE) + 1))[:chars]
+    return _request("notification", "send", {"message": text, "locale": "multi"})
+
+
+def tool_output(size_bytes: int, seed: int = 11) -> Payload:
+    """A large ASCII tool result, e.g. file contents or command output."""
+    rng = random.Random(seed)
+    line = " ".join(rng.choice(_WORDS) for _ in range(12)) + "\n"
+    text = (line * (size_bytes // len(line) + 1))[:size_bytes]
+    return _request("filesystem", "write_file", {"path": "/tmp/out.log", "content": text})
+
+
+def corpus(quick: bool = False) -> List[Tuple[str, Payload]]:
+    """Named representative payloads."""
+    mb = 256 * 1024 if quick else 4 * 1024 * 1024
+    return [
+        ("tiny_http_get", tiny_get()),
+        ("nested_depth8_fanout3", nested_params(8 if not quick else 6, 3)),
+        ("deep_chain_500", deep_chain(500)),
+        ("floats_10k", float_list(2_000 if quick else 10_000)),
+        ("unicode_64k", unicode_text(16_384 if quick else 65_536)),
+        ("tool_output_4mb" if not quick else "tool_output_256k", tool_output(mb)),
+    ]
+
+
+def size_series(quick: bool = False) -> List[Tuple[int, Payload]]:
+    top = 18 if quick else 22
+    return [(1 << p, tool_output(1 << p)) for p in range(8, top + 1, 2)]
+
+
+def depth_series(quick: bool = False) -> List[Tuple[int, Payload]]:
+    depths = [1, 10, 50, 100, 200, 400] if quick else [1, 10, 50, 100, 200, 400, 800, 1600]
+    return [(d, deep_chain(d)) for d in depths]
+
+
+# -- measurement --------------------------------------------------------------
+
+
+def peak_alloc(fn: Callable[[Any], Any], payload: Any) -> int:
+    """Peak bytes allocated while ``fn(payload)`` runs."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn(payload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - before)
+
+
+def measure(
+    fn: Callable[[Any], Any], payload: Any, repeat: int = 5, min_time: float = 0.05
+) -> Dict[str, float]:
+    """ns/op (median of ``repeat`` runs of at least ``min_time`` s each), alloc and size.
+
+    A payload the hash function rejects gets an ``error`` row instead.
+    """
+    try:
+        size = len(canonical_bytes(payload))
+        fn(payload)
+    except Exception as e:  # e.g. RecursionError past the interpreter's depth limit
+        return {"bytes": None, "ns_per_op": None, "ns_per_byte": None, "alloc_bytes": None,
+                "ops": 0, "error": type(e).__name__}
+    timer = timeit.Timer(lambda: fn(payload))
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    runs = [timer.timeit(number) / number for _ in range(repeat)]
+    ns = round(statistics.median(runs) * 1e9, 1)
+    return {
+        "bytes": size,
+        "ns_per_op": ns,
+        # from the rounded ns_per_op, so the report's two columns agree
+        "ns_per_byte": round(ns / size, 3) if size else 0.0,
+        "alloc_bytes": peak_alloc(fn, payload),
+        "ops": number * repeat,
+    }
+
+
+def run_cases(
+    fn: Callable[[Any], Any], suite: str, cases: Iterable[Tuple[Any, Payload]], **kwargs: Any
+) -> List[Dict[str, Any]]:
+    rows = []
+    for label, payload in cases:
+        row = {"suite": suite, "case": label if suite == "corpus" else suite, "x": label}
+        row.update(measure(fn, payload, **kwargs))
+        rows.append(row)
+    return rows
+
+
+def run_suite(fn: Callable[[Any], Any], quick: bool = False, **kwargs: Any) -> List[Dict[str, Any]]:
+    """Corpus rows followed by the size and depth scaling curves."""
+    return (
+        run_cases(fn, "corpus", corpus(quick), **kwargs)
+        + run_cases(fn, "size", size_series(quick), **kwargs)
+        + run_cases(fn, "depth", depth_series(quick), **kwargs)
+    )
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024 or unit == "MiB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}MiB"
+
+
+def print_rows(rows: List[Dict[str, Any]]) -> None:
+    suite = None
+    for row in rows:
+        if row["suite"] != suite:
+            suite = row["suite"]
+            label = {"corpus": "case", "size": "content bytes", "depth": "depth"}[suite]
+            print(f"\n  [{suite}]")
+            print(f"  {label:<24} {'canonical':>10} {'ns/op':>14} {'ns/byte':>9} {'alloc':>10}")
+            print("  " + "-" * 71)
+        if row.get("error"):
+            print(f"  {str(row['x']):<24} {'-':>10} {'❌ ' + row['error']:>14}")
+            continue
+        print(
+            f"  {str(row['x']):<24} {_fmt_bytes(row['bytes']):>10} {row['ns_per_op']:>14,.0f}"
+            f" {row['ns_per_byte']:>9.2f} {_fmt_bytes(row['alloc_bytes']):>10}"
+        )
+
+
+def write_rows(path: str, rows: List[Dict[str, Any]], source: str) -> None:
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=ROW_FIELDS, restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"hash_source": source, "results": rows}, f, indent=2)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark compute_request_hash over agent payload shapes")
+    parser.add_argument("--quick", action="store_true", help="smaller payloads and fewer repeats")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per case (median is reported)")
+    parser.add_argument("--report", help="write rows to this .json or .csv file")
+    parser.add_argument(
+        "--impl",
+        choices=("auto", "reference", "stream", "merkle"),
+        default="auto",
+        help="auto: Faramesh when importable, else reference",
+    )
+    args = parser.parse_args(argv)
+
+    if args.impl == "auto":
+        fn, source = resolve_request_hash()
+    else:
+        impls = {"reference": compute_request_hash, "stream": stream_request_hash, "merkle": merkle_request_hash}
+        fn, source = impls[args.impl], args.impl
+    print(f"\n⏱  compute_request_hash micro-benchmarks ({source} implementation)")
+    rows = run_suite(fn, quick=args.quick, repeat=3 if args.quick else args.repeat)
+    print_rows(rows)
+    if args.report:
+        write_rows(args.report, rows, source)
+        print(f"\n📝 Report written to {args.report}")
+    print()
+    return 0
+
+
+__all__ = [
+    "corpus",
+    "deep_chain",
+    "depth_series",
+    "float_list",
+    "measure",
+    "nested_params",
+    "peak_alloc",
+    "run_suite",
+    "size_series",
+    "tiny_get",
+    "tool_output",
+    "unicode_text",
+]
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Differential fuzzing for request-hash canonicalization.
+
+Every optimized canonicalizer (the streaming encoder, Faramesh's own
+when importable, or a ``--candidate`` under review) must produce exactly
+the reference ``compute_request_hash`` for every payload. Semantically
+equal payloads must also hash the same. Hypothesis generates payload
+pairs that differ only in ways the canonical form erases:
+
+- float spellings as stored JSON would carry them: ``1`` / ``1.0`` /
+  ``1.00`` / ``1e0`` / ``10e-1``, ``-0`` / ``0.0``, ``repr`` vs ``%.17g``
+  vs ``%.17e`` for non-integral values;
+- int vs float for integral values, key insertion order, tuple vs list,
+  ``\\uXXXX`` escapes vs raw characters, nested empty containers.
+
+Each pair is hashed by every implementation and the v2 Merkle hash is
+checked for the same invariance. Unicode normalisation forms are the
+one thing the canonical form does *not* erase (strings are hashed as
+given), so NFC/NFD/NFKC/NFKD variants must all agree with the reference
+and stay distinct from each other.
+
+Hashing time is recorded per case. ``hypothesis.target`` steers
+generation toward slow inputs, and ``scan_pathological`` times
+hand-built worst cases: deep nesting, huge exponents, integers past
+Python's int-to-str digit limit, escape-heavy strings and wide dicts.
+Cases over the time budget, or that raise, are flagged.
+
+For coverage-guided fuzzing, hand ``fuzz_target().hypothesis.fuzz_one_input``
+to an external fuzzer such as atheris.
+
+Usage:
+    python canonical_fuzz.py                              # 1000 examples + pathological scan
+    python canonical_fuzz.py --examples 20000 --budget-ms 2
+    python canonical_fuzz.py --candidate fastjson:request_hash
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import time
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from hypothesis import HealthCheck, Phase, currently_in_test_context, given, settings, target
+from hypothesis import strategies as st
+
+from canonical_bench import deep_chain
+from canonical_json import compute_request_hash, resolve_request_hash, stream_request_hash
+from canonical_merkle import MerkleHasher, merkle_request_hash
+
+HashFn = Callable[[Any], str]
+
+BUDGET_NS = 5_000_000  # per call; slower cases are flagged
+_EXACT = 2 ** 53  # ints up to here survive a float spelling unchanged
+_NORMAL_FORMS = ("NFC", "NFD", "NFKC", "NFKD")
+# letters, combining marks and precomposed / compatibility characters (\u212b is the Angstrom sign)
+_COMBINING = "eEaAoOnNcCsSzZ\u0301\u0300\u0302\u0303\u0308\u0327\u030c\u212b\xc5\xe9\u1e9b\ufb01\u2126"
+
+
+def implementations(candidate: Optional[HashFn] = None) -> Dict[str, HashFn]:
+    """Implementations checked against the reference."""
+    impls: Dict[str, HashFn] = {"stream": stream_request_hash}
+    fn, source = resolve_request_hash()
+    if source == "faramesh":
+        impls["faramesh"] = fn
+    if candidate is not None:
+        impls["candidate"] = candidate
+    return impls
+
+
+# -- strategies -----------------------------------------------------------------
+
+
+def scalars() -> st.SearchStrategy:
+    return st.one_of(
+        st.none(),
+        st.booleans(),
+        st.integers(-(10 ** 30), 10 ** 30),
+        st.integers(-_EXACT, _EXACT).map(float),
+        st.floats(allow_nan=False, allow_infinity=False),
+        st.text(max_size=16),
+        st.text(alphabet=_COMBINING, max_size=8),
+        st.sampled_from(["", "héllo", "你好", "🚀", "á", "\x00\"\\\n"]),
+        st.builds(dict),
+        st.builds(list),
+        st.builds(tuple),
+    )
+
+
+def payloads(max_leaves: int = 40) -> st.SearchStrategy:
+    """JSON-shaped payloads: str keys, tuples allowed, empties likely."""
+    return st.recursive(
+        scalars(),
+        lambda children: st.one_of(
+            st.lists(children, max_size=6),
+            st.lists(children, max_size=6).map(tuple),
+            st.dictionaries(st.text(max_size=8), children, max_size=6),
+        ),
+        max_leaves=max_leaves,
+    )
+
+
+def _int_spellings(n: int) -> List[str]:
+    if n == 0:
+        return ["0", "-0", "0.0", "-0.0", "0e0", "0E-5", "0.000"]
+    out = [str(n)]
+    if abs(n) <= _EXACT:
+        out += [f"{n}.0", f"{n}.00", f"{n}e0", f"{n}E+0", f"{n}0e-1"]
+    return out
+
+
+def _float_spellings(x: float) -> List[str]:
+    if x.is_integer():
+        return _int_spellings(int(x))
+    spellings = [repr(x), format(x, ".17g"), format(x, ".17e"), repr(x).upper()]
+    return [s for s in spellings if float(s) == x]
+
+
+def _spell(draw: Callable[[st.SearchStrategy], Any], obj: Any) -> str:
+    """JSON text for ``obj`` with randomly chosen equivalent spellings."""
+    if obj is None or isinstance(obj, bool):
+        return json.dumps(obj)
+    if isinstance(obj, int):
+        return draw(st.sampled_from(_int_spellings(obj)))
+    if isinstance(obj, float):
+        return draw(st.sampled_from(_float_spellings(obj)))
+    if isinstance(obj, str):
+        return json.dumps(obj, ensure_ascii=draw(st.booleans()))
+    sep = draw(st.sampled_from([",", ", ", " ,\n "]))
+    if isinstance(obj, dict):
+        items = draw(st.permutations(list(obj.items())))
+        body = sep.join(json.dumps(k, ensure_ascii=draw(st.booleans())) + ":" + _spell(draw, v) for k, v in items)
+        return "{" + body + "}"
+    return "[" + sep.join(_spell(draw, v) for v in obj) + "]"
+
+
+def _rebuild(draw: Callable[[st.SearchStrategy], Any], obj: Any) -> Any:
+    """An equal-in-canonical-form copy: int/float swapped, keys reordered, tuple/list swapped."""
+    if isinstance(obj, bool) or obj is None or isinstance(obj, str):
+        return obj
+    if isinstance(obj, float):
+        return int(obj) if obj.is_integer() and draw(st.booleans()) else obj
+    if isinstance(obj, int):
+        return float(obj) if abs(obj) <= _EXACT and draw(st.booleans()) else obj
+    if isinstance(obj, dict):
+        return {k: _rebuild(draw, obj[k]) for k in draw(st.permutations(list(obj)))}
+    items = [_rebuild(draw, v) for v in obj]
+    return tuple(items) if draw(st.booleans()) else items
+
+
+@st.composite
+def equivalent_pairs(draw: Callable[[st.SearchStrategy], Any], max_leaves: int = 40) -> Tuple[Any, Any]:
+    """(payload, variant) that must hash identically."""
+    payload = draw(payloads(max_leaves))
+    if draw(st.booleans()):
+        return payload, json.loads(_spell(draw, payload))
+    return payload, _rebuild(draw, payload)
+
+
+def normal_forms() -> st.SearchStrategy:
+    """Strings whose Unicode normalisation forms differ."""
+    return st.text(alphabet=_COMBINING, min_size=1, max_size=12).filter(
+        lambda s: len({unicodedata.normalize(f, s) for f in _NORMAL_FORMS}) > 1
+    )
+
+
+# -- timing ---------------------------------------------------------------------
+
+
+class HashTimer:
+    """Per-call hashing times; calls over ``budget_ns`` or that raise are flagged."""
+
+    def __init__(self, budget_ns: int = BUDGET_NS):
+        self.budget_ns = budget_ns
+        self.rows: List[Dict[str, Any]] = []
+
+    def call(self, impl: str, fn: HashFn, payload: Any, case: str = "") -> str:
+        """``fn(payload)``, recording its time (and the exception type if it raises)."""
+        row: Dict[str, Any] = {"case": case, "impl": impl, "ns": 0, "error": None}
+        self.rows.append(row)
+        start = time.perf_counter_ns()
+        try:
+            return fn(payload)
+        except Exception as e:
+            row["error"] = type(e).__name__
+            raise
+        finally:
+            row["ns"] = time.perf_counter_ns() - start
+
+    def flagged(self) -> List[Dict[str, Any]]:
+        return [r for r in self.rows if r["error"] or r["ns"] > self.budget_ns]
+
+    def slowest(self, n: int = 5) -> List[Dict[str, Any]]:
+        return sorted(self.rows, key=lambda r: r["ns"], reverse=True)[:n]
+
+
+# -- checks ---------------------------------------------------------------------
+
+
+def check_equivalence(
+    payload: Any,
+    variant: Any,
+    impls: Optional[Dict[str, HashFn]] = None,
+    timer: Optional[HashTimer] = None,
+) -> None:
+    """Assert every implementation hashes ``payload`` and ``variant`` like the reference."""
+    timer = timer or HashTimer()
+    impls = implementations() if impls is None else impls
+    first = len(timer.rows)
+    expected = timer.call("reference", compute_request_hash, payload)
+    assert timer.call("reference", compute_request_hash, variant) == expected, (
+        f"reference: equivalent payloads hash differently\n  {payload!r}\n  {variant!r}"
+    )
+    for name, fn in impls.items():
+        for label, p in (("payload", payload), ("variant", variant)):
+            assert timer.call(name, fn, p) == expected, f"{name} disagrees with the reference on {label}: {p!r}"
+    v2 = merkle_request_hash(payload)
+    assert merkle_request_hash(variant) == v2 == MerkleHasher().request_hash(variant), (
+        f"merkle v2: equivalent payloads hash differently\n  {payload!r}\n  {variant!r}"
+    )
+    if currently_in_test_context():  # steer generation toward slow inputs
+        target(max(r["ns"] for r in timer.rows[first:]) / 1e6, label="hash ms")
+
+
+def check_normal_forms(text: str, impls: Optional[Dict[str, HashFn]] = None) -> None:
+    """Normalisation forms are not merged: distinct forms hash apart, all implementations agree."""
+    impls = implementations() if impls is None else impls
+    forms = {unicodedata.normalize(f, text) for f in _NORMAL_FORMS}
+    hashes = set()
+    for form in forms:
+        payload = {"params": {"text": form}}
+        expected = compute_request_hash(payload)
+        hashes.add(expected)
+        for name, fn in impls.items():
+            assert fn(payload) == expected, f"{name} disagrees with the reference on {form!r}"
+    assert len(hashes) == len(forms), f"normalisation forms of {text!r} collided"
+
+
+def fuzz_target(
+    examples: int = 1000,
+    impls: Optional[Dict[str, HashFn]] = None,
+    timer: Optional[HashTimer] = None,
+    max_leaves: int = 40,
+    steer: bool = True,
+) -> Callable[[], None]:
+    """A Hypothesis test running ``check_equivalence`` over ``examples`` generated pairs.
+
+    ``steer=False`` skips the target phase that hill-climbs toward slow inputs.
+    """
+
+    @settings(
+        max_examples=examples,
+        phases=[p for p in Phase if steer or p is not Phase.target],
+        deadline=None,
+        database=None,
+        suppress_health_check=[HealthCheck.too_slow, HealthCheck.data_too_large],
+    )
+    @given(equivalent_pairs(max_leaves))
+    def differential(pair: Tuple[Any, Any]) -> None:
+        check_equivalence(pair[0], pair[1], impls, timer)
+
+    return differential
+
+
+# -- pathological inputs --------------------------------------------------------
+
+
+def _deep_list(depth: int) -> Any:
+    node: Any = [1.0]
+    for _ in range(depth):
+        node = [node]
+    return node
+
+
+def pathological_cases() -> List[Tuple[str, Any]]:
+    """Inputs that stress recursion, number formatting, escaping and sorting."""
+    return [
+        ("deep_list_5000", {"params": _deep_list(5000)}),
+        ("deep_dict_5000", deep_chain(5000)),
+        ("huge_exponent_floats", {"params": [1.7976931348623157e308, -1e308, 5e-324, 1e300]}),
+        ("int_4000_digits", {"params": {"n": 10 ** 3999}}),
+        ("int_past_str_limit", {"params": {"n": 10 ** 5000}}),
+        ("escape_heavy_1mb", {"params": {"s": "\x00\"\\\n\u2028" * 200_000}}),
+        ("wide_dict_100k", {"params": {f"k{i:06d}": i for i in range(100_000)}}),
+    ]
+
+
+def scan_pathological(
+    impls: Optional[Dict[str, HashFn]] = None, timer: Optional[HashTimer] = None
+) -> HashTimer:
+    """Time every implementation (and the v2 hash) on ``pathological_cases()``."""
+    timer = timer or HashTimer()
+    impls = implementations() if impls is None else impls
+    every = dict({"reference": compute_request_hash}, **impls, merkle=MerkleHasher().request_hash)
+    for case, payload in pathological_cases():
+        for name, fn in every.items():
+            try:
+                timer.call(name, fn, payload, case)
+            except Exception:
+                pass  # recorded as an error row
+    return timer
+
+
+def _load_candidate(spec: str) -> HashFn:
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module), attr or "compute_request_hash")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Differential fuzzing of request-hash canonicalization")
+    parser.add_argument("--examples", type=int, default=1000, help="generated payload pairs")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_NS / 1e6, help="flag calls slower than this")
+    parser.add_argument("--candidate", help="module:function to check against the reference")
+    args = parser.parse_args(argv)
+
+    impls = implementations(_load_candidate(args.candidate) if args.candidate else None)
+    timer = HashTimer(int(args.budget_ms * 1e6))
+    print(f"\n🔀 Differential fuzzing: reference vs {', '.join(impls)} (+ merkle v2 invariance)")
+    fuzz_target(args.examples, impls, timer)()
+    given(normal_forms())(lambda text: check_normal_forms(text, impls))()
+    print(f"  ✅ {args.examples} equivalent pairs: all implementations agree")
+    for row in timer.slowest(3):
+        print(f"     slowest: {row['impl']:<10} {row['ns'] / 1e6:8.2f} ms")
+
+    print("\n🐢 Pathological inputs (flagged: slower than budget or raised)")
+    scan = scan_pathological(impls, HashTimer(timer.budget_ns))
+    flagged = {id(row) for row in scan.flagged()}
+    for row in scan.rows:
+        mark = "⚠️ " if id(row) in flagged else "  "
+        detail = row["error"] or f"{row['ns'] / 1e6:.2f} ms"
+        print(f"  {mark}{row['case']:<22} {row['impl']:<10} {detail}")
+    print()
+    return 0
+
+
+__all__ = [
+    "BUDGET_NS",
+    "HashTimer",
+    "check_equivalence",
+    "check_normal_forms",
+    "equivalent_pairs",
+    "fuzz_target",
+    "implementations",
+    "normal_forms",
+    "pathological_cases",
+    "payloads",
+    "scan_pathological",
+]
+
+if __name__ == "__main__":
+    sys.exit(main())
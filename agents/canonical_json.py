@@ -0,0 +1,277 @@
+"""
+Reference canonical JSON and request hash used by the canonicalization tools.
+
+Faramesh hashes a request as SHA-256 over its canonical JSON:
+
+- object keys sorted, compact separators (``","`` / ``":"``), UTF-8 with
+  non-ASCII characters kept as-is (``ensure_ascii=False``);
+- floats with an integral value are written as integers, so ``1``,
+  ``1.0`` and ``1.00`` hash the same (``-0.0`` becomes ``0``); other
+  floats use Python's shortest round-trip repr;
+- NaN and infinities are rejected; strings are hashed exactly as given.
+
+``compute_request_hash`` here follows that form so benchmarks and tests
+run without the server package. ``resolve_request_hash()`` returns the
+real ``faramesh.server.canonicalization.compute_request_hash`` when it is
+importable, and this reference otherwise.
+
+``stream_request_hash`` produces the same digest without building the
+canonical string: ``write_canonical`` walks the payload with an explicit
+stack (no recursion limit) and hands UTF-8 chunks of about ``chunk_size``
+characters to the hasher as it goes. Long strings are escaped slice by
+slice, and flat dicts and runs of scalars in lists go through the C
+encoder in batches, so extra memory stays around one chunk however large
+the payload is.
+
+``compute_request_hash(payload, version=2)`` opts into the Merkle hash in
+``canonical_merkle``.
+
+Usage:
+    compute_request_hash({"tool": "payment", "params": {"amount": 1.0}})
+    stream_request_hash(payload_with_megabytes_of_file_content)
+    hash_fn, source = resolve_request_hash()
+"""
+
+import hashlib
+import json
+import math
+from json.encoder import encode_basestring
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+CHUNK_SIZE = 16 * 1024  # characters buffered before each hasher update
+_BATCH = 512  # small list elements / dict items encoded per C-encoder call
+
+
+def canonicalize(obj: Any) -> Any:
+    """``obj`` with integral floats turned into ints (recursively); rejects NaN/inf."""
+    if isinstance(obj, float):
+        if math.isnan(obj) or math.isinf(obj):
+            raise ValueError(f"Non-finite float is not canonicalizable: {obj!r}")
+        return int(obj) if obj.is_integer() else obj
+    if isinstance(obj, dict):
+        out = {}
+        for k, v in obj.items():  # plain loops: one stack frame per nesting level
+            out[k] = canonicalize(v)
+        return out
+    if isinstance(obj, (list, tuple)):
+        items = []
+        for v in obj:
+            items.append(canonicalize(v))
+        return items
+    return obj
+
+
+def canonical_bytes(obj: Any) -> bytes:
+    """The canonical UTF-8 JSON encoding of ``obj``."""
+    return json.dumps(
+        canonicalize(obj),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        allow_nan=False,
+    ).encode("utf-8")
+
+
+def compute_request_hash(payload: Any, version: int = 1) -> str:
+    """Hex SHA-256 of ``canonical_bytes(payload)``.
+
+    ``version=2`` opts into the Merkle hash from ``canonical_merkle``, which
+    reuses cached sub-tree digests across calls (a different value than v1).
+    """
+    if version == 2:
+        from canonical_merkle import merkle_request_hash
+
+        return merkle_request_hash(payload)
+    if version != 1:
+        raise ValueError(f"Unknown request hash version: {version!r}")
+    return hashlib.sha256(canonical_bytes(payload)).hexdigest()
+
+
+# -- streaming -----------------------------------------------------------------
+
+_SHORT_STR = 4096
+_DUMPS = dict(sort_keys=True, separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+
+
+def _float(value: float) -> str:
+    if math.isnan(value) or math.isinf(value):
+        raise ValueError(f"Non-finite float is not canonicalizable: {value!r}")
+    return int.__repr__(int(value)) if value.is_integer() else float.__repr__(value)
+
+
+def _scalar(value: Any) -> str:
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        return _float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _key(key: Any) -> str:
+    """Dict key as ``json.dumps`` writes it (float keys are not normalized there either)."""
+    if isinstance(key, str):
+        return key
+    if isinstance(key, float):
+        if math.isnan(key) or math.isinf(key):
+            raise ValueError(f"Out of range float values are not JSON compliant: {key!r}")
+        return float.__repr__(key)
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, int):
+        return int.__repr__(key)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+def _is_small(value: Any) -> bool:
+    return value is None or isinstance(value, (bool, int, float)) or (
+        isinstance(value, str) and len(value) <= _SHORT_STR
+    )
+
+
+def _list_items(items: List[Any]) -> Iterator[Any]:
+    """Elements of ``items``, with runs of small scalars grouped into ``_Batch``es."""
+    run: List[Any] = []
+    for item in items:
+        if _is_small(item):
+            run.append(item)
+            if len(run) == _BATCH:
+                yield _Batch(run)
+                run = []
+            continue
+        if run:
+            yield _Batch(run)
+            run = []
+        yield item
+    if run:
+        yield _Batch(run)
+
+
+class _Batch(list):
+    """Consecutive small list elements, encoded together."""
+
+
+class _Sink:
+    def __init__(self, update: Callable[[bytes], Any], chunk_size: int):
+        self.update = update
+        self.chunk_size = chunk_size
+        self.parts: List[str] = []
+        self.size = 0
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def write_str(self, value: str) -> None:
+        if len(value) <= self.chunk_size:
+            self.write(encode_basestring(value))
+            return
+        self.write('"')
+        for i in range(0, len(value), self.chunk_size):
+            self.write(encode_basestring(value[i:i + self.chunk_size])[1:-1])
+        self.write('"')
+
+    def flush(self) -> None:
+        if self.parts:
+            self.update("".join(self.parts).encode("utf-8"))
+            self.parts = []
+            self.size = 0
+
+
+def write_canonical(obj: Any, update: Callable[[bytes], Any], chunk_size: int = CHUNK_SIZE) -> None:
+    """Feed ``canonical_bytes(obj)`` to ``update`` in chunks, without building it whole."""
+    sink = _Sink(update, chunk_size)
+    stack: List[List[Any]] = []  # [items iterator, is_dict, first, id] per open container
+    active: Dict[int, None] = {}
+
+    def open_value(value: Any) -> None:
+        if isinstance(value, str):
+            sink.write_str(value)
+        elif isinstance(value, dict):
+            if not value:
+                sink.write("{}")
+                return
+            if len(value) <= _BATCH and all(_is_small(v) for v in value.values()):
+                sink.write(json.dumps(canonicalize(value), **_DUMPS))  # flat dict: one C-encoder call
+                return
+            if id(value) in active:
+                raise ValueError("Circular reference detected")
+            active[id(value)] = None
+            sink.write("{")
+            stack.append([iter(sorted(value.items(), key=itemgetter(0))), True, True, id(value)])
+        elif isinstance(value, (list, tuple)):
+            if not value:
+                sink.write("[]")
+                return
+            if id(value) in active:
+                raise ValueError("Circular reference detected")
+            active[id(value)] = None
+            sink.write("[")
+            stack.append([_list_items(value), False, True, id(value)])
+        else:
+            sink.write(_scalar(value))
+
+    open_value(obj)
+    while stack:
+        frame = stack[-1]
+        item = next(frame[0], _Sink)
+        if item is _Sink:  # container exhausted
+            stack.pop()
+            del active[frame[3]]
+            sink.write("}" if frame[1] else "]")
+            continue
+        if frame[2]:
+            frame[2] = False
+        else:
+            sink.write(",")
+        if frame[1]:
+            key, value = item
+            sink.write(encode_basestring(_key(key)))
+            sink.write(":")
+            open_value(value)
+        elif type(item) is _Batch:
+            sink.write(json.dumps(canonicalize(item), **_DUMPS)[1:-1])
+        else:
+            open_value(item)
+    sink.flush()
+
+
+def stream_request_hash(payload: Any, chunk_size: int = CHUNK_SIZE) -> str:
+    """``compute_request_hash`` via ``write_canonical`` into an incremental SHA-256."""
+    digest = hashlib.sha256()
+    write_canonical(payload, digest.update, chunk_size)
+    return digest.hexdigest()
+
+
+def resolve_request_hash() -> Tuple[Callable[[Any], str], str]:
+    """(hash function, source name): Faramesh's own when importable, else this reference."""
+    try:
+        from faramesh.server.canonicalization import compute_request_hash as faramesh_hash
+    except ImportError:
+        return compute_request_hash, "reference"
+    return faramesh_hash, "faramesh"
+
+
+__all__ = [
+    "CHUNK_SIZE",
+    "canonical_bytes",
+    "canonicalize",
+    "compute_request_hash",
+    "resolve_request_hash",
+    "stream_request_hash",
+    "write_canonical",
+]
@@ -0,0 +1,247 @@
+"""
+Opt-in v2 request hash: a Merkle tree over the canonical form, with a
+cache of sub-tree digests.
+
+Agents resubmit the same ``params`` / ``context`` shapes over and over,
+and the v1 hash re-encodes every byte of every request. The v2 hash
+gives each string, list and dict its own SHA-256 digest, and a parent
+hashes its children's digests rather than their bytes. ``SubtreeCache``
+keeps recent digests in a bounded LRU, so a sub-tree seen before costs a
+dictionary lookup instead of re-encoding and re-hashing it.
+
+Cache keys are built from content, not ``id()``: payload dicts are
+mutable and ids are reused after garbage collection, so an id alone can
+return a stale digest. A container's key is a cheap shallow fingerprint
+built with C-level ``tuple``/``map`` calls. It holds the container's keys
+and scalar values with their types (so ``True`` and ``1`` never share an
+entry), plus the digests of its child containers. Strings are keyed by
+value, and Python caches a string's hash on the object, so a repeated
+multi-megabyte tool output is found again in O(1). Inside a fingerprint,
+a string of ``MIN_CACHED_STR`` characters or more is replaced by its
+digest, so only the string's own entry holds it. Those entries are
+charged ``len(value)`` against ``maxbytes``; a fingerprint is charged
+the strings and digests it holds inline plus one word per slot, so
+``maxbytes`` caps what the shared cache keeps alive. Changing one field
+re-hashes only the path from that field to the root. Walking the
+containers is still linear in their number, but untouched strings and
+scalar runs are never re-encoded.
+
+v2 digests follow the same canonical rules as v1: sorted keys, ``1`` /
+``1.0`` / ``1.00`` equal, ``-0.0`` as ``0``, NaN and infinities rejected.
+Because the bytes are different, a v2 hash never equals a v1 hash.
+
+Tree format (every node digest is SHA-256 over):
+
+    str    b"s" + UTF-8 text
+    list   b"l" + element*
+    dict   b"d" + (4-byte key length + UTF-8 key + element)*   sorted by key
+    element = b"#" + 32-byte child digest    (str, list, dict)
+            | canonical JSON token + b","    (number, true, false, null)
+
+    request hash = hex SHA-256(b"faramesh-merkle-v2\\n" + element(payload))
+
+Usage:
+    compute_request_hash(payload, version=2)       # via canonical_json
+    hasher = MerkleHasher(maxsize=8192, maxbytes=64 * 1024 * 1024)
+    hasher.request_hash(payload)
+    hasher.cache.stats()
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from canonical_json import _key, _scalar
+
+V2_PREFIX = b"faramesh-merkle-v2\n"
+MIN_CACHED_STR = 64  # shorter strings are cheaper to hash than to look up
+MAX_CACHED_BYTES = 16 * 1024 * 1024  # string characters the cache may keep alive
+
+_CONTAINERS = (dict, list, tuple)
+_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+_WORD = 8  # charged per fingerprint slot (one pointer)
+
+
+def _inline_bytes(items: Tuple[Any, ...]) -> int:
+    """Approximate memory a fingerprint tuple keeps alive: its strings and digests plus one word per slot."""
+    return sum(len(v) for v in items if type(v) is str or type(v) is bytes) + _WORD * len(items)
+
+
+class SubtreeCache:
+    """Thread-safe LRU map from sub-tree fingerprints to 32-byte digests.
+
+    Bounded by entry count and by the ``nbytes`` charged to ``put``; an
+    entry costing more than ``maxbytes`` on its own is not kept.
+    """
+
+    def __init__(self, maxsize: int = 4096, maxbytes: int = MAX_CACHED_BYTES):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self._data: "OrderedDict[Hashable, Tuple[bytes, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, digest: bytes, nbytes: int = 0) -> None:
+        if nbytes > self.maxbytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._data[key] = (digest, nbytes)
+            self.nbytes += nbytes
+            while len(self._data) > self.maxsize or self.nbytes > self.maxbytes:
+                self.nbytes -= self._data.popitem(last=False)[1][1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self.nbytes,
+            "maxbytes": self.maxbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class MerkleHasher:
+    """Computes v2 digests, reusing cached sub-tree digests across calls."""
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        cache: Optional[SubtreeCache] = None,
+        maxbytes: int = MAX_CACHED_BYTES,
+    ):
+        self.cache = cache if cache is not None else SubtreeCache(maxsize, maxbytes)
+
+    def request_hash(self, payload: Any) -> str:
+        """Hex v2 request hash of ``payload``."""
+        return hashlib.sha256(V2_PREFIX + self._element(payload, {})).hexdigest()
+
+    def digest(self, obj: Any) -> bytes:
+        """32-byte digest of a string, list or dict sub-tree."""
+        if isinstance(obj, str):
+            return self._str_digest(obj)
+        if not isinstance(obj, _CONTAINERS):
+            raise TypeError(f"only str, list and dict have sub-tree digests, not {type(obj).__name__}")
+        return self._tree_digest(obj)
+
+    def _str_digest(self, value: str) -> bytes:
+        if len(value) < MIN_CACHED_STR:
+            return hashlib.sha256(b"s" + value.encode("utf-8", "surrogatepass")).digest()
+        digest = self.cache.get(value)
+        if digest is None:
+            digest = hashlib.sha256(b"s" + value.encode("utf-8", "surrogatepass")).digest()
+            self.cache.put(value, digest, len(value))
+        return digest
+
+    def _shrink(self, items: Tuple[Any, ...], types: Tuple[type, ...]) -> Tuple[Any, ...]:
+        """Swap long strings for their digests so a fingerprint never pins them."""
+        return tuple(
+            self._str_digest(v) if t is str and len(v) >= MIN_CACHED_STR else v for v, t in zip(items, types)
+        )
+
+    def _element(self, value: Any, done: Dict[int, bytes]) -> bytes:
+        if isinstance(value, str):
+            return b"#" + self._str_digest(value)
+        if isinstance(value, _CONTAINERS):
+            digest = done.get(id(value))
+            return b"#" + (digest if digest is not None else self._tree_digest(value))
+        return _scalar(value).encode("ascii") + b","
+
+    def _tree_digest(self, root: Any) -> bytes:
+        """Post-order walk with an explicit stack: no recursion limit."""
+        done: Dict[int, bytes] = {}  # id -> digest of containers finished in this walk
+        active = set()  # ids of the containers on the current path
+        stack: List[Any] = [root]
+        while stack:
+            node = stack[-1]
+            nid = id(node)
+            if nid in done:
+                stack.pop()
+                continue
+            children = node.values() if isinstance(node, dict) else node
+            if nid in active or _SCALAR_TYPES.issuperset(map(type, children)):
+                stack.pop()  # children (if any) are done
+                active.discard(nid)
+                done[nid] = self._container_digest(node, done)
+                continue
+            active.add(nid)
+            for child in children:
+                if isinstance(child, _CONTAINERS) and id(child) not in done:
+                    if id(child) in active:
+                        raise ValueError("Circular reference detected")
+                    stack.append(child)
+        return done[id(root)]
+
+    def _container_digest(self, node: Any, done: Dict[int, bytes]) -> bytes:
+        values = tuple(node.values()) if isinstance(node, dict) else tuple(node)
+        types = tuple(map(type, values))
+        if not _SCALAR_TYPES.issuperset(types):
+            values = tuple(done[id(v)] if isinstance(v, _CONTAINERS) else v for v in values)
+        if str in types:
+            values = self._shrink(values, types)
+        if isinstance(node, dict):
+            keys = tuple(node)
+            key_types = tuple(map(type, keys))
+            if key_types.count(str) != len(keys) or (keys and max(map(len, keys)) >= MIN_CACHED_STR):
+                keys = self._shrink(keys, key_types)
+            fingerprint: Hashable = (b"d", keys, key_types, values, types)
+            nbytes = _inline_bytes(keys) + _inline_bytes(values) + _WORD * (len(keys) + len(values))
+        else:
+            fingerprint = (b"l", values, types)
+            nbytes = _inline_bytes(values) + _WORD * len(values)
+        try:
+            digest = self.cache.get(fingerprint)
+        except TypeError:  # an unhashable non-JSON value; encoding below reports it
+            fingerprint, digest = None, None
+        if digest is not None:
+            return digest
+
+        if isinstance(node, dict):
+            parts = [b"d"]
+            for k, v in sorted(node.items(), key=itemgetter(0)):
+                key = _key(k).encode("utf-8", "surrogatepass")
+                parts.append(len(key).to_bytes(4, "big") + key + self._element(v, done))
+        else:
+            parts = [b"l"]
+            parts.extend(self._element(v, done) for v in node)
+        digest = hashlib.sha256(b"".join(parts)).digest()
+        if fingerprint is not None:
+            self.cache.put(fingerprint, digest, nbytes)
+        return digest
+
+
+_DEFAULT_HASHER = MerkleHasher()
+
+
+def merkle_request_hash(payload: Any, hasher: Optional[MerkleHasher] = None) -> str:
+    """v2 request hash, through the shared module-level cache unless ``hasher`` is given."""
+    return (hasher or _DEFAULT_HASHER).request_hash(payload)
+
+
+__all__ = ["MAX_CACHED_BYTES", "MIN_CACHED_STR", "MerkleHasher", "SubtreeCache", "V2_PREFIX", "merkle_request_hash"]
@@ -30,12 +30,36 @@ _add_faramesh_src()
 import os
 import sys
 from typing import Optional
+from urllib.parse import urlparse
 
-import requests
+from http_transport import shared_client
 
 
 DEFAULT_BASE_URL = os.getenv("FARAMESH_BASE_URL", "http://localhost:8000")
 DEFAULT_TOKEN = os.getenv("FARAMESH_TOKEN") or os.getenv("FARAMESH_API_KEY")
+USE_MOCK = os.getenv("FARAMESH_MOCK", "").lower() in ("1", "true", "yes")
+
+_mock_servers = {}
+
+
+def start_mock_server(base_url: Optional[str] = None, **options):
+    """Serve the in-memory stand-in at ``base_url``'s host and port.
+
+    Binding to the configured address means the SDK, raw ``requests`` calls
+    and the waiters all reach it without being reconfigured. Options go to
+    ``MockFarameshServer.from_env`` (decision latency, decision mix, ...).
+    """
+    from mock_server import MockFarameshServer
+
+    url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+    if url not in _mock_servers:
+        parsed = urlparse(url)
+        host = parsed.hostname or "127.0.0.1"
+        if host == "localhost":
+            host = "127.0.0.1"
+        server = MockFarameshServer.from_env(host=host, port=parsed.port or 80, **options)
+        _mock_servers[url] = server.start()
+    return _mock_servers[url]
 
 
 def ensure_server_available(
@@ -43,7 +67,9 @@ def ensure_server_available(
 ) -> bool:
     """Best-effort ping to ensure the Faramesh server is reachable.
 
-    Returns True if the /health or root responds; False otherwise.
+    Returns True if the /health or root responds; False otherwise. With
+    ``FARAMESH_MOCK=1`` an unreachable server is replaced by the local
+    stand-in (agents/mock_server.py) instead of aborting the demo.
     """
     url = (base_url or DEFAULT_BASE_URL).rstrip("/")
     health_urls = [f"{url}/health", f"{url}/v1/health", url]
@@ -53,16 +79,30 @@ def ensure_server_available(
 
     for candidate in health_urls:
         try:
-            resp = requests.get(candidate, headers=headers, timeout=timeout)
-            if resp.ok:
+            resp = shared_client().get(candidate, headers=headers, timeout=timeout)
+            if resp.is_success:
                 return True
         except Exception:
             continue
+    if USE_MOCK:
+        try:
+            start_mock_server(url)
+        except OSError as e:
+            print(f"⚠️  Could not start mock Faramesh server at {url}: {e}")
+            return False
+        print(f"🧪 FARAMESH_MOCK=1: using local mock Faramesh server at {url}")
+        return True
     print(
         f"⚠️  Faramesh server not reachable at {url}. Start it before running this demo."
     )
     print("   e.g., python -m faramesh.server.main  # or: faramesh serve")
+    print("   or run offline against the mock server: FARAMESH_MOCK=1")
     return False
 
 
-__all__ = ["ensure_server_available", "DEFAULT_BASE_URL", "DEFAULT_TOKEN"]
+__all__ = [
+    "ensure_server_available",
+    "start_mock_server",
+    "DEFAULT_BASE_URL",
+    "DEFAULT_TOKEN",
+]
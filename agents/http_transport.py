@@ -0,0 +1,255 @@
+"""
+Shared, pooled HTTP clients for the examples.
+
+Module-level ``httpx.get`` / ``requests.get`` open a new connection per call,
+so every governed tool call paid a TCP (and usually TLS) handshake to
+Faramesh, Shopify or Stripe. This module keeps one keep-alive pool per
+process instead:
+
+- ``shared_client()``: an ``httpx.Client`` for Faramesh, Shopify and the
+  waiters, with optional HTTP/2 (``FARAMESH_HTTP2=1``, needs ``h2``);
+- ``async_client()``: the same pool settings as an ``httpx.AsyncClient``, one per
+  running event loop, for coroutine tools;
+- ``shared_session()``: a ``requests.Session`` for libraries built on
+  requests - ``use_for_stripe()`` points the Stripe SDK at it.
+
+All of them count requests and new connections per host, so ``transport_stats()``
+shows how often a connection was reused.
+
+Environment:
+    FARAMESH_HTTP_MAX_CONNECTIONS   total connections per client (default 100)
+    FARAMESH_HTTP_MAX_KEEPALIVE     idle connections kept open (default 20)
+    FARAMESH_HTTP_KEEPALIVE_EXPIRY  seconds an idle connection is kept (default 30)
+    FARAMESH_HTTP2                  "1" to negotiate HTTP/2 where servers offer it
+
+Usage:
+    from http_transport import shared_client, transport_stats
+
+    resp = shared_client().get(url, headers=headers, timeout=30)
+    print(transport_stats()["reuse_ratio"])
+"""
+
+import asyncio
+import atexit
+import importlib.util
+import os
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+
+MAX_CONNECTIONS = int(os.getenv("FARAMESH_HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("FARAMESH_HTTP_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("FARAMESH_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2 = os.getenv("FARAMESH_HTTP2", "").lower() in ("1", "true", "yes")
+
+_lock = threading.Lock()
+_client: Optional[httpx.Client] = None
+_session = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class TransportStats:
+    """Per-host request and connection counters for the shared httpx client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hosts: Dict[str, Dict[str, int]] = {}
+
+    def _host(self, host: str) -> Dict[str, int]:
+        return self.hosts.setdefault(host, {"requests": 0, "connections": 0, "tls_handshakes": 0})
+
+    def request(self, host: str) -> None:
+        with self._lock:
+            self._host(host)["requests"] += 1
+
+    def trace(self, host: str, event: str) -> None:
+        if event == "connection.connect_tcp.started":
+            with self._lock:
+                self._host(host)["connections"] += 1
+        elif event == "connection.start_tls.started":
+            with self._lock:
+                self._host(host)["tls_handshakes"] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hosts.clear()
+
+
+_stats = TransportStats()
+
+
+def _on_request(request: httpx.Request) -> None:
+    host = request.url.host
+    _stats.request(host)
+    previous = request.extensions.get("trace")
+
+    def trace(event: str, info: Dict[str, Any]) -> None:
+        _stats.trace(host, event)
+        if previous is not None:
+            previous(event, info)
+
+    request.extensions["trace"] = trace
+
+
+async def _on_async_request(request: httpx.Request) -> None:
+    # httpcore awaits trace callbacks on async connections
+    host = request.url.host
+    _stats.request(host)
+    previous = request.extensions.get("trace")
+
+    async def trace(event: str, info: Dict[str, Any]) -> None:
+        _stats.trace(host, event)
+        if previous is not None:
+            await previous(event, info)
+
+    request.extensions["trace"] = trace
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def shared_client() -> httpx.Client:
+    """The process-wide pooled ``httpx.Client`` (created on first use)."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = httpx.Client(
+                    limits=pool_limits(),
+                    http2=HTTP2 and http2_available(),
+                    timeout=httpx.Timeout(30.0, connect=10.0),
+                    event_hooks={"request": [_on_request]},
+                )
+    return _client
+
+
+def async_client() -> httpx.AsyncClient:
+    """The pooled ``httpx.AsyncClient`` for the running event loop.
+
+    Async connections belong to the loop that opened them, so each loop gets
+    its own client; it is dropped with the loop or by ``aclose_async_client()``.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=pool_limits(),
+            http2=HTTP2 and http2_available(),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            event_hooks={"request": [_on_async_request]},
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    """Close the running loop's ``async_client()``."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def shared_session():
+    """The process-wide pooled ``requests.Session`` (created on first use)."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=MAX_KEEPALIVE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def use_for_stripe(timeout: float = 30.0) -> None:
+    """Route Stripe SDK calls through the shared ``requests`` pool."""
+    import stripe
+
+    stripe.default_http_client = stripe.RequestsClient(timeout=timeout, session=shared_session())
+
+
+def _session_stats() -> Dict[str, Dict[str, int]]:
+    """Counters from urllib3's connection pools behind ``shared_session()``."""
+    hosts: Dict[str, Dict[str, int]] = {}
+    if _session is None:
+        return hosts
+    for adapter in set(_session.adapters.values()):
+        manager = getattr(adapter, "poolmanager", None)
+        if manager is None:
+            continue
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            entry = hosts.setdefault(pool.host, {"requests": 0, "connections": 0, "tls_handshakes": 0})
+            entry["requests"] += pool.num_requests
+            entry["connections"] += pool.num_connections
+            if pool.scheme == "https":
+                entry["tls_handshakes"] += pool.num_connections
+    return hosts
+
+
+def transport_stats() -> Dict[str, Any]:
+    """Requests, new connections and reuse ratio, in total and per host."""
+    hosts: Dict[str, Dict[str, int]] = {}
+    with _stats._lock:
+        for host, counts in _stats.hosts.items():
+            hosts[host] = dict(counts)
+    for host, counts in _session_stats().items():
+        entry = hosts.setdefault(host, {"requests": 0, "connections": 0, "tls_handshakes": 0})
+        for name, value in counts.items():
+            entry[name] += value
+    requests_made = sum(h["requests"] for h in hosts.values())
+    connections = sum(h["connections"] for h in hosts.values())
+    return {
+        "requests": requests_made,
+        "connections": connections,
+        "tls_handshakes": sum(h["tls_handshakes"] for h in hosts.values()),
+        "reuse_ratio": 1 - connections / requests_made if requests_made else 0.0,
+        "http2": bool(_client is not None and HTTP2 and http2_available()),
+        "hosts": hosts,
+    }
+
+
+@atexit.register
+def close_shared() -> None:
+    """Close the pooled clients (also runs at interpreter exit)."""
+    global _client, _session
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+        if _session is not None:
+            _session.close()
+            _session = None
+    _stats.reset()
+
+
+__all__ = [
+    "aclose_async_client",
+    "async_client",
+    "close_shared",
+    "pool_limits",
+    "shared_client",
+    "shared_session",
+    "transport_stats",
+    "use_for_stripe",
+]
@@ -0,0 +1,177 @@
+"""
+Baseline storage and regression testing for benchmark latency histograms.
+
+A run is saved as a named baseline (the same JSON that ``--report`` writes,
+histograms included). A later run is compared per label and per percentile
+with a bootstrap: both histograms are resampled, the percentile difference
+is recomputed each time, and the 95% interval of that difference decides
+whether a slowdown is real or just noise. A percentile regresses only when
+the interval lies entirely above zero *and* the observed slowdown exceeds
+the threshold, so a 0.01 ms shift on a quiet machine does not fail a gate.
+
+Usage:
+    save_baseline("v1.4", {"submission": hist}, elapsed={"submission": 10.0})
+    rows = compare_runs(load_baseline("v1.4"), {"submission": new_hist})
+    if any(r["regressed"] for r in rows):
+        sys.exit(1)
+"""
+
+import json
+import math
+import os
+import random
+import time
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Dict, List, Optional
+
+from latency_histogram import REPORT_PERCENTILES, LatencyHistogram, report_row
+
+BASELINE_DIR = os.getenv(
+    "FARAMESH_BASELINE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".latency_baselines"),
+)
+
+
+def baseline_path(name: str, directory: Optional[str] = None) -> str:
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+    return os.path.join(directory or BASELINE_DIR, f"{safe}.json")
+
+
+def save_baseline(
+    name: str,
+    histograms: Dict[str, LatencyHistogram],
+    elapsed: Optional[Dict[str, float]] = None,
+    directory: Optional[str] = None,
+) -> str:
+    """Store a run under ``name`` and return the file path."""
+    path = baseline_path(name, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    elapsed = elapsed or {}
+    payload = {
+        "name": name,
+        "saved_at": time.time(),
+        "results": [report_row(label, h, elapsed.get(label)) for label, h in histograms.items()],
+        "histograms": {label: h.to_dict() for label, h in histograms.items()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def load_histograms(path: str) -> Dict[str, LatencyHistogram]:
+    """Histograms from a saved baseline or a ``--report`` JSON file."""
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    if "histograms" not in payload:
+        raise ValueError(f"{path} has no histograms (CSV reports cannot be compared)")
+    return {label: LatencyHistogram.from_dict(h) for label, h in payload["histograms"].items()}
+
+
+def load_baseline(name: str, directory: Optional[str] = None) -> Dict[str, LatencyHistogram]:
+    path = baseline_path(name, directory)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"no baseline named {name!r} at {path}")
+    return load_histograms(path)
+
+
+class _Resampler:
+    """Bootstrap percentiles drawn from a histogram's bucket distribution.
+
+    Resampling n values and sorting them is O(n log n) per iteration. The
+    r-th smallest of n uniform draws is Beta(r, n - r + 1) distributed, so
+    the same bootstrap percentile is one beta draw pushed through the
+    histogram's inverse CDF, whatever the sample count.
+    """
+
+    def __init__(self, hist: LatencyHistogram):
+        self.values = []
+        weights = []
+        for i, c in enumerate(hist.counts):
+            if c:
+                self.values.append(min(hist._value_at(i), hist.max_us) / 1000.0)
+                weights.append(c)
+        self.cum_weights = list(accumulate(weights))
+        self.size = hist.total_count
+
+    def percentile(self, rng: random.Random, q: float) -> float:
+        rank = max(int(math.ceil(round(q / 100.0 * self.size, 9))), 1)
+        u = rng.betavariate(rank, self.size - rank + 1)
+        i = bisect_right(self.cum_weights, u * self.size)
+        return self.values[min(i, len(self.values) - 1)]
+
+
+def bootstrap_delta(
+    baseline: LatencyHistogram,
+    candidate: LatencyHistogram,
+    q: float,
+    iterations: int = 2000,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0,
+) -> Dict[str, float]:
+    """Observed change in percentile ``q`` (ms) and its bootstrap confidence interval."""
+    rng = random.Random(seed)
+    base, cand = _Resampler(baseline), _Resampler(candidate)
+    deltas = sorted(cand.percentile(rng, q) - base.percentile(rng, q) for _ in range(iterations))
+    tail = (1.0 - confidence) / 2.0
+    low = deltas[min(int(tail * iterations), iterations - 1)]
+    high = deltas[min(int((1.0 - tail) * iterations), iterations - 1)]
+    return {
+        "delta_ms": candidate.percentile(q) - baseline.percentile(q),
+        "ci_low_ms": low,
+        "ci_high_ms": high,
+    }
+
+
+def compare_runs(
+    baseline: Dict[str, LatencyHistogram],
+    candidate: Dict[str, LatencyHistogram],
+    percentiles=REPORT_PERCENTILES,
+    threshold_pct: float = 10.0,
+    iterations: int = 2000,
+    confidence: float = 0.95,
+) -> List[Dict[str, Any]]:
+    """One row per (label, percentile) present in both runs.
+
+    ``regressed`` is True when the candidate is slower by more than
+    ``threshold_pct`` percent and the bootstrap interval excludes zero.
+    Percentiles that need more samples than either run has are skipped.
+    """
+    rows: List[Dict[str, Any]] = []
+    for label in baseline:
+        if label not in candidate:
+            continue
+        base, cand = baseline[label], candidate[label]
+        if not base.total_count or not cand.total_count:
+            continue
+        for q in percentiles:
+            # p99.9 of 50 samples is just the max: not meaningful to test
+            if min(base.total_count, cand.total_count) * (1 - q / 100.0) < 1:
+                continue
+            stats = bootstrap_delta(base, cand, q, iterations=iterations, confidence=confidence)
+            base_ms = base.percentile(q)
+            change_pct = stats["delta_ms"] / base_ms * 100.0 if base_ms else 0.0
+            rows.append(
+                {
+                    "label": label,
+                    "percentile": q,
+                    "baseline_ms": round(base_ms, 3),
+                    "candidate_ms": round(cand.percentile(q), 3),
+                    "change_pct": round(change_pct, 1),
+                    "ci_low_ms": round(stats["ci_low_ms"], 3),
+                    "ci_high_ms": round(stats["ci_high_ms"], 3),
+                    "regressed": change_pct > threshold_pct and stats["ci_low_ms"] > 0,
+                }
+            )
+    return rows
+
+
+__all__ = [
+    "BASELINE_DIR",
+    "baseline_path",
+    "bootstrap_delta",
+    "compare_runs",
+    "load_baseline",
+    "load_histograms",
+    "save_baseline",
+]
@@ -0,0 +1,247 @@
+"""
+High-dynamic-range latency histogram for the benchmark.
+
+Sorting a list of every sample needs memory per request and, with 50
+samples, makes "p99" just the maximum. ``LatencyHistogram`` uses the
+HdrHistogram bucket layout instead: log-scaled buckets, each split into
+linear sub-buckets, so any value between 1 µs and 60 s is stored to 3
+significant digits in a fixed ~140 KB array no matter how many samples are
+recorded. Histograms with the same settings merge by adding counts, so each
+worker (or process) records into its own and the results are combined at
+the end.
+
+Usage:
+    hist = LatencyHistogram()
+    hist.record(1.25)           # milliseconds
+    hist.percentile(99.9)       # -> ms
+    other = LatencyHistogram.from_dict(json.loads(blob))
+    hist.merge(other)
+
+    write_report("bench.json", [report_row("submit", hist, elapsed=10.0)])
+"""
+
+import csv
+import json
+import math
+from array import array
+from typing import Any, Dict, List, Optional
+
+REPORT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+REPORT_FIELDS = [
+    "label",
+    "count",
+    "errors",
+    "throughput_rps",
+    "mean_ms",
+    "p50_ms",
+    "p90_ms",
+    "p99_ms",
+    "p99_9_ms",
+    "max_ms",
+]
+
+
+class LatencyHistogram:
+    """Constant-memory latency recorder (values in ms, stored as integer µs)."""
+
+    def __init__(
+        self,
+        lowest_us: int = 1,
+        highest_us: int = 60_000_000,
+        significant_figures: int = 3,
+    ):
+        if lowest_us < 1 or highest_us < 2 * lowest_us:
+            raise ValueError("need 1 <= lowest_us and highest_us >= 2 * lowest_us")
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+        self.lowest_us = lowest_us
+        self.highest_us = highest_us
+        self.significant_figures = significant_figures
+
+        largest_single_unit = 2 * 10 ** significant_figures
+        self._unit_magnitude = int(math.floor(math.log2(lowest_us)))
+        self._sub_bucket_count_magnitude = int(math.ceil(math.log2(largest_single_unit)))
+        self._sub_bucket_half_count_magnitude = self._sub_bucket_count_magnitude - 1
+        self._sub_bucket_count = 1 << self._sub_bucket_count_magnitude
+        self._sub_bucket_half_count = self._sub_bucket_count // 2
+        self._sub_bucket_mask = (self._sub_bucket_count - 1) << self._unit_magnitude
+
+        smallest_untrackable = self._sub_bucket_count << self._unit_magnitude
+        bucket_count = 1
+        while smallest_untrackable <= highest_us:
+            smallest_untrackable <<= 1
+            bucket_count += 1
+        self._bucket_count = bucket_count
+
+        self.counts = array("Q", bytes(8 * (bucket_count + 1) * self._sub_bucket_half_count))
+        self.total_count = 0
+        self.errors = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+        self._sum_us = 0
+
+    # -- recording -----------------------------------------------------------
+
+    def _index_for(self, value: int) -> int:
+        bucket = (value | self._sub_bucket_mask).bit_length() - self._unit_magnitude - self._sub_bucket_count_magnitude
+        sub_bucket = value >> (bucket + self._unit_magnitude)
+        return ((bucket + 1) << self._sub_bucket_half_count_magnitude) + (sub_bucket - self._sub_bucket_half_count)
+
+    def _value_at(self, index: int) -> int:
+        """Highest value that lands in counts slot ``index``."""
+        bucket = (index >> self._sub_bucket_half_count_magnitude) - 1
+        sub_bucket = (index & (self._sub_bucket_half_count - 1)) + self._sub_bucket_half_count
+        if bucket < 0:
+            sub_bucket -= self._sub_bucket_half_count
+            bucket = 0
+        lowest = sub_bucket << (bucket + self._unit_magnitude)
+        return lowest + (1 << (bucket + self._unit_magnitude)) - 1
+
+    def record(self, latency_ms: float, count: int = 1) -> None:
+        """Record ``count`` samples of ``latency_ms`` (clamped to the trackable range)."""
+        value = min(max(int(round(latency_ms * 1000)), 0), self.highest_us)
+        self.counts[self._index_for(value)] += count
+        self.total_count += count
+        self._sum_us += value * count
+        if self.min_us is None or value < self.min_us:
+            self.min_us = value
+        if value > self.max_us:
+            self.max_us = value
+
+    def record_error(self, count: int = 1) -> None:
+        """Count a failed request (not timed)."""
+        self.errors += count
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """Add ``other``'s samples into this histogram and return self."""
+        if (other.lowest_us, other.highest_us, other.significant_figures) != (
+            self.lowest_us,
+            self.highest_us,
+            self.significant_figures,
+        ):
+            raise ValueError("cannot merge histograms with different ranges or precision")
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c:
+                counts[i] += c
+        self.total_count += other.total_count
+        self.errors += other.errors
+        self._sum_us += other._sum_us
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    # -- queries -------------------------------------------------------------
+
+    def percentile(self, q: float) -> float:
+        """Latency in ms at percentile ``q`` (0-100), to the histogram's precision."""
+        if not self.total_count:
+            return 0.0
+        if q >= 100.0:
+            return self.max_us / 1000.0
+        # round() first so 99.9% of 1000 is 999, not 1000 from float error
+        target = max(int(math.ceil(round(q / 100.0 * self.total_count, 9))), 1)
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c:
+                seen += c
+                if seen >= target:
+                    return min(self._value_at(i), self.max_us) / 1000.0
+        return self.max_us / 1000.0
+
+    @property
+    def mean(self) -> float:
+        return self._sum_us / self.total_count / 1000.0 if self.total_count else 0.0
+
+    @property
+    def min(self) -> float:
+        return (self.min_us or 0) / 1000.0
+
+    @property
+    def max(self) -> float:
+        return self.max_us / 1000.0
+
+    def stdev(self) -> float:
+        """Standard deviation in ms, approximated from the bucket values."""
+        if self.total_count < 2:
+            return 0.0
+        mean_us = self._sum_us / self.total_count
+        total = 0.0
+        for i, c in enumerate(self.counts):
+            if c:
+                total += c * (self._value_at(i) - mean_us) ** 2
+        return math.sqrt(total / (self.total_count - 1)) / 1000.0
+
+    def __len__(self) -> int:
+        return self.total_count
+
+    # -- serialization -------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Sparse, JSON-safe form for merging across processes or saving runs."""
+        return {
+            "lowest_us": self.lowest_us,
+            "highest_us": self.highest_us,
+            "significant_figures": self.significant_figures,
+            "errors": self.errors,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "sum_us": self._sum_us,
+            "counts": {str(i): c for i, c in enumerate(self.counts) if c},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        hist = cls(data["lowest_us"], data["highest_us"], data["significant_figures"])
+        for i, c in data["counts"].items():
+            hist.counts[int(i)] = c
+        hist.total_count = sum(data["counts"].values())
+        hist.errors = data.get("errors", 0)
+        hist.min_us = data.get("min_us")
+        hist.max_us = data.get("max_us", 0)
+        hist._sum_us = data.get("sum_us", 0)
+        return hist
+
+
+def report_row(label: str, hist: LatencyHistogram, elapsed: Optional[float] = None) -> Dict[str, Any]:
+    """Summary row with the standard report percentiles and throughput."""
+    row: Dict[str, Any] = {
+        "label": label,
+        "count": hist.total_count,
+        "errors": hist.errors,
+        "throughput_rps": round(hist.total_count / elapsed, 2) if elapsed else None,
+        "mean_ms": round(hist.mean, 3),
+    }
+    for q in REPORT_PERCENTILES:
+        row[f"p{q:g}_ms".replace(".", "_")] = round(hist.percentile(q), 3)
+    row["max_ms"] = round(hist.max, 3)
+    return row
+
+
+def write_report(path: str, rows: List[Dict[str, Any]], histograms: Optional[Dict[str, LatencyHistogram]] = None) -> None:
+    """Write rows as CSV (``.csv``) or JSON (anything else).
+
+    The JSON form also embeds each histogram so runs can be merged or
+    compared later without the raw samples.
+    """
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+        return
+    payload: Dict[str, Any] = {"results": rows}
+    if histograms:
+        payload["histograms"] = {label: h.to_dict() for label, h in histograms.items()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+
+__all__ = [
+    "LatencyHistogram",
+    "REPORT_FIELDS",
+    "REPORT_PERCENTILES",
+    "report_row",
+    "write_report",
+]
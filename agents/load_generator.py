@@ -0,0 +1,197 @@
+"""
+Open-loop load generation for the latency benchmark.
+
+A closed loop (send, wait, send the next) slows down with the server, so a
+stall of 200 ms is recorded once instead of for every request that should
+have been sent during it (coordinated omission). Here request ``i`` is
+scheduled at ``start + i / rate`` regardless of how earlier requests went,
+and its latency is measured from that scheduled time. When the workers fall
+behind, the queueing delay shows up in the percentiles just as it would for
+production traffic arriving at that rate.
+
+Usage:
+    result = run_open_loop(send, rate=500, duration=10, workers=32)
+    print(result.percentile(99))
+
+    steps = sweep_rates(send, rates=[100, 200, 400, 800], slo_p99_ms=2.0)
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from latency_histogram import LatencyHistogram, report_row
+
+
+class LoadResult:
+    """Latency histogram (ms, from scheduled send time) and counters for one rate."""
+
+    def __init__(self, rate: float, workers: int):
+        self.rate = rate
+        self.workers = workers
+        self.scheduled = 0
+        self.histogram = LatencyHistogram()
+        self.max_lag_ms = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def completed(self) -> int:
+        return self.histogram.total_count
+
+    @property
+    def errors(self) -> int:
+        return self.histogram.errors
+
+    @property
+    def throughput(self) -> float:
+        """Successful requests per second actually achieved."""
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.scheduled if self.scheduled else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Latency in ms at percentile ``q`` (0-100)."""
+        return self.histogram.percentile(q)
+
+    def within_slo(self, slo_p99_ms: float, max_error_rate: float = 0.01) -> bool:
+        """p99 and error rate within bounds; a step with no successes never passes."""
+        return (
+            self.completed > 0
+            and self.percentile(99) <= slo_p99_ms
+            and self.error_rate <= max_error_rate
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        row = report_row(f"open_loop@{self.rate:g}rps", self.histogram, self.elapsed)
+        row.update(
+            {
+                "target_rps": self.rate,
+                "workers": self.workers,
+                "scheduled": self.scheduled,
+                "max_send_lag_ms": round(self.max_lag_ms, 3),
+            }
+        )
+        return row
+
+
+def run_open_loop(
+    send: Callable[[int], Any],
+    rate: float,
+    duration: float,
+    workers: int = 16,
+) -> LoadResult:
+    """Call ``send(i)`` at ``rate`` requests/second for ``duration`` seconds.
+
+    ``workers`` threads share one schedule; each takes the next slot, sleeps
+    until its scheduled time if it is early, and otherwise sends at once.
+    Latency is ``completion - scheduled``, so time spent waiting for a free
+    worker counts against the server, not in its favour. Each worker records
+    into its own histogram; they are merged once the run ends.
+    """
+    if rate <= 0 or duration <= 0:
+        raise ValueError("rate and duration must be positive")
+
+    result = LoadResult(rate, workers)
+    total = max(int(rate * duration), 1)
+    interval = 1.0 / rate
+    lock = threading.Lock()
+    next_slot = [0]
+    start = time.perf_counter() + 0.05  # let every worker reach the loop
+    histograms = [LatencyHistogram() for _ in range(workers)]
+    lags = [0.0] * workers
+
+    def worker(n: int) -> None:
+        hist = histograms[n]
+        while True:
+            with lock:
+                i = next_slot[0]
+                if i >= total:
+                    return
+                next_slot[0] += 1
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            sent = time.perf_counter()
+            try:
+                send(i)
+                ok = True
+            except Exception:
+                ok = False
+            if ok:
+                hist.record((time.perf_counter() - scheduled) * 1000)
+            else:
+                hist.record_error()
+            lags[n] = max(lags[n], (sent - scheduled) * 1000)
+
+    threads = [
+        threading.Thread(target=worker, args=(n,), daemon=True) for n in range(workers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    result.scheduled = total
+    result.elapsed = time.perf_counter() - start
+    for hist in histograms:
+        result.histogram.merge(hist)
+    result.max_lag_ms = max(lags)
+    return result
+
+
+def sweep_rates(
+    send: Callable[[int], Any],
+    rates: Iterable[float],
+    slo_p99_ms: float,
+    duration: float = 10.0,
+    workers: int = 16,
+    max_error_rate: float = 0.01,
+    on_step: Optional[Callable[[LoadResult], None]] = None,
+) -> List[LoadResult]:
+    """Run ``run_open_loop`` at each rate until p99 (or the error rate) breaks the SLO.
+
+    Returns every step that ran; the last one is the first breach unless
+    all rates stayed within the SLO.
+    """
+    steps: List[LoadResult] = []
+    for rate in rates:
+        step = run_open_loop(send, rate=rate, duration=duration, workers=workers)
+        steps.append(step)
+        if on_step:
+            on_step(step)
+        if not step.within_slo(slo_p99_ms, max_error_rate):
+            break
+    return steps
+
+
+def max_sustainable_rate(
+    steps: List[LoadResult], slo_p99_ms: float, max_error_rate: float = 0.01
+) -> Optional[float]:
+    """Highest target rate whose p99 and error rate stayed within the SLO."""
+    passing = [s.rate for s in steps if s.within_slo(slo_p99_ms, max_error_rate)]
+    return max(passing) if passing else None
+
+
+def rate_steps(start: float, stop: float, factor: float = 1.5) -> List[float]:
+    """Geometric rate ladder from ``start`` up to and including ``stop``."""
+    if start <= 0 or factor <= 1:
+        raise ValueError("start must be positive and factor greater than 1")
+    rates = []
+    rate = start
+    while rate < stop:
+        rates.append(round(rate, 1))
+        rate *= factor
+    rates.append(stop)
+    return rates
+
+
+__all__ = [
+    "LoadResult",
+    "max_sustainable_rate",
+    "rate_steps",
+    "run_open_loop",
+    "sweep_rates",
+]
@@ -0,0 +1,431 @@
+"""
+Stand-in for the Faramesh server, for offline demos, tests and benchmarks.
+
+Serves enough of the API for the SDK and the demos to run without a real
+server: ``/health``, submit / get / report on ``/v1/actions`` (with
+``?wait=N`` long-poll, batched ``GET /v1/actions?ids=a,b`` and a server-sent
+event stream per action), approve / deny, and YAML policy activation.
+Decisions come from a configurable mix (e.g. 90% allowed, 10% pending
+approval) drawn from a seeded RNG, after a configurable decision latency, so
+runs are repeatable and measure client-side cost rather than a policy
+engine.
+
+Two ways to use it:
+
+- on a loopback port, as a real HTTP server (``start()`` / context manager);
+  ``demo_utils.ensure_server_available`` starts one when ``FARAMESH_MOCK=1``
+  and nothing is listening at ``FARAMESH_BASE_URL``;
+- in-process, with no sockets at all: ``httpx_transport()`` plugs into an
+  ``httpx.Client(transport=...)`` and calls ``handle()`` directly.
+
+Tests flip status with ``set_status`` to simulate a human in the UI.
+
+Usage:
+    with MockFarameshServer(decision_mix={"allowed": 0.9, "denied": 0.1}) as server:
+        action = server.add_action(status="pending_approval")
+        server.set_status(action["id"], "approved")
+
+Environment (``MockFarameshServer.from_env``):
+    FARAMESH_MOCK_LATENCY_MS      decision latency per submission (default 0)
+    FARAMESH_MOCK_MIX             e.g. "allowed=0.9,pending_approval=0.1"
+    FARAMESH_MOCK_APPROVE_AFTER   auto-approve pending actions after N seconds
+    FARAMESH_MOCK_SEED            RNG seed (default 0)
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    server: "_Server"
+
+    def log_message(self, format, *args):  # keep test output quiet
+        pass
+
+    def _send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _dispatch(self, method: str) -> None:
+        mock = self.server.mock
+        parsed = urlparse(self.path)
+        parts = [p for p in parsed.path.split("/") if p]
+        if method == "GET" and len(parts) == 4 and parts[:2] == ["v1", "actions"] and parts[3] == "events":
+            mock.requests += 1
+            if not mock.stream:
+                self._send_json(404, {"detail": "Not Found"})
+                return
+            self._stream_events(parts[2])
+            return
+        request_body = self._read_body()
+        start = time.perf_counter()
+        status, body = mock.handle(method, self.path, request_body)
+        self._send_json(status, body, _server_timing(start))
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _stream_events(self, action_id: str) -> None:
+        mock = self.server.mock
+        snapshot = mock._watch(action_id, None, 0.0)
+        if snapshot is None:
+            self._send_json(404, {"detail": "Action not found"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            version = None
+            while not mock.stopped:
+                current, action = snapshot
+                if current == version:
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    version = current
+                    self.wfile.write(f"data: {json.dumps(action)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if action["status"] not in mock.pending_statuses:
+                    return
+                snapshot = mock._watch(action_id, version, 1.0)
+                if snapshot is None:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default of 5 drops bursts of concurrent connects
+    mock: "MockFarameshServer"
+
+
+class MockFarameshServer:
+    """In-memory Faramesh action store, served over loopback HTTP or in-process."""
+
+    pending_statuses = ("pending", "pending_approval")
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        default_status: str = "allowed",
+        decision_latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        decision_mix: Optional[Dict[str, float]] = None,
+        approve_after: Optional[float] = None,
+        seed: Optional[int] = 0,
+    ):
+        self.default_status = default_status
+        self.decision_latency = decision_latency
+        self.latency_jitter = latency_jitter
+        self.decision_mix = decision_mix
+        self.approve_after = approve_after
+        self.active_policy: Optional[str] = None
+        self.stream = True
+        self.long_poll = True
+        self.batch = True
+        self.requests = 0
+        self.stopped = False
+        self._rng = random.Random(seed)
+        self._actions: Dict[str, Dict[str, Any]] = {}
+        self._changed = threading.Condition()
+        self._host, self._port = host, port
+        self._httpd: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "MockFarameshServer":
+        """Build a server from the FARAMESH_MOCK_* variables (see module docstring)."""
+        kwargs: Dict[str, Any] = {
+            "decision_latency": float(os.getenv("FARAMESH_MOCK_LATENCY_MS", "0")) / 1000.0,
+            "decision_mix": parse_decision_mix(os.getenv("FARAMESH_MOCK_MIX", "")),
+            "seed": int(os.getenv("FARAMESH_MOCK_SEED", "0")),
+        }
+        if os.getenv("FARAMESH_MOCK_APPROVE_AFTER"):
+            kwargs["approve_after"] = float(os.environ["FARAMESH_MOCK_APPROVE_AFTER"])
+        kwargs.update(overrides)
+        return cls(**kwargs)
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def _bind(self) -> _Server:
+        if self._httpd is None:
+            self._httpd = _Server((self._host, self._port), _Handler)
+            self._httpd.mock = self
+        return self._httpd
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._bind().server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockFarameshServer":
+        httpd = self._bind()
+        self._thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped = True
+        with self._changed:
+            self._changed.notify_all()
+        if self._httpd is not None:
+            if self._thread is not None:
+                self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def __enter__(self) -> "MockFarameshServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def httpx_transport(self):
+        """``httpx.MockTransport`` that answers from this store with no network I/O.
+
+        Streaming (``/events``) is not available in-process, so waiters fall
+        back to long-poll or polling.
+        """
+        import httpx
+
+        def handler(request: "httpx.Request") -> "httpx.Response":
+            target = request.url.raw_path.decode("ascii")
+            start = time.perf_counter()
+            status, body = self.handle(request.method, target, request.read())
+            return httpx.Response(status, json=body, headers=_server_timing(start))
+
+        return httpx.MockTransport(handler)
+
+    # -- API -----------------------------------------------------------------
+
+    def handle(self, method: str, target: str, body: bytes = b"") -> Tuple[int, Any]:
+        """Answer one API request; returns ``(status_code, json_body)``."""
+        self.requests += 1
+        parsed = urlparse(target)
+        parts = [p for p in parsed.path.split("/") if p]
+        query = parse_qs(parsed.query)
+        try:
+            payload = json.loads(body.decode("utf-8")) if body else {}
+        except ValueError:
+            return 400, {"detail": "Invalid JSON body"}
+
+        if method == "GET" and parts in (["health"], ["v1", "health"]):
+            return 200, {"status": "ok", "mock": True}
+
+        if parts[:2] == ["v1", "policies"] and parts[-1:] == ["activate"] and method == "POST":
+            self.active_policy = parts[-2]
+            return 200, {"policy_name": self.active_policy, "active": True}
+
+        if parts[:2] != ["v1", "actions"]:
+            return 404, {"detail": "Not Found"}
+
+        if len(parts) == 2:
+            if method == "POST":
+                return 200, self.submit(payload)
+            ids = [aid for aid in query.get("ids", [""])[0].split(",") if aid]
+            if ids and not self.batch:
+                return 404, {"detail": "Not Found"}
+            if ids:
+                actions = [self.get_action(aid) for aid in ids]
+            else:
+                try:
+                    limit = int(query.get("limit", ["100"])[0])
+                except ValueError:
+                    limit = 0
+                if limit < 1:
+                    return 400, {"detail": "limit must be a positive integer"}
+                actions = self.list_actions(limit)
+            return 200, {"actions": [a for a in actions if a]}
+
+        action_id = parts[2]
+        if len(parts) == 3 and method == "GET":
+            wait = float(query.get("wait", ["0"])[0] or 0) if self.long_poll else 0.0
+            action = self.wait_for_change(action_id, None, wait)
+            return (200, action) if action else (404, {"detail": "Action not found"})
+
+        if len(parts) == 4 and method == "POST":
+            if self.get_action(action_id) is None:
+                return 404, {"detail": "Action not found"}
+            verb = parts[3]
+            if verb == "result":
+                success = bool(payload.get("success", True))
+                self.set_status(
+                    action_id,
+                    "succeeded" if success else "failed",
+                    result=payload.get("result"),
+                    error=payload.get("error"),
+                )
+                return 200, self.get_action(action_id)
+            if verb in ("approve", "allow"):
+                self.set_status(action_id, "approved", reason=payload.get("reason"))
+                return 200, self.get_action(action_id)
+            if verb == "deny":
+                self.set_status(action_id, "denied", reason=payload.get("reason") or "Denied")
+                return 200, self.get_action(action_id)
+
+        return 404, {"detail": "Not Found"}
+
+    def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate a submitted action: wait the decision latency, then pick a status."""
+        delay = self.decision_latency
+        if self.latency_jitter:
+            delay += self._rng.uniform(0, self.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+        # the server assigns these; a client must not pick its own decision or id
+        fields = {k: v for k, v in payload.items() if k not in _SERVER_FIELDS}
+        status = self._pick_status()
+        action = self.add_action(status=status, **fields)
+        if status == "pending_approval" and self.approve_after is not None:
+            timer = threading.Timer(self.approve_after, self.set_status, args=(action["id"], "approved"))
+            timer.daemon = True
+            timer.start()
+        return action
+
+    def _pick_status(self) -> str:
+        if not self.decision_mix:
+            return self.default_status
+        statuses = list(self.decision_mix)
+        weights = [self.decision_mix[s] for s in statuses]
+        return self._rng.choices(statuses, weights=weights)[0]
+
+    # -- store ---------------------------------------------------------------
+
+    def add_action(self, status: Optional[str] = None, **fields: Any) -> Dict[str, Any]:
+        """Record a submitted action and return it as the server would.
+
+        Tests may pass ``status``, ``id``, ``decision`` or ``reason``;
+        ``submit()`` never forwards them from a request body.
+        """
+        action = dict(fields)
+        action.setdefault("id", str(uuid.uuid4()))
+        action["status"] = status or self.default_status
+        action.setdefault("decision", _decision_for(action["status"]))
+        action.setdefault("reason", _reason_for(action["status"]))
+        action["created_at"] = time.time()
+        action["_version"] = 0
+        with self._changed:
+            self._actions[action["id"]] = action
+            self._changed.notify_all()
+        return _public(action)
+
+    def get_action(self, action_id: str) -> Optional[Dict[str, Any]]:
+        with self._changed:
+            action = self._actions.get(action_id)
+            return _public(action) if action else None
+
+    def list_actions(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent actions first."""
+        with self._changed:
+            actions = list(self._actions.values())[-limit:] if limit > 0 else []
+            return [_public(a) for a in reversed(actions)]
+
+    def set_status(self, action_id: str, status: str, **fields: Any) -> None:
+        """Change an action's status and wake every waiter watching it."""
+        with self._changed:
+            action = self._actions[action_id]
+            action.update(fields)
+            action["status"] = status
+            action["decision"] = _decision_for(status) or action.get("decision")
+            action["_version"] += 1
+            self._changed.notify_all()
+
+    def wait_for_change(
+        self, action_id: str, version: Optional[int], wait: float
+    ) -> Optional[Dict[str, Any]]:
+        """Return the action once its version differs from ``version`` or ``wait`` elapses.
+
+        With ``version=None`` the call returns immediately unless the action
+        is still pending, in which case it holds for up to ``wait`` seconds.
+        """
+        snapshot = self._watch(action_id, version, wait)
+        return snapshot[1] if snapshot else None
+
+    def _watch(
+        self, action_id: str, version: Optional[int], wait: float
+    ) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """``wait_for_change`` that also returns the action's internal version."""
+        deadline = time.monotonic() + wait
+        with self._changed:
+            action = self._actions.get(action_id)
+            if action is None:
+                return None
+            start_version = action["_version"] if version is None else version
+            if version is None and action["status"] not in self.pending_statuses:
+                return action["_version"], _public(action)
+            while action["_version"] == start_version and not self.stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            return action["_version"], _public(action)
+
+
+def parse_decision_mix(spec: str) -> Optional[Dict[str, float]]:
+    """``"allowed=0.9,denied=0.1"`` -> ``{"allowed": 0.9, "denied": 0.1}`` (None if empty)."""
+    mix: Dict[str, float] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        status, _, weight = item.partition("=")
+        mix[status.strip()] = float(weight or 1)
+    return mix or None
+
+
+# Fields the server assigns; ignored in submitted bodies.
+_SERVER_FIELDS = ("id", "status", "decision", "reason", "created_at", "_version")
+
+
+def _public(action: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a stored action without internal bookkeeping."""
+    return {k: v for k, v in action.items() if k != "_version"}
+
+
+def _server_timing(start: float) -> Dict[str, str]:
+    """``Server-Timing`` header with the time spent handling the request."""
+    return {"Server-Timing": f"app;dur={(time.perf_counter() - start) * 1000:.3f}"}
+
+
+def _decision_for(status: str) -> Optional[str]:
+    return {
+        "allowed": "allow",
+        "approved": "allow",
+        "denied": "deny",
+        "pending_approval": "require_approval",
+    }.get(status)
+
+
+def _reason_for(status: str) -> Optional[str]:
+    return {
+        "allowed": "Allowed by mock policy",
+        "denied": "Denied by mock policy",
+        "pending_approval": "Requires approval (mock policy)",
+    }.get(status)
+
+
+__all__ = ["MockFarameshServer", "parse_decision_mix"]
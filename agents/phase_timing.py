@@ -0,0 +1,176 @@
+"""
+Per-phase cost breakdown of one Faramesh action submission.
+
+``submit_action`` is a single opaque call, so a slow benchmark cannot say
+whether the time went to the SDK, the network or the policy engine.
+``timed_submit`` performs the same request step by step and times each
+phase separately:
+
+    serialize  payload -> JSON bytes
+    hash       canonical request hash (when a hash function is given)
+    acquire    waiting for a pooled connection
+    connect    TCP connect (new connections only)
+    tls        TLS handshake (new https connections only)
+    send       writing request headers and body
+    server     time the server reports spending (Server-Timing / X-Process-Time)
+    network    time to first response byte, minus server time
+    receive    reading the response body
+    decode     JSON bytes -> dict
+
+Network phases come from httpx's connection trace hooks, so the client must
+be an ``httpx.Client``. Each phase is recorded into its own
+``LatencyHistogram``.
+
+Usage:
+    breakdown = PhaseBreakdown()
+    with httpx.Client() as client:
+        for i in range(1000):
+            timed_submit(client, base_url, token, payload, breakdown, hash_fn=compute_request_hash)
+    breakdown.histograms["server"].percentile(99)
+"""
+
+import json
+import re
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from latency_histogram import LatencyHistogram
+
+PHASES = (
+    "serialize",
+    "hash",
+    "acquire",
+    "connect",
+    "tls",
+    "send",
+    "server",
+    "network",
+    "receive",
+    "decode",
+)
+
+_SERVER_TIMING_DUR = re.compile(r"dur=([0-9.]+)")
+
+
+class PhaseBreakdown:
+    """One histogram per phase, plus the end-to-end total."""
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {
+            name: LatencyHistogram() for name in PHASES + ("total",)
+        }
+        self.new_connections = 0
+
+    def record(self, phases: Dict[str, float]) -> None:
+        for name, ms in phases.items():
+            self.histograms[name].record(ms)
+
+    def rows(self):
+        """(phase, p50, p99, share of total time) for phases that were seen.
+
+        Shares use summed time, so a phase that only happens on some requests
+        (connect, tls) is weighted by how often it happened.
+        """
+        total = self.histograms["total"]
+        total_time = total.mean * total.total_count or 1.0
+        for name in PHASES:
+            hist = self.histograms[name]
+            if hist.total_count:
+                share = hist.mean * hist.total_count / total_time
+                yield name, hist.percentile(50), hist.percentile(99), share
+
+
+def server_time_ms(headers: httpx.Headers) -> Optional[float]:
+    """Server-reported processing time in ms, if the response carries one.
+
+    Reads ``Server-Timing`` (``app;dur=1.23``, summed over entries) or
+    ``X-Process-Time`` / ``X-Response-Time`` in seconds.
+    """
+    timing = headers.get("server-timing")
+    if timing:
+        durations = [float(m) for m in _SERVER_TIMING_DUR.findall(timing)]
+        if durations:
+            return sum(durations)
+    for name in ("x-process-time", "x-response-time"):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value.rstrip("s")) * 1000.0
+            except ValueError:
+                continue
+    return None
+
+
+def timed_submit(
+    client: httpx.Client,
+    base_url: str,
+    token: Optional[str],
+    payload: Dict[str, Any],
+    breakdown: PhaseBreakdown,
+    hash_fn: Optional[Callable[[Dict[str, Any]], str]] = None,
+) -> Dict[str, Any]:
+    """POST ``payload`` to ``/v1/actions`` timing every phase; returns the action."""
+    marks: Dict[str, float] = {}
+
+    def trace(event: str, info: Dict[str, Any]) -> None:
+        # "connection.connect_tcp.started", "http11.send_request_headers.complete", ...
+        if event.startswith(("http11.", "http2.")):
+            event = event.split(".", 1)[1]
+        marks[event] = time.perf_counter()
+
+    phases: Dict[str, float] = {}
+    start = time.perf_counter()
+    body = json.dumps(payload).encode("utf-8")
+    t = time.perf_counter()
+    phases["serialize"] = (t - start) * 1000
+    if hash_fn is not None:
+        hash_fn(payload)
+        phases["hash"] = (time.perf_counter() - t) * 1000
+
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    request_start = time.perf_counter()
+    resp = client.post(
+        f"{base_url.rstrip('/')}/v1/actions",
+        content=body,
+        headers=headers,
+        extensions={"trace": trace},
+    )
+    resp.raise_for_status()
+
+    def span(name: str) -> float:
+        begin, end = marks.get(f"{name}.started"), marks.get(f"{name}.complete")
+        return (end - begin) * 1000 if begin is not None and end is not None else 0.0
+
+    connect = span("connection.connect_tcp")
+    tls = span("connection.start_tls")
+    if "connection.connect_tcp.started" in marks:
+        breakdown.new_connections += 1
+        phases["connect"] = connect
+    if "connection.start_tls.started" in marks:
+        phases["tls"] = tls
+    send_start = marks.get("send_request_headers.started", request_start)
+    phases["acquire"] = max((send_start - request_start) * 1000 - connect - tls, 0.0)
+    phases["send"] = span("send_request_headers") + span("send_request_body")
+    first_byte = span("receive_response_headers")
+    server = server_time_ms(resp.headers)
+    if server is not None:
+        phases["server"] = server
+        phases["network"] = max(first_byte - server, 0.0)
+    else:
+        phases["network"] = first_byte
+    phases["receive"] = span("receive_response_body")
+
+    t = time.perf_counter()
+    action = json.loads(resp.content)
+    done = time.perf_counter()
+    phases["decode"] = (done - t) * 1000
+    phases["total"] = (done - start) * 1000
+    breakdown.record(phases)
+    return action
+
+
+__all__ = ["PHASES", "PhaseBreakdown", "server_time_ms", "timed_submit"]
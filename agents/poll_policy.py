@@ -0,0 +1,118 @@
+"""
+Adaptive polling schedule for Faramesh action status checks.
+
+A fixed one-second interval is too slow for decisions that are ready in a few
+milliseconds and too noisy for a human approval that takes minutes.
+``PollPolicy`` describes the schedule instead:
+
+- fast first probes (5 ms by default) so instant ``allowed`` decisions are
+  picked up almost immediately,
+- exponential growth per status, so an action parked in ``pending_approval``
+  backs off to one probe every few seconds,
+- random jitter, so many waiters do not poll in lockstep,
+- a server ``Retry-After`` hint overrides the computed delay when sent.
+
+Each wait gets its own ``PollSchedule`` from ``policy.start()``; callers bump
+``schedule.polls`` per request so they can report how many each wait took.
+
+Usage:
+    policy = PollPolicy(per_status={"pending_approval": (0.5, 10.0)})
+    schedule = policy.start()
+    while True:
+        schedule.polls += 1
+        action = get_action(action_id)
+        if is_decided(action):
+            break
+        time.sleep(schedule.next_delay(action.get("status")))
+    print(f"decided after {schedule.polls} polls")
+"""
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+
+class PollPolicy:
+    """Exponential backoff with jitter and per-status (initial, max) intervals."""
+
+    def __init__(
+        self,
+        initial: float = 0.005,
+        multiplier: float = 2.0,
+        max_interval: float = 1.0,
+        jitter: float = 0.2,
+        per_status: Optional[Dict[str, Tuple[float, float]]] = None,
+        max_retry_after: float = 60.0,
+    ):
+        self.initial = initial
+        self.multiplier = multiplier
+        self.max_interval = max_interval
+        self.jitter = jitter
+        # Human approvals take seconds to minutes: start slower, back off further.
+        self.per_status = {"pending_approval": (0.05, 5.0)}
+        self.per_status.update(per_status or {})
+        self.max_retry_after = max_retry_after
+
+    def bounds(self, status: Optional[str]) -> Tuple[float, float]:
+        return self.per_status.get(status or "", (self.initial, self.max_interval))
+
+    def start(self) -> "PollSchedule":
+        return PollSchedule(self)
+
+
+class PollSchedule:
+    """Per-wait state: the backoff step for the current status and the poll count."""
+
+    def __init__(self, policy: PollPolicy):
+        self.policy = policy
+        self.polls = 0
+        self.started = time.monotonic()
+        self._status: Optional[str] = None
+        self._step = 0
+
+    def next_delay(self, status: Optional[str] = None, retry_after: Optional[float] = None) -> float:
+        """Return how long to sleep before the next poll.
+
+        The exponential step restarts whenever the observed status changes,
+        so moving from ``pending`` to ``pending_approval`` picks up that
+        status's own starting interval.
+        """
+        if status != self._status:
+            self._status = status
+            self._step = 0
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.policy.max_retry_after)
+
+        initial, ceiling = self.policy.bounds(status)
+        delay = min(initial * (self.policy.multiplier ** self._step), ceiling)
+        self._step += 1
+        if self.policy.jitter:
+            delay *= 1 + random.uniform(-self.policy.jitter, self.policy.jitter)
+        return max(delay, 0.0)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+DEFAULT_POLL_POLICY = PollPolicy()
+
+
+__all__ = ["DEFAULT_POLL_POLICY", "PollPolicy", "PollSchedule", "parse_retry_after"]
@@ -0,0 +1,278 @@
+"""
+Local per-customer refund index for ``customer_refund_count_90d``.
+
+Counting a customer's refunds by listing refunded orders and filtering by
+email costs a Shopify scan on every refund, and a single 250-order page
+silently undercounts busy stores. ``RefundIndex`` keeps one row per refund
+(order, customer email, refund time) in SQLite instead:
+
+- the first ``refresh()`` pages through every refunded and partially
+  refunded order updated within ``retention_days`` (cursor pagination, no
+  page cap);
+- later refreshes only ask for orders with ``updated_at_min`` at the stored
+  watermark - issuing a refund bumps the order's ``updated_at``. The
+  watermark only moves once a scan has finished, since Shopify does not
+  return the pages in ``updated_at`` order, and never past the scan's
+  start (less ``CLOCK_SKEW``): an order updated mid-scan on a page already
+  read is picked up by the next refresh;
+- ``record_refund()`` files a refund this process just issued right away,
+  so back-to-back refunds count each other before the next refresh;
+- ``count(email, days)`` is a range query on an ``(email, refunded_at)``
+  index, so it costs the same at ten orders or ten million.
+
+``count`` is the number of orders with at least one refund - full or
+partial - issued in the window. The scan it replaces counted fully
+refunded orders *created* in the window: an old order refunded today now
+counts, a recent order refunded long ago does not, and partial refunds
+count too. Both statuses are scanned so that refresh reconciles the rows
+``record_refund()`` adds for partial refunds this process issues.
+
+Usage:
+    index = RefundIndex("refunds.sqlite3")
+    index.refresh(get_response)          # Shopify GET returning httpx.Response
+    await index.arefresh(aget_response)  # same, with an async GET
+    index.count("jane@example.com", days=90)
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from shopify_pages import aiter_pages, iter_pages, orders_query
+
+_FIELDS = "id,email,created_at,updated_at,refunds"
+_REFUNDED_STATUSES = ("refunded", "partially_refunded")
+
+# Seconds the watermark stays behind the local scan start, covering drift
+# between this clock and Shopify's ``updated_at``.
+CLOCK_SKEW = 300.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS refunds (
+    order_id    TEXT NOT NULL,
+    refund_id   TEXT NOT NULL,
+    email       TEXT NOT NULL,
+    refunded_at REAL NOT NULL,
+    PRIMARY KEY (order_id, refund_id)
+);
+CREATE INDEX IF NOT EXISTS refunds_by_email ON refunds (email, refunded_at);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _shopify_time(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class RefundIndex:
+    """SQLite-backed map of customer email -> refund timestamps."""
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        retention_days: int = 365,
+        max_staleness: float = 60.0,
+        store: str = "",
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.retention_days = retention_days
+        self.max_staleness = max_staleness
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        if store and self._meta("store") not in (None, store):
+            self.reset()  # a different shop's data
+        if store:
+            self._set_meta("store", store)
+        self._db.commit()
+        self.last_refresh = 0.0
+
+    # -- meta ----------------------------------------------------------------
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def watermark(self) -> Optional[str]:
+        """Where the next refresh starts, or None before the first build."""
+        with self._lock:
+            return self._meta("watermark")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM refunds")
+            self._db.execute("DELETE FROM meta WHERE key != 'store'")
+            self._db.commit()
+
+    # -- writes --------------------------------------------------------------
+
+    def apply_orders(self, orders: Iterable[Dict[str, Any]]) -> int:
+        """Upsert the refunds of each order; returns how many orders were applied.
+
+        Leaves the watermark alone: ``refresh`` only advances it once a whole
+        scan has been applied, since pages are not in ``updated_at`` order.
+        """
+        applied = 0
+        with self._lock:
+            for order in orders:
+                order_id = str(order.get("id"))
+                email = (order.get("email") or "").strip().lower()
+                self._db.execute("DELETE FROM refunds WHERE order_id = ?", (order_id,))
+                if email:
+                    rows = []
+                    for refund in order.get("refunds") or [{}]:
+                        refunded_at = _parse_time(refund.get("created_at")) or _parse_time(
+                            order.get("updated_at") or order.get("created_at")
+                        )
+                        if refunded_at is not None:
+                            rows.append((order_id, str(refund.get("id", "")), email, refunded_at))
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO refunds VALUES (?, ?, ?, ?)", rows
+                    )
+                applied += 1
+            self._db.commit()
+        return applied
+
+    def record_refund(self, order_id: Any, email: str, refund: Dict[str, Any]) -> bool:
+        """Add a refund this process just created, without waiting for a refresh.
+
+        ``refresh`` is rate-limited by ``max_staleness``, so without this a
+        second refund inside that window would not see the first. Partial
+        refunds count as well; the next refresh re-applies the whole order
+        from either the refunded or the partially refunded scan. Returns
+        False when there is no email to file it under.
+        """
+        email = (email or "").strip().lower()
+        if not email:
+            return False
+        refunded_at = _parse_time(refund.get("created_at")) or self._clock()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO refunds VALUES (?, ?, ?, ?)",
+                (str(order_id), str(refund.get("id", "")), email, refunded_at),
+            )
+            self._db.commit()
+        return True
+
+    def _scan_paths(self, now: float, force: bool) -> List[str]:
+        """First page of each refresh scan, or none when it is not due yet."""
+        if not force and now - self.last_refresh < self.max_staleness:
+            return []
+        since = self.watermark or _shopify_time(now - self.retention_days * 86400)
+        return [
+            orders_query(financial_status=status, updated_at_min=since, fields=_FIELDS)
+            for status in _REFUNDED_STATUSES
+        ]
+
+    def _apply_page(self, resp: httpx.Response, newest: Optional[str]) -> Tuple[int, Optional[str]]:
+        orders = resp.json().get("orders", [])
+        for order in orders:
+            updated = order.get("updated_at")
+            if updated and (newest is None or _parse_time(updated) > _parse_time(newest)):
+                newest = updated
+        return self.apply_orders(orders), newest
+
+    def _finish_scan(self, now: float, newest: Optional[str]) -> None:
+        # saved only now: a scan that fails partway must not skip the
+        # older orders it never reached on the next refresh
+        if newest:
+            # an order on an early page can be updated while later pages are
+            # read; the next scan must overlap the start of this one
+            started = now - CLOCK_SKEW
+            if _parse_time(newest) > started:
+                newest = _shopify_time(started)
+            with self._lock:
+                self._set_meta("watermark", newest)
+                self._db.commit()
+        self.last_refresh = now
+
+    def refresh(self, get: Callable[[str], httpx.Response], force: bool = False) -> int:
+        """Pull (partially) refunded orders changed since the watermark (everything on first use).
+
+        Skipped when the last refresh is younger than ``max_staleness``
+        unless ``force``. Concurrent callers wait for the one in progress.
+        """
+        with self._refresh_lock:
+            now = self._clock()
+            paths = self._scan_paths(now, force)
+            if not paths:
+                return 0
+            applied, newest = 0, self.watermark
+            for path in paths:
+                for resp in iter_pages(get, path):
+                    count, newest = self._apply_page(resp, newest)
+                    applied += count
+            self._finish_scan(now, newest)
+            return applied
+
+    async def arefresh(self, get: Callable[[str], Awaitable[httpx.Response]], force: bool = False) -> int:
+        """``refresh`` with a coroutine ``get``; waits for a running refresh without blocking the loop."""
+        acquire = asyncio.ensure_future(asyncio.to_thread(self._refresh_lock.acquire))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # the worker thread still takes the lock: hand it straight back
+            acquire.add_done_callback(lambda f: f.cancelled() or f.exception() or self._refresh_lock.release())
+            raise
+        try:
+            now = self._clock()
+            paths = self._scan_paths(now, force)
+            if not paths:
+                return 0
+            applied, newest = 0, self.watermark
+            for path in paths:
+                async for resp in aiter_pages(get, path):
+                    count, newest = self._apply_page(resp, newest)
+                    applied += count
+            self._finish_scan(now, newest)
+            return applied
+        finally:
+            self._refresh_lock.release()
+
+    # -- reads ---------------------------------------------------------------
+
+    def count(self, email: str, days: int = 90, now: Optional[float] = None) -> int:
+        """Orders with a full or partial refund issued to ``email`` in the last ``days`` days.
+
+        Windowed by refund time, not order creation time.
+        """
+        since = (now if now is not None else self._clock()) - days * 86400
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(DISTINCT order_id) FROM refunds WHERE email = ? AND refunded_at >= ?",
+                ((email or "").strip().lower(), since),
+            ).fetchone()
+        return int(row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+__all__ = ["RefundIndex"]
@@ -0,0 +1,216 @@
+"""
+Client-side rate limiting and retries for the Shopify Admin REST API.
+
+Shopify meters REST calls with a leaky bucket per store (40 calls, draining
+at 2 per second on standard plans) and answers 429 once it is full. Every
+response reports the bucket's fill level::
+
+    X-Shopify-Shop-Api-Call-Limit: 32/40
+
+``ShopifyLimiter`` mirrors that bucket locally so callers queue instead of
+failing:
+
+- ``TokenBucket.reserve()`` hands out call slots in arrival order across all
+  threads and event loops; a caller that would overdraw the bucket gets the
+  delay until its slot and sleeps for it;
+- each response's call-limit header pulls the local bucket down to what
+  Shopify reports (other apps on the same store share the bucket);
+- 429 is retried after ``Retry-After``; 5xx and transport errors are
+  retried with exponential backoff and jitter (``PollPolicy``), for
+  idempotent requests only - a POST is retried only when Shopify refused
+  it (429) or the connection never opened.
+
+Usage:
+    limiter = ShopifyLimiter()
+    resp = limiter.send(lambda: client.get(url, headers=headers))
+    resp = await limiter.asend(lambda: async_client.get(url, headers=headers))
+"""
+
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from poll_policy import PollPolicy, parse_retry_after
+
+CALL_LIMIT_HEADER = "x-shopify-shop-api-call-limit"
+
+# 0.5s, 1s, 2s, 4s, 8s (+-20%) between retries of a failing call
+RETRY_POLICY = PollPolicy(initial=0.5, multiplier=2.0, max_interval=8.0, jitter=0.2)
+
+_RETRY_STATUSES = (500, 502, 503, 504)
+
+
+def parse_call_limit(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """``"32/40"`` -> ``(32, 40)``; None if absent or malformed."""
+    if not value:
+        return None
+    used, _, capacity = value.partition("/")
+    try:
+        return int(used), int(capacity)
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose balance may go negative to queue callers."""
+
+    def __init__(
+        self,
+        capacity: float = 40.0,
+        rate: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.rate = rate
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` now; returns how long to wait before using them."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def observe(self, used: int, capacity: int) -> None:
+        """Align with the server's reported fill level (never adds tokens)."""
+        with self._lock:
+            self._refill(self._clock())
+            self.capacity = float(capacity)
+            self._tokens = min(self._tokens, float(capacity - used))
+
+    def drain(self, seconds: float) -> None:
+        """The next call may go in ``seconds`` (a 429's ``Retry-After``), later ones after it."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self._tokens, 1.0 - seconds * self.rate)
+
+
+class ShopifyLimiter:
+    """Shared call budget and retry loop for every Shopify request in the process."""
+
+    def __init__(
+        self,
+        capacity: int = 40,
+        rate: float = 2.0,
+        max_attempts: int = 6,
+        retry_policy: PollPolicy = RETRY_POLICY,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bucket = TokenBucket(capacity, rate, clock)
+        self.max_attempts = max_attempts
+        self.retry_policy = retry_policy
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.waited = 0.0
+
+    def _count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _retryable_error(self, exc: Exception, idempotent: bool) -> bool:
+        if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+            return True  # the request never reached Shopify
+        return idempotent and isinstance(exc, httpx.TransportError)
+
+    def _after_response(self, resp: httpx.Response, idempotent: bool, schedule) -> Optional[float]:
+        """Record the response; returns a backoff delay to retry, or None to return it.
+
+        A 429 drains the bucket for ``Retry-After`` instead, so every queued
+        caller waits rather than just this one (delay 0.0).
+        """
+        self._count("requests")
+        limit = parse_call_limit(resp.headers.get(CALL_LIMIT_HEADER))
+        if limit:
+            self.bucket.observe(*limit)
+        retry_after = parse_retry_after(resp.headers.get("retry-after"))
+        if resp.status_code == 429:
+            self._count("throttled")
+            self.bucket.drain(retry_after if retry_after is not None else 1.0 / self.bucket.rate)
+            return 0.0
+        if idempotent and resp.status_code in _RETRY_STATUSES:
+            return schedule.next_delay("error", retry_after)
+        return None
+
+    def send(self, request: Callable[[], httpx.Response], idempotent: bool = True) -> httpx.Response:
+        """Run ``request`` within the call budget, retrying throttles and transient failures.
+
+        Returns the last response once retries are used up, so the caller's
+        ``raise_for_status()`` still reports the failure.
+        """
+        schedule = self.retry_policy.start()
+        for attempt in range(1, self.max_attempts + 1):
+            wait = self.bucket.reserve()
+            if wait:
+                self._count("waited", wait)
+                time.sleep(wait)
+            try:
+                resp = request()
+            except Exception as exc:
+                if attempt == self.max_attempts or not self._retryable_error(exc, idempotent):
+                    raise
+                self._count("retries")
+                time.sleep(schedule.next_delay("error"))
+                continue
+            delay = self._after_response(resp, idempotent, schedule)
+            if delay is None or attempt == self.max_attempts:
+                return resp
+            self._count("retries")
+            if delay:
+                time.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    async def asend(
+        self, request: Callable[[], Awaitable[httpx.Response]], idempotent: bool = True
+    ) -> httpx.Response:
+        """``send`` for coroutine requests; waits with ``asyncio.sleep``."""
+        schedule = self.retry_policy.start()
+        for attempt in range(1, self.max_attempts + 1):
+            wait = self.bucket.reserve()
+            if wait:
+                self._count("waited", wait)
+                await asyncio.sleep(wait)
+            try:
+                resp = await request()
+            except Exception as exc:
+                if attempt == self.max_attempts or not self._retryable_error(exc, idempotent):
+                    raise
+                self._count("retries")
+                await asyncio.sleep(schedule.next_delay("error"))
+                continue
+            delay = self._after_response(resp, idempotent, schedule)
+            if delay is None or attempt == self.max_attempts:
+                return resp
+            self._count("retries")
+            if delay:
+                await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "waited_s": round(self.waited, 3),
+            "tokens": round(self.bucket.tokens, 2),
+        }
+
+
+__all__ = ["CALL_LIMIT_HEADER", "RETRY_POLICY", "ShopifyLimiter", "TokenBucket", "parse_call_limit"]
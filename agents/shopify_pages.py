@@ -0,0 +1,118 @@
+"""
+Cursor pagination for the Shopify Admin REST API.
+
+List endpoints (``orders.json`` ...) return at most 250 records per page and
+point at the next page with a ``Link`` header::
+
+    Link: <https://shop.myshopify.com/admin/api/2024-01/orders.json?limit=250&page_info=abc>; rel="next"
+
+The cursor URL already carries the original filters, so it is followed as
+is. ``iter_pages`` yields one response per page, fetching the next only when
+the caller asks for it; ``iter_orders`` builds the filtered ``orders.json``
+query and yields orders one by one, so a caller that stops after ten matches
+never downloads page two. ``aiter_orders`` is the same for async clients.
+
+Usage:
+    for resp in iter_pages(get_response, "orders.json?status=any&limit=250"):
+        for order in resp.json()["orders"]:
+            ...
+
+    recent = itertools.islice(iter_orders(get_response, email="jane@example.com",
+                                          financial_status="paid"), 20)
+"""
+
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+from urllib.parse import urlencode, urlsplit
+
+import httpx
+
+_LINK_NEXT = re.compile(r'<([^>]+)>\s*;\s*rel="?next"?')
+_API_PREFIX = re.compile(r"^/admin/api/[^/]+/")
+
+PAGE_LIMIT = 250
+
+
+def next_page_path(link_header: Optional[str]) -> Optional[str]:
+    """API-relative path of the ``rel="next"`` page, or None on the last page."""
+    if not link_header:
+        return None
+    match = _LINK_NEXT.search(link_header)
+    if not match:
+        return None
+    url = urlsplit(match.group(1))
+    path = _API_PREFIX.sub("", url.path)
+    return f"{path}?{url.query}" if url.query else path
+
+
+def iter_pages(get: Callable[[str], httpx.Response], path: str) -> Iterator[httpx.Response]:
+    """Yield each page of ``path``; ``get`` takes an API-relative path."""
+    next_path: Optional[str] = path
+    while next_path:
+        resp = get(next_path)
+        resp.raise_for_status()
+        yield resp
+        next_path = next_page_path(resp.headers.get("link"))
+
+
+async def aiter_pages(
+    get: Callable[[str], Awaitable[httpx.Response]], path: str
+) -> AsyncIterator[httpx.Response]:
+    """``iter_pages`` for a coroutine ``get``."""
+    next_path: Optional[str] = path
+    while next_path:
+        resp = await get(next_path)
+        resp.raise_for_status()
+        yield resp
+        next_path = next_page_path(resp.headers.get("link"))
+
+
+def orders_query(
+    email: str = "",
+    status: str = "any",
+    financial_status: str = "",
+    fulfillment_status: str = "",
+    created_at_min: str = "",
+    created_at_max: str = "",
+    updated_at_min: str = "",
+    fields: str = "",
+    page_size: int = PAGE_LIMIT,
+) -> str:
+    """``orders.json`` path with every non-empty filter applied server-side."""
+    params: Dict[str, Any] = {
+        "status": status,
+        "email": email,
+        "financial_status": financial_status,
+        "fulfillment_status": fulfillment_status,
+        "created_at_min": created_at_min,
+        "created_at_max": created_at_max,
+        "updated_at_min": updated_at_min,
+        "fields": fields,
+        "limit": max(1, min(page_size, PAGE_LIMIT)),
+    }
+    return "orders.json?" + urlencode({k: v for k, v in params.items() if v})
+
+
+def iter_orders(get: Callable[[str], httpx.Response], **filters: Any) -> Iterator[Dict[str, Any]]:
+    """Yield orders matching ``filters`` (see ``orders_query``), page by page on demand."""
+    for resp in iter_pages(get, orders_query(**filters)):
+        yield from resp.json().get("orders", [])
+
+
+async def aiter_orders(
+    get: Callable[[str], Awaitable[httpx.Response]], **filters: Any
+) -> AsyncIterator[Dict[str, Any]]:
+    async for resp in aiter_pages(get, orders_query(**filters)):
+        for order in resp.json().get("orders", []):
+            yield order
+
+
+__all__ = [
+    "PAGE_LIMIT",
+    "aiter_orders",
+    "aiter_pages",
+    "iter_orders",
+    "iter_pages",
+    "next_page_path",
+    "orders_query",
+]
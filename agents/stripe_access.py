@@ -0,0 +1,73 @@
+"""
+Prefix-dispatched Stripe object retrieval for the money-moving demo tools.
+
+Stripe ids carry their type in the prefix (``pi_``, ``cus_``, ``acct_`` ...),
+so ``resource_for()`` dispatches with one dict lookup instead of an
+if-chain. Nothing is cached: the tools use these reads as policy evidence,
+which must reflect Stripe at the moment of the governed call.
+
+``retrieve_many()`` fetches several objects at once on a small thread
+pool, for a governed call whose approved params already name every id it
+reads. It never widens what a call reads, only how long the reads take.
+
+HTTP goes through the Stripe SDK's default client; call
+``http_transport.use_for_stripe()`` once so every thread shares one
+keep-alive pool.
+
+Usage:
+    pi = retrieve("pi_123")
+    objs = retrieve_many(["pi_123", "acct_456"])  # {"pi_123": ..., "acct_456": ...}
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable
+
+import stripe
+
+# id prefix -> stripe resource class name
+RESOURCES: Dict[str, str] = {
+    "acct": "Account",
+    "ch": "Charge",
+    "cus": "Customer",
+    "evt": "Event",
+    "in": "Invoice",
+    "pi": "PaymentIntent",
+    "po": "Payout",
+    "py": "Charge",
+    "re": "Refund",
+    "tr": "Transfer",
+}
+
+
+def resource_for(object_id: str):
+    """Stripe resource class for ``object_id``'s prefix; ValueError if unknown."""
+    prefix, sep, _ = (object_id or "").partition("_")
+    name = RESOURCES.get(prefix) if sep else None
+    if name is None:
+        raise ValueError(f"Unsupported Stripe object id prefix: {object_id}")
+    return getattr(stripe, name)
+
+
+_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="stripe-retrieve")
+
+
+def retrieve(object_id: str) -> Any:
+    """The Stripe object for ``object_id``, fetched from Stripe."""
+    return resource_for(object_id).retrieve(object_id)
+
+
+def retrieve_many(object_ids: Iterable[str]) -> Dict[str, Any]:
+    """Fetch every distinct id at the same time; re-raises the first failure.
+
+    Every prefix is checked before any request goes out, so an unsupported
+    id costs no Stripe calls.
+    """
+    ids = list(dict.fromkeys(object_ids))
+    classes = {oid: resource_for(oid) for oid in ids}
+    if len(ids) == 1:
+        return {ids[0]: classes[ids[0]].retrieve(ids[0])}
+    futures = {oid: _POOL.submit(cls.retrieve, oid) for oid, cls in classes.items()}
+    return {oid: fut.result() for oid, fut in futures.items()}
+
+
+__all__ = ["RESOURCES", "resource_for", "retrieve", "retrieve_many"]
@@ -0,0 +1,72 @@
+"""
+Lazy, projected, size-bounded Stripe list output for agent tools.
+
+``stripe.X.list(limit=n)`` returns one page of full objects (an Event can
+carry kilobytes of nested ``data``), and dumping them costs memory and LLM
+tokens proportional to the account's history. Instead:
+
+- ``iter_projected()`` walks ``auto_paging_iter()`` one page at a time
+  (page size ``min(limit, 100)``), stops after ``limit`` objects, and keeps
+  only the requested fields - dotted paths like ``data.object.id`` - so
+  each full object is dropped as soon as it is projected;
+- ``bounded_lines()`` renders rows until a byte budget is spent and stops
+  pulling (no further pages are fetched once the output is full).
+
+Usage:
+    rows = iter_projected(stripe.Event.list, ("id", "type", "created"), limit=500)
+    lines, more = bounded_lines(rows, lambda r: f"- {r['type']} id={r['id']}", max_bytes=4000)
+"""
+
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+MAX_PAGE = 100  # Stripe's largest page
+DEFAULT_BUDGET = 4000  # bytes of tool output
+
+
+def project(obj: Any, fields: Sequence[str]) -> Dict[str, Any]:
+    """``{path: value}`` for each dotted path in ``fields`` (None where absent)."""
+    out: Dict[str, Any] = {}
+    for path in fields:
+        value = obj
+        for part in path.split("."):
+            value = value.get(part) if hasattr(value, "get") else None
+            if value is None:
+                break
+        out[path] = value
+    return out
+
+
+def iter_projected(
+    list_method: Callable[..., Any],
+    fields: Sequence[str],
+    limit: int,
+    **params: Any,
+) -> Iterator[Dict[str, Any]]:
+    """Up to ``limit`` objects from ``list_method`` (e.g. ``stripe.Transfer.list``), projected."""
+    if limit <= 0:
+        return
+    page = list_method(limit=min(limit, MAX_PAGE), **params)
+    for obj in islice(page.auto_paging_iter(), limit):
+        yield project(obj, fields)
+
+
+def bounded_lines(
+    rows: Iterable[Dict[str, Any]],
+    render: Callable[[Dict[str, Any]], str],
+    max_bytes: int = DEFAULT_BUDGET,
+) -> Tuple[List[str], bool]:
+    """Rendered rows until ``max_bytes`` of UTF-8; True if rows remained unrendered."""
+    lines: List[str] = []
+    used = 0
+    for row in rows:
+        line = render(row)
+        size = len(line.encode("utf-8")) + 1
+        if used + size > max_bytes:
+            return lines, True
+        lines.append(line)
+        used += size
+    return lines, False
+
+
+__all__ = ["DEFAULT_BUDGET", "MAX_PAGE", "bounded_lines", "iter_projected", "project"]
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Test the event-driven action waiter against the loopback stand-in server.
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+
+import action_waiter
+from action_waiter import ActionWaiter, shared_waiter, wait_for_decision
+from mock_server import MockFarameshServer
+from poll_policy import PollPolicy
+
+
+def _server(**flags) -> MockFarameshServer:
+    """Fresh stand-in server; forgets any mode cached for a reused port."""
+    server = MockFarameshServer()
+    for name, value in flags.items():
+        setattr(server, name, value)
+    action_waiter._SERVER_MODE.pop(server.base_url, None)
+    return server
+
+
+def _approve_later(server: MockFarameshServer, action_id: str, status: str, delay: float):
+    timer = threading.Timer(delay, server.set_status, args=(action_id, status))
+    timer.start()
+    return timer
+
+
+def test_allowed_returns_without_sleeping():
+    """An instantly allowed action must not pay a polling interval."""
+    with _server() as server:
+        action = server.add_action(status="allowed")
+        start = time.perf_counter()
+        result = wait_for_decision(action["id"], timeout=5, base_url=server.base_url)
+        elapsed = time.perf_counter() - start
+
+    assert result["status"] == "allowed"
+    assert elapsed < 0.5, f"took {elapsed:.3f}s"
+
+
+def test_stream_delivers_approval_as_it_happens():
+    pending_calls = []
+    with _server() as server:
+        action = server.add_action(status="pending_approval")
+        _approve_later(server, action["id"], "approved", 0.3)
+        start = time.perf_counter()
+        result = wait_for_decision(
+            action["id"], timeout=5, base_url=server.base_url, on_pending=pending_calls.append
+        )
+        elapsed = time.perf_counter() - start
+
+    assert result["status"] == "approved"
+    assert len(pending_calls) == 1
+    assert 0.25 < elapsed < 1.0, f"took {elapsed:.3f}s"
+
+
+def test_falls_back_to_long_poll_without_stream():
+    with _server(stream=False) as server:
+        action = server.add_action(status="pending_approval")
+        _approve_later(server, action["id"], "denied", 0.3)
+        result = wait_for_decision(action["id"], timeout=5, base_url=server.base_url)
+        mode = action_waiter._SERVER_MODE[server.base_url]
+
+    assert result["status"] == "denied"
+    assert mode == "long_poll"
+
+
+def test_degrades_to_poll_when_wait_is_ignored():
+    fetched = []
+    with _server(stream=False, long_poll=False) as server:
+        action = server.add_action(status="pending_approval")
+        _approve_later(server, action["id"], "approved", 0.3)
+
+        def fetch(action_id):
+            fetched.append(action_id)
+            return server.get_action(action_id)
+
+        result = wait_for_decision(action["id"], timeout=5, base_url=server.base_url, fetch=fetch)
+
+    assert result["status"] == "approved"
+    assert fetched, "plain polling should reuse the SDK-style fetch callable"
+
+
+def test_stream_reconnects_are_paced():
+    """A stream that keeps closing without a decision must not become a tight loop."""
+    connects = []
+
+    def handler(request):
+        connects.append(time.monotonic())
+        body = b'data: {"id": "a1", "status": "pending_approval"}\n\n'
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body)
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    original = action_waiter.shared_client
+    action_waiter.shared_client = lambda: client
+    try:
+        stats = {}
+        result = wait_for_decision("a1", timeout=0.5, base_url="http://closing-stream.test", stats=stats)
+    finally:
+        action_waiter.shared_client = original
+        action_waiter._SERVER_MODE.pop("http://closing-stream.test", None)
+
+    assert result is None
+    assert 2 <= len(connects) <= 12, f"{len(connects)} reconnects in 0.5s"
+
+
+def test_one_early_long_poll_answer_keeps_long_poll():
+    """A status change answered early is legitimate; it must not downgrade the server."""
+    with _server(stream=False) as server:
+        action = server.add_action(status="pending")
+        _approve_later(server, action["id"], "pending_approval", 0.1)
+        _approve_later(server, action["id"], "approved", 0.6)
+        stats = {}
+        result = wait_for_decision(action["id"], timeout=5, base_url=server.base_url, stats=stats)
+        mode = action_waiter._SERVER_MODE[server.base_url]
+
+    assert result["status"] == "approved"
+    assert mode == "long_poll"
+    assert stats["polls"] <= 4, stats
+
+
+def test_timeout_returns_none():
+    with _server() as server:
+        action = server.add_action(status="pending_approval")
+        result = wait_for_decision(action["id"], timeout=0.5, base_url=server.base_url)
+
+    assert result is None
+
+
+def test_multiplexed_waiter_batches_many_actions():
+    """Hundreds of pending actions cost one batched request per tick."""
+    with _server() as server:
+        ids = [server.add_action(status="pending_approval")["id"] for _ in range(300)]
+        for i, aid in enumerate(ids):
+            _approve_later(server, aid, "denied" if i % 3 == 0 else "approved", 0.2)
+
+        async def run():
+            async with ActionWaiter(base_url=server.base_url, policy=PollPolicy(per_status={"pending_approval": (0.05, 0.05)}), batch_size=100) as waiter:
+                results = await waiter.wait_many(ids, timeout=5)
+                return results, waiter.requests_sent, waiter.batch_supported
+
+        results, sent, batch_supported = asyncio.run(run())
+
+    assert batch_supported is True
+    assert all(r is not None for r in results.values())
+    assert results[ids[0]]["status"] == "denied"
+    assert results[ids[1]]["status"] == "approved"
+    # ~0.2s of pending at 0.05s ticks, 3 batches per tick - nowhere near 300 per tick
+    assert sent < 60, f"{sent} requests"
+
+
+def test_multiplexed_waiter_falls_back_without_batch_endpoint():
+    with _server(batch=False) as server:
+        ids = [server.add_action(status="allowed")["id"] for _ in range(5)]
+
+        async def run():
+            async with ActionWaiter(base_url=server.base_url) as waiter:
+                return await waiter.wait_many(ids, timeout=5), waiter.batch_supported
+
+        results, batch_supported = asyncio.run(run())
+
+    assert batch_supported is False
+    assert {r["status"] for r in results.values()} == {"allowed"}
+
+
+def test_shared_action_survives_one_callers_timeout():
+    with _server() as server:
+        action = server.add_action(status="pending_approval")
+        _approve_later(server, action["id"], "approved", 0.3)
+
+        async def run():
+            async with ActionWaiter(base_url=server.base_url) as waiter:
+                impatient = asyncio.ensure_future(waiter.wait(action["id"], timeout=0.1))
+                patient = asyncio.ensure_future(waiter.wait(action["id"], timeout=5))
+                return await impatient, await patient, await waiter.wait_many([])
+
+        impatient, patient, empty = asyncio.run(run())
+
+    assert impatient is None
+    assert patient["status"] == "approved"
+    assert empty == {}
+
+
+def test_cancelled_wait_stops_tracking():
+    with _server() as server:
+        action = server.add_action(status="pending_approval")
+
+        async def run():
+            async with ActionWaiter(base_url=server.base_url) as waiter:
+                task = asyncio.ensure_future(waiter.wait(action["id"], timeout=5))
+                await asyncio.sleep(0.05)
+                assert action["id"] in waiter._futures
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                return dict(waiter._futures), dict(waiter._waiters)
+
+        futures, waiters = asyncio.run(run())
+
+    assert action["id"] not in futures
+    assert action["id"] not in waiters
+
+
+def test_batching_survives_unknown_ids():
+    with _server() as server:
+        ids = [server.add_action(status="allowed")["id"] for _ in range(3)]
+
+        async def run():
+            async with ActionWaiter(base_url=server.base_url) as waiter:
+                results = await waiter.wait_many(ids + ["deleted-action"], timeout=0.3)
+                return results, waiter.batch_supported
+
+        results, batch_supported = asyncio.run(run())
+
+    assert batch_supported is True
+    assert results["deleted-action"] is None
+    assert all(results[aid]["status"] == "allowed" for aid in ids)
+
+
+def test_poller_survives_malformed_responses():
+    server = MockFarameshServer()
+    action = server.add_action(status="allowed")
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(200, content=b"<html>bad gateway</html>")
+        status, body = server.handle(request.method, request.url.raw_path.decode("ascii"))
+        return httpx.Response(status, json=body)
+
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with ActionWaiter(base_url="http://mock", client=client) as waiter:
+            result = await waiter.wait(action["id"], timeout=5)
+        await client.aclose()
+        return result
+
+    assert asyncio.run(run())["status"] == "allowed"
+    assert len(calls) >= 2
+
+
+def test_dead_poller_fails_pending_waits():
+    with _server() as server:
+        action = server.add_action(status="pending_approval")
+
+        async def run():
+            async with ActionWaiter(base_url=server.base_url) as waiter:
+                def broken(action_id, action_data):
+                    raise RuntimeError("poller bug")
+
+                waiter._after_poll = broken
+                try:
+                    await waiter.wait(action["id"])  # no timeout: must not hang
+                except RuntimeError as e:
+                    return str(e), waiter.pending
+            return None, None
+
+        error, pending = asyncio.run(asyncio.wait_for(run(), 5))
+
+    assert error == "poller bug" and pending == 0
+
+
+def test_shared_waiter_serves_threads():
+    with _server() as server:
+        ids = [server.add_action(status="pending_approval")["id"] for _ in range(20)]
+        for aid in ids:
+            _approve_later(server, aid, "approved", 0.2)
+        waiter = shared_waiter(base_url=server.base_url)
+        results = {}
+
+        def worker(aid):
+            results[aid] = waiter.wait_sync(aid, timeout=5)
+
+        threads = [threading.Thread(target=worker, args=(aid,)) for aid in ids]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert all(results[aid]["status"] == "approved" for aid in ids)
+
+
+def test_shared_waiter_is_per_token():
+    a = shared_waiter(base_url="http://waiter.example:1", token="token-a")
+    assert shared_waiter(base_url="http://waiter.example:1/", token="token-a") is a
+    b = shared_waiter(base_url="http://waiter.example:1", token="token-b")
+    assert b is not a and (a.token, b.token) == ("token-a", "token-b")
+
+
+def test_poll_policy_backs_off_per_status():
+    schedule = PollPolicy(initial=0.005, max_interval=1.0, jitter=0).start()
+    fast = [schedule.next_delay("pending") for _ in range(4)]
+    assert fast == [0.005, 0.01, 0.02, 0.04]
+    # A new status restarts from that status's own initial interval
+    assert schedule.next_delay("pending_approval") == 0.05
+    slow = [schedule.next_delay("pending_approval") for _ in range(10)]
+    assert slow[-1] == 5.0
+    assert schedule.next_delay("pending_approval", retry_after=2.5) == 2.5
+
+
+def test_poll_stats_reported():
+    with _server(stream=False, long_poll=False) as server:
+        action = server.add_action(status="pending")
+        _approve_later(server, action["id"], "allowed", 0.3)
+        stats = {}
+        result = wait_for_decision(action["id"], timeout=5, base_url=server.base_url, stats=stats)
+
+    assert result["status"] == "allowed"
+    assert stats["mode"] == "poll"
+    # 5ms, 10ms, 20ms, ... probes: a handful of polls, not one per second
+    assert 2 <= stats["polls"] <= 12, stats
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  FARAMESH ACTION WAITER TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_allowed_returns_without_sleeping,
+        test_stream_delivers_approval_as_it_happens,
+        test_falls_back_to_long_poll_without_stream,
+        test_degrades_to_poll_when_wait_is_ignored,
+        test_stream_reconnects_are_paced,
+        test_one_early_long_poll_answer_keeps_long_poll,
+        test_timeout_returns_none,
+        test_multiplexed_waiter_batches_many_actions,
+        test_multiplexed_waiter_falls_back_without_batch_endpoint,
+        test_shared_action_survives_one_callers_timeout,
+        test_batching_survives_unknown_ids,
+        test_poller_survives_malformed_responses,
+        test_dead_poller_fails_pending_waits,
+        test_cancelled_wait_stops_tracking,
+        test_shared_waiter_serves_threads,
+        test_shared_waiter_is_per_token,
+        test_poll_policy_backs_off_per_status,
+        test_poll_stats_reported,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test the indexed, change-detecting Stripe allowlist store.
+"""
+import json
+import os
+import tempfile
+import threading
+
+from allowlist_store import AllowlistStore
+
+
+def _write(path, destinations):
+    with open(path, "w") as f:
+        json.dump({"destinations": destinations}, f)
+
+
+def test_lookups_by_account_label_and_email():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "allow.json")
+        _write(path, [
+            {"account_id": "acct_1", "label": "vendor-bob", "approved": True},
+            {"account_id": "acct_2", "label": "acct_2", "email": "jane@example.com", "approved": True},
+            {"account_id": "acct_3", "label": "pending-pat", "email": "pat@example.com", "approved": False},
+        ])
+        allow = AllowlistStore(path).current()
+        assert allow.account_for("Vendor-Bob") == "acct_1"
+        assert allow.account_for("JANE@example.com") == "acct_2"
+        assert allow.account_for("pending-pat") is None  # names resolve for approved entries only
+        assert allow.is_allowlisted("acct_1") and not allow.is_allowlisted("acct_3")
+        assert allow.label("acct_1") == "vendor-bob" and allow.label("acct_9") == "acct_9"
+        assert allow.entry("acct_3")["email"] == "pat@example.com"
+
+
+def test_reloads_only_when_file_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "allow.json")
+        _write(path, [{"account_id": "acct_1", "label": "bob", "approved": True}])
+        store = AllowlistStore(path)
+        first = store.current()
+        for _ in range(100):
+            assert store.current() is first
+        assert store.loads == 1
+
+        # another process rewrites the file (new inode)
+        tmp_path = path + ".new"
+        _write(tmp_path, [{"account_id": "acct_2", "label": "bob", "approved": True}])
+        os.replace(tmp_path, path)
+        assert store.current().account_for("bob") == "acct_2"
+        assert store.loads == 2
+
+
+def test_concurrent_writers_keep_every_entry():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "allow.json")
+        stores = [AllowlistStore(path) for _ in range(4)]  # separate caches, one file
+        stores[0].ensure_file()
+
+        def add(store, i):
+            store.update(lambda data: data["destinations"].append(
+                {"account_id": f"acct_{i}", "label": f"v{i}", "approved": True}
+            ))
+
+        threads = [threading.Thread(target=add, args=(stores[i % 4], i)) for i in range(40)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        allow = AllowlistStore(path).current()
+        assert len(allow) == 40
+        assert all(allow.account_for(f"v{i}") == f"acct_{i}" for i in range(40))
+        assert [f for f in os.listdir(tmp) if f.endswith(".tmp")] == []
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  ALLOWLIST STORE TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_lookups_by_account_label_and_email,
+        test_reloads_only_when_file_changes,
+        test_concurrent_writers_keep_every_entry,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
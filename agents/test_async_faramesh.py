@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test the asyncio Faramesh client against the mock server.
+"""
+import asyncio
+import threading
+import time
+
+from async_faramesh import AsyncFarameshClient, shared_async_faramesh
+from http_transport import aclose_async_client
+from mock_server import MockFarameshServer
+from poll_policy import PollPolicy
+
+
+def _submit(faramesh, i=0, status=None):
+    params = {"order_id": str(i)}
+    if status:
+        # the mock takes the decision from the payload when one is given
+        return faramesh.submit_action("refundbot", "shopify", "get_order", params, {"status": status})
+    return faramesh.submit_action("refundbot", "shopify", "get_order", params)
+
+
+def test_decided_submit_needs_no_wait_request():
+    with MockFarameshServer() as server:
+
+        async def run():
+            async with AsyncFarameshClient(base_url=server.base_url, token="t") as faramesh:
+                action = await _submit(faramesh)
+                stats = {}
+                result = await faramesh.wait_for_decision(action, stats=stats)
+                await aclose_async_client()
+                return action, result, stats
+
+        action, result, stats = asyncio.run(run())
+        requests = server.requests
+
+    assert action["status"] == "allowed" and action["params"] == {"order_id": "0"}
+    assert result is action and stats["polls"] == 0
+    assert requests == 1
+
+
+def test_pending_action_waits_for_approval():
+    with MockFarameshServer() as server:
+        pending = []
+
+        async def run():
+            policy = PollPolicy(per_status={"pending_approval": (0.02, 0.05)})
+            async with AsyncFarameshClient(base_url=server.base_url, policy=policy) as faramesh:
+                action = server.add_action(status="pending_approval")
+                threading.Timer(0.1, server.set_status, args=(action["id"], "approved")).start()
+                result = await faramesh.wait_for_decision(action, timeout=5, on_pending=pending.append)
+                await aclose_async_client()
+                return result
+
+        result = asyncio.run(run())
+
+    assert result["status"] == "approved"
+    assert len(pending) == 1
+
+
+def test_on_pending_fires_when_action_becomes_pending_later():
+    with MockFarameshServer() as server:
+        pending = []
+
+        async def run():
+            policy = PollPolicy(initial=0.01, max_interval=0.02, per_status={"pending_approval": (0.02, 0.05)})
+            async with AsyncFarameshClient(base_url=server.base_url, policy=policy) as faramesh:
+                action = server.add_action(status="pending")
+                threading.Timer(0.05, server.set_status, args=(action["id"], "pending_approval")).start()
+                threading.Timer(0.2, server.set_status, args=(action["id"], "approved")).start()
+                result = await faramesh.wait_for_decision(action, timeout=5, on_pending=pending.append)
+                await aclose_async_client()
+                return result
+
+        result = asyncio.run(run())
+
+    assert result["status"] == "approved"
+    assert [p["status"] for p in pending] == ["pending_approval"]
+
+
+def test_concurrent_conversations_share_one_loop():
+    """Fifty governed calls with 50ms decisions overlap instead of queueing."""
+    with MockFarameshServer(decision_latency=0.05) as server:
+
+        async def run():
+            faramesh = shared_async_faramesh(server.base_url)
+            assert shared_async_faramesh(server.base_url) is faramesh
+            start = time.perf_counter()
+            actions = await asyncio.gather(*(_submit(faramesh, i) for i in range(50)))
+            elapsed = time.perf_counter() - start
+            await faramesh.close()
+            await aclose_async_client()
+            return actions, elapsed
+
+        actions, elapsed = asyncio.run(run())
+
+    assert {a["params"]["order_id"] for a in actions} == {str(i) for i in range(50)}
+    assert elapsed < 1.0, f"{elapsed:.2f}s"
+
+
+def test_shared_client_is_per_token():
+    async def run():
+        a = shared_async_faramesh("http://faramesh.example:1", token="token-a")
+        assert shared_async_faramesh("http://faramesh.example:1/", token="token-a") is a
+        b = shared_async_faramesh("http://faramesh.example:1", token="token-b")
+        try:
+            shared_async_faramesh("http://faramesh.example:1", token="token-a", policy=PollPolicy())
+        except ValueError:
+            rejected = True
+        else:
+            rejected = False
+        return a, b, rejected
+
+    a, b, rejected = asyncio.run(run())
+
+    assert b is not a
+    assert (a.token, b.token) == ("token-a", "token-b")
+    assert rejected
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  ASYNC FARAMESH CLIENT TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_decided_submit_needs_no_wait_request,
+        test_pending_action_waits_for_approval,
+        test_on_pending_fires_when_action_becomes_pending_later,
+        test_concurrent_conversations_share_one_loop,
+        test_shared_client_is_per_token,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test batch request hashing: same digests as one-at-a-time, in input order.
+"""
+import itertools
+import json
+from collections import OrderedDict
+
+from canonical_bench import corpus
+from canonical_batch import compute_request_hashes, iter_request_hashes
+from canonical_json import compute_request_hash
+from test_canonical_json import EDGE_CASES
+
+
+def test_matches_single_hashes_in_order():
+    payloads = EDGE_CASES + [p for _, p in corpus(quick=True)] + [{"i": i, "x": i / 3} for i in range(300)]
+    expected = [compute_request_hash(p) for p in payloads]
+    assert compute_request_hashes(payloads, workers=1) == expected
+    # small chunks so several are in flight and reassembled out of completion order
+    assert compute_request_hashes(payloads, workers=2, chunk_size=7) == expected
+    assert compute_request_hashes([], workers=2) == []
+
+
+def test_encoded_rows_and_fallbacks():
+    rows = [{"id": i, "amount": 1.0 * i, "params": {"note": "héllo"}} for i in range(50)]
+    expected = [compute_request_hash(r) for r in rows]
+    text = [json.dumps(r) for r in rows]
+    assert compute_request_hashes(text, workers=2, chunk_size=8, encoded=True) == expected
+    assert compute_request_hashes([t.encode() for t in text], workers=1, encoded=True) == expected
+    # dict subclasses are not marshallable: hashed in the parent instead
+    ordered = [OrderedDict(r) for r in rows]
+    assert compute_request_hashes(ordered, workers=2, chunk_size=8) == expected
+
+
+def test_streams_unbounded_input():
+    endless = ({"seq": i} for i in itertools.count())
+    first = list(itertools.islice(iter_request_hashes(endless, workers=2, chunk_size=16), 100))
+    assert first == [compute_request_hash({"seq": i}) for i in range(100)]
+
+
+def test_errors_propagate():
+    for bad, exc in (({"x": float("nan")}, ValueError), ({"x": object()}, TypeError)):
+        try:
+            compute_request_hashes([{"ok": 1}, bad], workers=2)
+            assert False, f"{bad!r} should raise"
+        except exc:
+            pass
+    # an unmarshallable chunk that fails still lets earlier chunks' hashes out first
+    good = [{"i": i} for i in range(16)]
+    hashes = iter_request_hashes(good + [OrderedDict(x=float("inf"))], workers=2, chunk_size=8)
+    got = []
+    try:
+        for h in hashes:
+            got.append(h)
+        assert False, "inf should raise"
+    except ValueError:
+        pass
+    assert got == [compute_request_hash(p) for p in good]
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  BATCH REQUEST HASH TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_matches_single_hashes_in_order,
+        test_encoded_rows_and_fallbacks,
+        test_streams_unbounded_input,
+        test_errors_propagate,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test the reference canonical form and the request-hash benchmark helpers.
+"""
+import json
+
+import pytest
+
+from canonical_bench import corpus, deep_chain, depth_series, measure, run_cases, size_series
+from canonical_json import canonical_bytes, compute_request_hash, resolve_request_hash
+
+
+def test_reference_canonical_form():
+    assert canonical_bytes({"b": 1.0, "a": [2.50, -0.0], "c": "héllo"}) == (
+        '{"a":[2.5,0],"b":1,"c":"héllo"}'.encode("utf-8")
+    )
+    hashes = {compute_request_hash({"tool": "payment", "params": {"amount": v}}) for v in (1, 1.0, 1.00)}
+    assert len(hashes) == 1
+    try:
+        canonical_bytes({"amount": float("nan")})
+        assert False, "NaN must be rejected"
+    except ValueError:
+        pass
+
+
+def test_matches_faramesh_when_available():
+    fn, source = resolve_request_hash()
+    if source != "faramesh":
+        pytest.skip("faramesh.server.canonicalization not importable here")
+    for name, payload in corpus(quick=True):
+        assert fn(payload) == compute_request_hash(payload), name
+
+
+def test_corpus_is_deterministic_and_curves_grow():
+    first = [json.dumps(p, sort_keys=True) for _, p in corpus(quick=True)]
+    assert first == [json.dumps(p, sort_keys=True) for _, p in corpus(quick=True)]
+    sizes = [len(canonical_bytes(p)) for _, p in size_series(quick=True)]
+    assert sizes == sorted(sizes) and sizes[-1] > 100 * sizes[0]
+    depths = [x for x, _ in depth_series(quick=True)]
+    assert depths == sorted(depths)
+
+
+def test_measure_reports_cost_and_errors():
+    row = measure(compute_request_hash, corpus(quick=True)[0][1], repeat=1, min_time=0.001)
+    assert row["ns_per_op"] > 0 and row["alloc_bytes"] > 0 and row["bytes"] > 0
+    assert row["ns_per_byte"] == round(row["ns_per_op"] / row["bytes"], 3)
+
+    rows = run_cases(compute_request_hash, "depth", [(5000, deep_chain(5000))], repeat=1)
+    assert rows[0]["error"] == "RecursionError" and rows[0]["ns_per_op"] is None
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  CANONICALIZATION BENCHMARK TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_reference_canonical_form,
+        test_matches_faramesh_when_available,
+        test_corpus_is_deterministic_and_curves_grow,
+        test_measure_reports_cost_and_errors,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except pytest.skip.Exception as e:
+            print(f"⏭  {t.__name__}: {e}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Differential fuzzing: every canonicalizer matches the reference on equivalent payloads.
+"""
+import hashlib
+import json
+
+import pytest
+
+pytest.importorskip("hypothesis")
+
+from hypothesis import given, settings
+
+from canonical_fuzz import (
+    HashTimer,
+    check_equivalence,
+    check_normal_forms,
+    fuzz_target,
+    implementations,
+    normal_forms,
+    scan_pathological,
+)
+from canonical_json import compute_request_hash
+
+
+def test_equivalent_payloads_hash_identically():
+    timer = HashTimer()
+    fuzz_target(examples=200, timer=timer, steer=False)()
+    assert {r["impl"] for r in timer.rows} >= {"reference", "stream"}
+    assert not [r for r in timer.rows if r["error"]]
+
+
+@settings(max_examples=100, deadline=None)
+@given(normal_forms())
+def test_normal_forms_stay_distinct_and_agree(text):
+    check_normal_forms(text)
+
+
+def test_float_spellings_from_stored_json():
+    spellings = ["1", "1.0", "1.00", "1e0", "10e-1", "100E-2", "1.000000000000000000001"]
+    hashes = {compute_request_hash(json.loads('{"params":{"amount":%s}}' % s)) for s in spellings}
+    assert len(hashes) == 1
+    check_equivalence({"a": [0, {}], "b": ()}, json.loads('{"b":[],"a":[-0.0,{}]}'))
+
+
+def test_catches_a_broken_candidate():
+    def no_float_normalization(payload):
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    caught = ""
+    try:
+        fuzz_target(examples=200, impls=implementations(no_float_normalization), steer=False)()
+    except AssertionError as e:
+        caught = str(e)
+    assert "candidate disagrees with the reference" in caught, caught or "not caught"
+
+
+def test_pathological_inputs_are_flagged():
+    timer = scan_pathological(timer=HashTimer(budget_ns=10**12))
+    errors = {(r["case"], r["impl"]): r["error"] for r in timer.flagged()}
+    assert errors[("deep_dict_5000", "reference")] == "RecursionError"
+    assert ("deep_dict_5000", "stream") not in errors  # no recursion limit there
+    assert errors[("int_past_str_limit", "reference")] == "ValueError"
+    assert all(r["ns"] > 0 for r in timer.rows)
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  CANONICALIZATION DIFFERENTIAL FUZZ TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_equivalent_payloads_hash_identically,
+        test_normal_forms_stay_distinct_and_agree,
+        test_float_spellings_from_stored_json,
+        test_catches_a_broken_candidate,
+        test_pathological_inputs_are_flagged,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test that the streaming canonical encoder hashes exactly like the reference.
+
+Equality with the in-repo reference (``compute_request_hash``) does not
+prove equality with the hash the Faramesh server computes: the reference
+is this repo's reading of the server's canonical form. Only
+``test_matches_faramesh_when_available`` checks the server's own function,
+and it is skipped when ``faramesh.server.canonicalization`` is not
+importable.
+"""
+import hashlib
+
+import pytest
+
+from canonical_bench import corpus, deep_chain, peak_alloc, tool_output
+from canonical_json import (
+    canonical_bytes,
+    compute_request_hash,
+    resolve_request_hash,
+    stream_request_hash,
+    write_canonical,
+)
+
+EDGE_CASES = [
+    {},
+    [],
+    {"params": {}, "context": [], "nested": {"a": [{}, [], [[]]]}},
+    {"amount": 1.0, "fee": -0.0, "big": 1e300, "tiny": 5e-324, "pi": 3.141592653589793},
+    {"n": 10**40, "neg": -7, "flag": True, "none": None, "t": (1, 2.0, "x")},
+    {"quote": 'say "hi"\\n', "ctl": "\x00\x1f ", "emoji": "🚀" * 3, "cjk": "你好"},
+    {10: "int key", 2: "sorted numerically", 1.5: "float key", True: "bool key"},
+    {None: "null key"},
+    {3: {"x": [1.0]}, 1.5: [2.0], False: {"y": None}},
+    {"z": 1, "a": 2, "m": {"y": [3, 2, 1], "b": "sorted?"}},
+    {"mixed": [1, "two", 3.0, None, {"k": [1.0]}, [2.50], "x" * 5000, False]},
+    list(range(2000)) + [{"tail": 1.0}],
+]
+
+
+def test_edge_cases_hash_identically():
+    for case in EDGE_CASES:
+        assert stream_request_hash(case) == compute_request_hash(case), case
+
+
+def test_corpus_and_chunk_boundaries_hash_identically():
+    for name, payload in corpus(quick=True):
+        assert stream_request_hash(payload) == compute_request_hash(payload), name
+    # astral characters and escapes straddling every chunk boundary
+    text = ("a🚀\"\\\n" * 20_000)[:99_999]
+    for chunk in (1, 7, 4096, 1 << 16):
+        assert stream_request_hash({"s": text}, chunk_size=chunk) == compute_request_hash({"s": text})
+
+
+def test_chunks_concatenate_to_canonical_bytes():
+    payload = tool_output(100_000)
+    chunks = []
+    write_canonical(payload, chunks.append, chunk_size=8192)
+    assert b"".join(chunks) == canonical_bytes(payload)
+    assert len(chunks) > 10 and max(len(c) for c in chunks) < 4 * 8192
+
+
+def test_matches_faramesh_when_available():
+    fn, source = resolve_request_hash()
+    if source != "faramesh":
+        pytest.skip("faramesh.server.canonicalization not importable here")
+    for case in EDGE_CASES:
+        assert stream_request_hash(case) == fn(case), case
+    for name, payload in corpus(quick=True):
+        assert stream_request_hash(payload) == fn(payload), name
+
+
+def test_peak_memory_is_flat():
+    small = peak_alloc(stream_request_hash, tool_output(256 * 1024))
+    large = peak_alloc(stream_request_hash, tool_output(8 * 1024 * 1024))
+    assert large < 2 * small + 64 * 1024, (small, large)
+    assert large < peak_alloc(compute_request_hash, tool_output(8 * 1024 * 1024)) / 20
+
+
+def test_errors_and_deep_nesting():
+    for bad, exc in (({"x": float("nan")}, ValueError), ({"x": object()}, TypeError)):
+        try:
+            stream_request_hash(bad)
+            assert False, f"{bad!r} should raise"
+        except exc:
+            pass
+    loop = {"a": []}
+    loop["a"].append(loop)
+    try:
+        stream_request_hash(loop)
+        assert False, "circular reference should raise"
+    except ValueError:
+        pass
+    # no recursion limit: 50k levels hash fine
+    digest = stream_request_hash(deep_chain(50_000))
+    assert len(digest) == 64 and digest != hashlib.sha256(b"").hexdigest()
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  STREAMING CANONICAL JSON TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_edge_cases_hash_identically,
+        test_corpus_and_chunk_boundaries_hash_identically,
+        test_chunks_concatenate_to_canonical_bytes,
+        test_matches_faramesh_when_available,
+        test_peak_memory_is_flat,
+        test_errors_and_deep_nesting,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except pytest.skip.Exception as e:
+            print(f"⏭  {t.__name__}: {e}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
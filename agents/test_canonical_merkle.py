@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test the opt-in v2 Merkle request hash and its sub-tree digest cache.
+"""
+import hashlib
+import tracemalloc
+
+from canonical_bench import corpus, deep_chain, tool_output
+from canonical_json import compute_request_hash
+from canonical_merkle import MIN_CACHED_STR, MerkleHasher, V2_PREFIX
+from test_canonical_json import EDGE_CASES
+
+
+def test_follows_canonical_rules():
+    h = MerkleHasher()
+    same = [
+        {"tool": "payment", "params": {"amount": 1, "fee": 0}},
+        {"params": {"fee": -0.0, "amount": 1.00}, "tool": "payment"},
+    ]
+    assert h.request_hash(same[0]) == h.request_hash(same[1]) == MerkleHasher().request_hash(same[1])
+    assert h.request_hash({"x": True}) != h.request_hash({"x": 1})  # bool and int never share an entry
+    assert h.request_hash({"x": 1}) != h.request_hash({"x": "1"}) != h.request_hash({"x": [1]})
+    assert h.request_hash([1, 2]) != h.request_hash([[1, 2]])
+    assert h.request_hash(same[0]) != compute_request_hash(same[0])
+    assert compute_request_hash(same[0], version=2) == h.request_hash(same[0])
+    # scalar root: prefix + JSON token
+    assert h.request_hash(1.0) == hashlib.sha256(V2_PREFIX + b"1,").hexdigest()
+
+
+def test_cached_hashes_match_cold_hashes():
+    warm = MerkleHasher(maxsize=64)  # small enough to evict while running
+    for case in EDGE_CASES + [p for _, p in corpus(quick=True)]:
+        first = warm.request_hash(case)
+        assert warm.request_hash(case) == first == MerkleHasher().request_hash(case)
+    assert len(warm.cache) <= 64
+
+
+def test_one_changed_field_rehashes_only_its_path():
+    h = MerkleHasher()
+    payload = tool_output(1024 * 1024)
+    payload["context"] = {"request_id": 0, "tags": ["a", "b"]}
+    before = h.request_hash(payload)
+    h.cache.hits = h.cache.misses = 0
+
+    payload["context"]["request_id"] = 1  # mutated in place: same ids
+    after = h.request_hash(payload)
+    assert after != before and after == MerkleHasher().request_hash(payload)
+    # misses: the context dict and the root; hits: the 1 MiB string, params and tags
+    assert h.cache.misses == 2 and h.cache.hits == 3, h.cache.stats()
+
+    payload["context"]["request_id"] = 0
+    assert h.request_hash(payload) == before
+
+
+def test_large_strings_are_bounded_by_bytes():
+    h = MerkleHasher(maxbytes=4 * 1024 * 1024)
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        for seed in range(30):  # distinct 1.3 MB tool outputs
+            payload = tool_output(1_300_000, seed=seed)
+            payload["params"]["k" * 100] = payload["params"]["content"][:200]
+            h.request_hash(payload)
+            del payload
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert h.cache.nbytes <= h.cache.maxbytes
+    assert held - base < 5 * 1024 * 1024, f"{(held - base) >> 20} MiB still referenced"
+    # fingerprints hold digests of long strings, never the strings themselves
+    for key in list(h.cache._data):
+        parts = key[1:] if isinstance(key, tuple) else ()
+        assert not any(isinstance(x, str) and len(x) >= MIN_CACHED_STR for part in parts for x in part)
+    # a string larger than the whole budget is hashed but not cached
+    huge = MerkleHasher(maxbytes=1024)
+    assert huge.digest("x" * 2048) == MerkleHasher().digest("x" * 2048)
+    assert len(huge.cache) == 0
+
+
+def test_wide_fingerprints_count_against_bytes():
+    h = MerkleHasher(maxsize=10_000, maxbytes=1024 * 1024)
+    for seed in range(20):  # 20 lists of 20k short strings: ~1 MB of fingerprint each
+        wide = [f"{seed}-{i}" for i in range(20_000)]
+        assert h.request_hash({"rows": wide}) == MerkleHasher().request_hash({"rows": wide})
+    assert 0 < h.cache.nbytes <= h.cache.maxbytes
+    assert len(h.cache) < 20, "wide fingerprints must be evicted by bytes, not just count"
+
+
+def test_errors_and_deep_nesting():
+    h = MerkleHasher()
+    for bad, exc in (({"x": float("nan")}, ValueError), ({"x": object()}, TypeError), ({"x": {1, 2}}, TypeError)):
+        try:
+            h.request_hash(bad)
+            assert False, f"{bad!r} should raise"
+        except exc:
+            pass
+    loop = {"a": []}
+    loop["a"].append(loop)
+    try:
+        h.request_hash(loop)
+        assert False, "circular reference should raise"
+    except ValueError:
+        pass
+    shared = {"k": "v"}
+    assert h.request_hash([shared, [shared]]) == h.request_hash([{"k": "v"}, [{"k": "v"}]])
+    assert len(h.request_hash(deep_chain(50_000))) == 64
+    try:
+        compute_request_hash({}, version=3)
+        assert False, "unknown version should raise"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  MERKLE REQUEST HASH TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_follows_canonical_rules,
+        test_cached_hashes_match_cold_hashes,
+        test_one_changed_field_rehashes_only_its_path,
+        test_large_strings_are_bounded_by_bytes,
+        test_wide_fingerprints_count_against_bytes,
+        test_errors_and_deep_nesting,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
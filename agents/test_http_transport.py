@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test the shared keep-alive HTTP pool against the mock server.
+"""
+import http_transport
+from http_transport import close_shared, shared_client, shared_session, transport_stats
+from mock_server import MockFarameshServer
+
+
+def test_shared_client_reuses_one_connection():
+    close_shared()
+    with MockFarameshServer() as server:
+        for _ in range(20):
+            assert shared_client().get(f"{server.base_url}/health").status_code == 200
+        stats = transport_stats()
+    close_shared()
+
+    assert stats["requests"] == 20
+    assert stats["connections"] == 1
+    assert stats["reuse_ratio"] == 0.95
+    assert stats["hosts"]["127.0.0.1"]["requests"] == 20
+
+
+def test_shared_client_is_a_singleton():
+    close_shared()
+    assert shared_client() is shared_client()
+    assert shared_session() is shared_session()
+    close_shared()
+    assert http_transport._client is None and http_transport._session is None
+
+
+def test_requests_session_counts_pool_usage():
+    close_shared()
+    with MockFarameshServer() as server:
+        for _ in range(10):
+            assert shared_session().get(f"{server.base_url}/health").ok
+        stats = transport_stats()
+    close_shared()
+
+    assert stats["requests"] == 10
+    assert stats["connections"] == 1
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  SHARED HTTP TRANSPORT TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_shared_client_reuses_one_connection,
+        test_shared_client_is_a_singleton,
+        test_requests_session_counts_pool_usage,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test baseline storage and the bootstrap regression comparator.
+"""
+import random
+import tempfile
+
+from latency_compare import compare_runs, load_baseline, save_baseline
+from latency_histogram import LatencyHistogram
+
+
+def _run(seed: int, shift: float = 0.0, n: int = 5000) -> LatencyHistogram:
+    rng = random.Random(seed)
+    hist = LatencyHistogram()
+    for _ in range(n):
+        hist.record(rng.lognormvariate(shift, 0.5))
+    return hist
+
+
+def test_same_distribution_is_not_a_regression():
+    rows = compare_runs({"submission": _run(1)}, {"submission": _run(2)})
+
+    assert {r["percentile"] for r in rows} == {50.0, 90.0, 99.0, 99.9}
+    assert not any(r["regressed"] for r in rows), rows
+
+
+def test_slower_run_is_flagged():
+    rows = compare_runs({"submission": _run(1)}, {"submission": _run(2, shift=0.3)})
+
+    by_q = {r["percentile"]: r for r in rows}
+    assert by_q[50.0]["regressed"] and by_q[99.0]["regressed"], rows
+    assert by_q[50.0]["ci_low_ms"] > 0
+
+
+def test_small_slowdown_under_threshold_passes():
+    rows = compare_runs(
+        {"submission": _run(1, n=50000)},
+        {"submission": _run(2, shift=0.03, n=50000)},
+        threshold_pct=10.0,
+    )
+    assert not any(r["regressed"] for r in rows), rows
+
+
+def test_tail_percentiles_skipped_for_small_runs():
+    rows = compare_runs({"submission": _run(1, n=50)}, {"submission": _run(2, n=50)})
+    assert {r["percentile"] for r in rows} == {50.0, 90.0}
+
+
+def test_baseline_round_trip():
+    hist = _run(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        save_baseline("sdk 1.4/rc", {"submission": hist}, {"submission": 5.0}, directory=tmp)
+        loaded = load_baseline("sdk 1.4/rc", directory=tmp)
+
+    assert loaded["submission"].percentile(99) == hist.percentile(99)
+    assert loaded["submission"].total_count == hist.total_count
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  LATENCY REGRESSION COMPARATOR TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_same_distribution_is_not_a_regression,
+        test_slower_run_is_flagged,
+        test_small_slowdown_under_threshold_passes,
+        test_tail_percentiles_skipped_for_small_runs,
+        test_baseline_round_trip,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
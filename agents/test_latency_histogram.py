@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test the HDR latency histogram and benchmark reports.
+"""
+import csv
+import json
+import math
+import os
+import random
+import tempfile
+
+from latency_histogram import LatencyHistogram, report_row, write_report
+
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(round(q / 100 * len(ordered), 9)), 1) - 1]
+
+
+def test_percentiles_within_three_significant_digits():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 1.5) for _ in range(50000)]
+    hist = LatencyHistogram()
+    for v in values:
+        hist.record(v)
+
+    for q in (50, 90, 99, 99.9):
+        exact = _exact(values, q)
+        assert abs(hist.percentile(q) - exact) <= max(exact * 1e-3, 0.001), (q, exact, hist.percentile(q))
+    assert hist.max == round(max(values), 3)
+    assert hist.total_count == 50000
+
+
+def test_memory_is_constant():
+    hist = LatencyHistogram()
+    size = len(hist.counts)
+    for v in range(100000):
+        hist.record(v / 100.0)
+    assert len(hist.counts) == size
+    hist.record(10 ** 9)  # beyond 60 s is clamped, not an error
+    assert hist.max == 60000.0
+
+
+def test_merge_matches_single_histogram():
+    rng = random.Random(3)
+    values = [rng.expovariate(1.0) for _ in range(20000)]
+    whole = LatencyHistogram()
+    parts = [LatencyHistogram() for _ in range(4)]
+    for i, v in enumerate(values):
+        whole.record(v)
+        parts[i % 4].record(v)
+    parts[0].record_error()
+
+    merged = LatencyHistogram()
+    for p in parts:
+        # Round-trip through JSON as a worker process would
+        merged.merge(LatencyHistogram.from_dict(json.loads(json.dumps(p.to_dict()))))
+
+    assert merged.total_count == whole.total_count
+    assert merged.errors == 1
+    for q in (50, 99, 99.9):
+        assert merged.percentile(q) == whole.percentile(q)
+
+
+def test_reports_json_and_csv():
+    hist = LatencyHistogram()
+    for v in range(1, 1001):
+        hist.record(v / 1000.0)
+    row = report_row("submit", hist, elapsed=2.0)
+    assert row["throughput_rps"] == 500.0
+    assert row["p99_9_ms"] == 0.999
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "bench.json")
+        csv_path = os.path.join(tmp, "bench.csv")
+        write_report(json_path, [row], {"submit": hist})
+        write_report(csv_path, [row])
+
+        with open(json_path, encoding="utf-8") as f:
+            payload = json.load(f)
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+
+    assert payload["results"][0]["p50_ms"] == 0.5
+    assert LatencyHistogram.from_dict(payload["histograms"]["submit"]).total_count == 1000
+    assert rows[0]["label"] == "submit" and float(rows[0]["max_ms"]) == 1.0
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  LATENCY HISTOGRAM TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_percentiles_within_three_significant_digits,
+        test_memory_is_constant,
+        test_merge_matches_single_histogram,
+        test_reports_json_and_csv,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the open-loop load generator used by 07_latency_benchmark.py.
+"""
+import time
+
+from load_generator import max_sustainable_rate, rate_steps, run_open_loop, sweep_rates
+
+
+def test_holds_target_rate():
+    result = run_open_loop(lambda i: None, rate=200, duration=0.5, workers=4)
+
+    assert result.scheduled == 100
+    assert result.completed == 100
+    assert 150 < result.throughput < 250, result.summary()
+
+
+def test_queueing_delay_counts_against_latency():
+    """A 10ms service at 200 rps on one worker must not report ~10ms latencies."""
+    result = run_open_loop(lambda i: time.sleep(0.01), rate=200, duration=0.5, workers=1)
+
+    # Closed-loop timing would show ~10ms; from the schedule the backlog grows to ~500ms
+    assert result.percentile(50) > 50, result.summary()
+    assert result.percentile(99) > 200, result.summary()
+
+
+def test_errors_are_counted_not_timed():
+    def send(i):
+        if i % 2:
+            raise RuntimeError("boom")
+
+    result = run_open_loop(send, rate=100, duration=0.2, workers=2)
+
+    assert result.errors == 10
+    assert result.completed == 10
+
+
+def test_sweep_stops_at_first_slo_breach():
+    def send(i):
+        time.sleep(0.004)  # ~250 rps per worker
+
+    steps = sweep_rates(send, [50, 100, 1000, 2000], slo_p99_ms=50, duration=0.3, workers=2)
+
+    assert [s.rate for s in steps] == [50, 100, 1000]
+    assert max_sustainable_rate(steps, slo_p99_ms=50) == 100
+
+
+def test_all_failing_run_is_not_within_slo():
+    """A server that is down: p99 of an empty histogram is 0, which must not pass."""
+    def send(i):
+        raise ConnectionError("down")
+
+    result = run_open_loop(send, rate=100, duration=0.2, workers=2)
+
+    assert result.completed == 0 and result.percentile(99) == 0.0
+    assert not result.within_slo(slo_p99_ms=50, max_error_rate=1.0)
+    steps = sweep_rates(send, [50, 100], slo_p99_ms=50, duration=0.1, workers=2)
+    assert len(steps) == 1 and max_sustainable_rate(steps, slo_p99_ms=50) is None
+
+
+def test_error_rate_above_threshold_fails():
+    def send(i):
+        if i % 4 == 0:
+            raise RuntimeError("boom")
+
+    result = run_open_loop(send, rate=100, duration=0.2, workers=2)
+
+    assert not result.within_slo(slo_p99_ms=50, max_error_rate=0.1)
+    assert result.within_slo(slo_p99_ms=50, max_error_rate=0.5)
+
+
+def test_rate_steps_ends_at_stop():
+    assert rate_steps(100, 400, factor=2) == [100, 200, 400]
+    assert rate_steps(50, 200, factor=1.5)[-1] == 200
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  OPEN-LOOP LOAD GENERATOR TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_holds_target_rate,
+        test_queueing_delay_counts_against_latency,
+        test_errors_are_counted_not_timed,
+        test_sweep_stops_at_first_slo_breach,
+        test_all_failing_run_is_not_within_slo,
+        test_error_rate_above_threshold_fails,
+        test_rate_steps_ends_at_stop,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test the mock Faramesh server used for offline demos and benchmarks.
+"""
+import json
+import time
+
+import httpx
+
+from action_waiter import ActionWaiter
+from mock_server import MockFarameshServer, parse_decision_mix
+
+
+def test_health_submit_and_report_over_http():
+    with MockFarameshServer() as server, httpx.Client(base_url=server.base_url) as client:
+        assert client.get("/health").json()["status"] == "ok"
+
+        action = client.post(
+            "/v1/actions",
+            json={"agent_id": "a", "tool": "shell", "operation": "run", "params": {"cmd": "ls"}},
+        ).json()
+        assert action["status"] == "allowed" and action["decision"] == "allow"
+        assert action["params"] == {"cmd": "ls"}
+
+        final = client.post(f"/v1/actions/{action['id']}/result", json={"success": True, "result": {"ok": 1}})
+        assert final.json()["status"] == "succeeded"
+        assert client.get(f"/v1/actions/{action['id']}").json()["result"] == {"ok": 1}
+
+        activated = client.post("/v1/policies/yaml/ecom_refund_policy/activate").json()
+        assert activated["policy_name"] == "ecom_refund_policy"
+        assert server.active_policy == "ecom_refund_policy"
+
+
+def test_clients_cannot_pick_decision_or_id_and_see_no_internals():
+    with MockFarameshServer() as server, httpx.Client(base_url=server.base_url) as client:
+        existing = server.add_action(status="pending_approval")
+        action = client.post(
+            "/v1/actions",
+            json={"tool": "t", "status": "approved", "decision": "allow", "id": existing["id"]},
+        ).json()
+        assert action["id"] != existing["id"] and action["status"] == "allowed"
+        assert server.get_action(existing["id"])["status"] == "pending_approval"
+
+        listed = client.get("/v1/actions").json()["actions"]
+        fetched = client.get(f"/v1/actions/{action['id']}").json()
+        with client.stream("GET", f"/v1/actions/{existing['id']}/events") as events:
+            first = json.loads(next(line for line in events.iter_lines() if line.startswith("data: "))[6:])
+        for body in listed + [action, fetched, first]:
+            assert "_version" not in body
+
+        for bad in ("abc", "0", "-5"):
+            assert client.get(f"/v1/actions?limit={bad}").status_code == 400
+        assert len(client.get("/v1/actions?limit=1").json()["actions"]) == 1
+
+
+def test_decision_mix_is_seeded():
+    mix = parse_decision_mix("allowed=0.7,denied=0.2,pending_approval=0.1")
+
+    def statuses(seed):
+        server = MockFarameshServer(decision_mix=mix, seed=seed)
+        return [server.submit({"tool": "t"})["status"] for _ in range(200)]
+
+    first = statuses(1)
+    assert first == statuses(1)
+    assert 100 < first.count("allowed") < 180
+    assert first.count("denied") > 10
+
+
+def test_decision_latency_applies_to_submit():
+    server = MockFarameshServer(decision_latency=0.02)
+    start = time.perf_counter()
+    server.submit({"tool": "t"})
+    assert time.perf_counter() - start >= 0.02
+
+
+def test_pending_actions_auto_approve():
+    server = MockFarameshServer(default_status="pending_approval", approve_after=0.1)
+    action = server.submit({"tool": "t"})
+    assert action["status"] == "pending_approval"
+    assert server.wait_for_change(action["id"], None, 2.0)["status"] == "approved"
+
+
+def test_in_process_transport_needs_no_socket():
+    server = MockFarameshServer(default_status="pending_approval")
+    with httpx.Client(transport=server.httpx_transport(), base_url="http://faramesh.mock") as client:
+        action = client.post("/v1/actions", json={"tool": "t"}).json()
+        client.post(f"/v1/actions/{action['id']}/deny", json={"reason": "no"})
+        assert client.get(f"/v1/actions/{action['id']}").json()["status"] == "denied"
+    assert server._httpd is None
+
+
+def test_waiter_runs_in_process():
+    import asyncio
+
+    server = MockFarameshServer(default_status="allowed")
+    ids = [server.submit({"tool": "t"})["id"] for _ in range(10)]
+
+    async def run():
+        client = httpx.AsyncClient(transport=server.httpx_transport())
+        async with ActionWaiter(base_url="http://faramesh.mock", client=client) as waiter:
+            return await waiter.wait_many(ids, timeout=5)
+
+    results = asyncio.run(run())
+    assert {r["status"] for r in results.values()} == {"allowed"}
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  MOCK FARAMESH SERVER TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_health_submit_and_report_over_http,
+        test_clients_cannot_pick_decision_or_id_and_see_no_internals,
+        test_decision_mix_is_seeded,
+        test_decision_latency_applies_to_submit,
+        test_pending_actions_auto_approve,
+        test_in_process_transport_needs_no_socket,
+        test_waiter_runs_in_process,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test the per-phase submission breakdown against the mock server.
+"""
+import hashlib
+import json
+
+import httpx
+
+from mock_server import MockFarameshServer
+from phase_timing import PhaseBreakdown, server_time_ms, timed_submit
+
+
+def _payload(i):
+    return {"agent_id": "bench", "tool": "t", "operation": "o", "params": {"i": i}, "context": {}}
+
+
+def test_phases_add_up_and_connection_is_reused():
+    breakdown = PhaseBreakdown()
+    with MockFarameshServer(decision_latency=0.002) as server, httpx.Client() as client:
+        for i in range(50):
+            action = timed_submit(
+                client,
+                server.base_url,
+                "token",
+                _payload(i),
+                breakdown,
+                hash_fn=lambda p: hashlib.sha256(json.dumps(p, sort_keys=True).encode()).hexdigest(),
+            )
+            assert action["status"] == "allowed"
+
+    h = breakdown.histograms
+    assert breakdown.new_connections == 1
+    assert h["connect"].total_count == 1 and h["tls"].total_count == 0
+    assert h["hash"].total_count == 50
+    # The mock reports its 2ms decision latency in Server-Timing
+    assert 2.0 <= h["server"].percentile(50) < 10.0
+    phase_sum = sum(hist.mean * hist.total_count for name, hist in h.items() if name != "total")
+    total = h["total"].mean * h["total"].total_count
+    assert phase_sum <= total * 1.05
+
+
+def test_server_time_header_formats():
+    assert server_time_ms(httpx.Headers({"Server-Timing": "db;dur=1.5, app;dur=2.5"})) == 4.0
+    assert server_time_ms(httpx.Headers({"X-Process-Time": "0.0035"})) == 3.5
+    assert server_time_ms(httpx.Headers({})) is None
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  SUBMISSION PHASE BREAKDOWN TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_phases_add_up_and_connection_is_reused,
+        test_server_time_header_formats,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
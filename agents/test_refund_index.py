@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite refund index and Shopify cursor pagination.
+"""
+import asyncio
+import itertools
+import os
+import tempfile
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+from refund_index import CLOCK_SKEW, RefundIndex
+from shopify_pages import aiter_orders, iter_orders, iter_pages, next_page_path
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc).timestamp()
+API = "https://shop.example.com/admin/api/2024-01/"
+
+
+def _iso(days_ago):
+    return datetime.fromtimestamp(NOW - days_ago * 86400, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _order(i, email, days_ago, financial_status="refunded"):
+    return {
+        "id": i,
+        "email": email,
+        "financial_status": financial_status,
+        "created_at": _iso(days_ago + 5),
+        "updated_at": _iso(days_ago),
+        "refunds": [{"id": i * 10, "created_at": _iso(days_ago)}],
+    }
+
+
+class _FakeShop:
+    """orders.json with cursor pages, honouring ``limit``, ``financial_status`` and ``updated_at_min``."""
+
+    def __init__(self, orders, page_size=250):
+        self.orders = orders
+        self.page_size = page_size
+        self.paths = []
+
+    def get(self, path):
+        self.paths.append(path)
+        query = parse_qs(urlsplit(path).query)
+        offset = int(query.get("page_info", ["0"])[0])
+        size = min(int(query.get("limit", ["50"])[0]), self.page_size)
+        since = query.get("updated_at_min", [None])[0]
+        status = query.get("financial_status", [None])[0]
+        if "page_info" in query:
+            since = query["since"][0] if "since" in query else None
+            status = query["status"][0] if "status" in query else None
+        matching = [
+            o for o in self.orders
+            if (since is None or o["updated_at"] >= since) and status in (None, o["financial_status"])
+        ]
+        page = matching[offset:offset + size]
+        headers = {}
+        if offset + size < len(matching):
+            nxt = f"{API}orders.json?limit={size}&page_info={offset + size}"
+            if since:
+                nxt += f"&since={since}"
+            if status:
+                nxt += f"&status={status}"
+            headers["link"] = f'<{nxt}>; rel="next"'
+        return httpx.Response(200, json={"orders": page}, headers=headers, request=httpx.Request("GET", API + path))
+
+
+def test_next_page_path_from_link_header():
+    link = (
+        f'<{API}orders.json?limit=250&page_info=prev>; rel="previous", '
+        f'<{API}orders.json?limit=250&page_info=abc>; rel="next"'
+    )
+    assert next_page_path(link) == "orders.json?limit=250&page_info=abc"
+    assert next_page_path(f'<{API}orders.json?page_info=prev>; rel="previous"') is None
+    assert next_page_path(None) is None
+
+
+def test_full_build_follows_every_page():
+    # 600 refunds for one customer: a single 250 page used to undercount
+    orders = [_order(i, "busy@example.com", 10 + i % 60) for i in range(600)]
+    orders.append(_order(9999, "other@example.com", 5))
+    shop = _FakeShop(orders)
+    index = RefundIndex(clock=lambda: NOW)
+
+    assert index.refresh(shop.get) == 601
+    assert len(shop.paths) == 4  # three refunded pages, one partially refunded
+    assert "financial_status=refunded" in shop.paths[0] and "updated_at_min=" in shop.paths[0]
+    assert index.count("Busy@Example.com", days=90) == 600
+    assert index.count("busy@example.com", days=30) == sum(1 for i in range(600) if 10 + i % 60 <= 30)
+    assert index.count("nobody@example.com") == 0
+
+
+def test_incremental_refresh_uses_watermark():
+    clock = [NOW]
+    shop = _FakeShop([_order(1, "a@example.com", 40), _order(2, "a@example.com", 20)])
+    index = RefundIndex(clock=lambda: clock[0], max_staleness=60)
+    index.refresh(shop.get)
+    assert index.watermark == _iso(20)
+
+    # within max_staleness: no request at all
+    assert index.refresh(shop.get) == 0 and len(shop.paths) == 2
+
+    shop.orders.append(_order(3, "a@example.com", 0))
+    clock[0] += 120
+    index.refresh(shop.get)
+    assert parse_qs(urlsplit(shop.paths[-1]).query)["updated_at_min"] == [_iso(20)]
+    assert index.count("a@example.com", days=90, now=NOW) == 3
+    # order 3 is newer than the scan start allows: held back by CLOCK_SKEW
+    assert index.watermark == _iso((CLOCK_SKEW - 120) / 86400)
+
+
+def test_partial_refunds_are_reconciled_by_refresh():
+    shop = _FakeShop([_order(1, "a@example.com", 5, "partially_refunded"), _order(2, "a@example.com", 6)])
+    index = RefundIndex(clock=lambda: NOW, max_staleness=0)
+    # a partial refund this process issued, recorded before the next refresh
+    index.record_refund(3, "a@example.com", {"id": 30, "created_at": _iso(0)})
+    shop.orders.append(_order(3, "a@example.com", 0, "partially_refunded"))
+
+    assert index.refresh(shop.get) == 3
+    statuses = [parse_qs(urlsplit(p).query)["financial_status"] for p in shop.paths]
+    assert statuses == [["refunded"], ["partially_refunded"]]
+    assert index.count("a@example.com", now=NOW) == 3
+    # windowed by refund time: the 5-day-old partial refund is outside 4 days
+    assert index.count("a@example.com", days=4, now=NOW) == 1
+
+
+def test_watermark_overlaps_orders_updated_mid_scan():
+    first, second = _order(1, "a@example.com", 10), _order(2, "b@example.com", 20)
+    shop = _FakeShop([first, second], page_size=1)
+    index = RefundIndex(clock=lambda: NOW, max_staleness=0)
+
+    def get(path):
+        if shop.paths:
+            # while page 2 is fetched, page 1's order changes and page 2's is newer still
+            first["updated_at"] = _iso(-10 / 86400)
+            second["updated_at"] = _iso(-30 / 86400)
+        return shop.get(path)
+
+    index.refresh(get)
+    scanned = len(shop.paths)
+    index.refresh(shop.get)
+    since = parse_qs(urlsplit(shop.paths[scanned]).query)["updated_at_min"][0]
+    assert since <= first["updated_at"]
+
+
+def test_failed_scan_does_not_advance_watermark():
+    clock = [NOW]
+    # newest first, as Shopify may return them: the older orders sit on page 2
+    orders = [_order(1, "new@example.com", 1), _order(2, "old@example.com", 30), _order(3, "old@example.com", 40)]
+    shop = _FakeShop(orders, page_size=1)
+    index = RefundIndex(clock=lambda: clock[0], max_staleness=0)
+    calls = [0]
+
+    def flaky_get(path):
+        calls[0] += 1
+        if calls[0] == 2:
+            raise httpx.ConnectError("page 2 failed")
+        return shop.get(path)
+
+    try:
+        index.refresh(flaky_get)
+        assert False, "expected the page 2 failure to propagate"
+    except httpx.ConnectError:
+        pass
+    assert index.watermark is None
+
+    clock[0] += 1
+    index.refresh(shop.get)
+    assert index.count("old@example.com", now=NOW) == 2
+    assert index.watermark == _iso(1)
+
+
+def test_async_refresh_matches_sync():
+    orders = [_order(i, "a@example.com", 10 + i % 60) for i in range(300)]
+    shop = _FakeShop(orders)
+    index = RefundIndex(clock=lambda: NOW)
+
+    async def get(path):
+        return shop.get(path)
+
+    async def run():
+        # a second caller waits for the first scan, then finds it fresh
+        return await asyncio.gather(index.arefresh(get), index.arefresh(get))
+
+    assert sorted(asyncio.run(run())) == [0, 300]
+    assert len(shop.paths) == 3
+    assert index.count("a@example.com", now=NOW) == 300
+    assert index.watermark == _iso(10)
+
+
+def test_back_to_back_refunds_count_each_other():
+    clock = [NOW]
+    shop = _FakeShop([_order(1, "a@example.com", 40)])
+    index = RefundIndex(clock=lambda: clock[0], max_staleness=60)
+
+    def issue_refund(order_id):
+        # what refund_bot does per refund: refresh + count for the decision, then POST
+        index.refresh(shop.get)
+        seen = index.count("a@example.com")
+        refund = {"id": order_id * 10, "created_at": _iso(0)}
+        shop.orders.append(dict(_order(order_id, "a@example.com", 0), refunds=[refund]))
+        index.record_refund(order_id, "A@example.com", refund)
+        clock[0] += 5
+        return seen
+
+    assert issue_refund(2) == 1
+    assert issue_refund(3) == 2  # second refresh skipped, first refund still counted
+    assert len(shop.paths) == 2  # the first refresh's two scans only
+    assert index.count("a@example.com") == 3
+
+    # the next real refresh re-applies those orders without double counting
+    index.refresh(shop.get, force=True)
+    assert index.count("a@example.com") == 3
+    assert not index.record_refund(4, "", {"id": 40})
+
+
+def test_index_persists_across_restarts():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "refunds.sqlite3")
+        index = RefundIndex(path, store="shop.example.com", clock=lambda: NOW)
+        index.apply_orders([_order(1, "a@example.com", 3)])
+        index.close()
+
+        reopened = RefundIndex(path, store="shop.example.com", clock=lambda: NOW)
+        assert reopened.count("a@example.com") == 1
+        reopened.close()
+
+        other_store = RefundIndex(path, store="other.example.com", clock=lambda: NOW)
+        assert other_store.count("a@example.com") == 0 and other_store.watermark is None
+        other_store.close()
+
+
+def test_iter_pages_is_lazy():
+    shop = _FakeShop([_order(i, "a@example.com", 1) for i in range(1000)])
+    pages = iter_pages(shop.get, "orders.json?limit=250")
+    first = next(pages)
+    assert len(first.json()["orders"]) == 250
+    assert len(shop.paths) == 1
+
+
+def test_iter_orders_pushes_filters_and_stops_early():
+    shop = _FakeShop([_order(i, "a@example.com", 1, "paid") for i in range(1000)])
+    orders = iter_orders(shop.get, email="a@example.com", financial_status="paid", page_size=11)
+    first_ten = list(itertools.islice(orders, 10))
+    assert [o["id"] for o in first_ten] == list(range(10))
+    assert len(shop.paths) == 1
+    query = parse_qs(urlsplit(shop.paths[0]).query)
+    assert query["email"] == ["a@example.com"]
+    assert query["financial_status"] == ["paid"] and query["status"] == ["any"]
+    assert query["limit"] == ["11"]
+
+
+def test_aiter_orders_follows_every_page():
+    shop = _FakeShop([_order(i, "a@example.com", 1) for i in range(600)])
+
+    async def get(path):
+        return shop.get(path)
+
+    async def run():
+        return [o["id"] async for o in aiter_orders(get)]
+
+    assert asyncio.run(run()) == list(range(600))
+    assert len(shop.paths) == 3
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  REFUND INDEX TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_next_page_path_from_link_header,
+        test_full_build_follows_every_page,
+        test_incremental_refresh_uses_watermark,
+        test_partial_refunds_are_reconciled_by_refresh,
+        test_watermark_overlaps_orders_updated_mid_scan,
+        test_failed_scan_does_not_advance_watermark,
+        test_async_refresh_matches_sync,
+        test_back_to_back_refunds_count_each_other,
+        test_index_persists_across_restarts,
+        test_iter_pages_is_lazy,
+        test_iter_orders_pushes_filters_and_stops_early,
+        test_aiter_orders_follows_every_page,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
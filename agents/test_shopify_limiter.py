@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test the Shopify token bucket and retry scheduler.
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+
+from poll_policy import PollPolicy
+from shopify_limiter import ShopifyLimiter, TokenBucket, parse_call_limit
+
+FAST_RETRY = PollPolicy(initial=0.001, max_interval=0.005, jitter=0.0)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _responses(*statuses, headers=None):
+    """A request callable answering with ``statuses`` in turn."""
+    calls = []
+
+    def request():
+        status = statuses[min(len(calls), len(statuses) - 1)]
+        calls.append(status)
+        return httpx.Response(status, headers=(headers or {}).get(status, {}))
+
+    return request, calls
+
+
+def test_bucket_queues_callers_in_order():
+    clock = _Clock()
+    bucket = TokenBucket(capacity=2, rate=10, clock=clock)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.1, 0.2]
+    clock.now = 1.0
+    assert bucket.reserve() == 0.0
+
+
+def test_call_limit_header_drains_local_bucket():
+    assert parse_call_limit("32/40") == (32, 40)
+    assert parse_call_limit("junk") is None
+    bucket = TokenBucket(capacity=40, rate=2, clock=_Clock())
+    bucket.observe(39, 40)  # another app used most of the store's budget
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.5
+
+
+def test_429_waits_for_retry_after_then_succeeds():
+    limiter = ShopifyLimiter(rate=100, retry_policy=FAST_RETRY)
+    request, calls = _responses(429, 200, headers={429: {"Retry-After": "0.05"}})
+    start = time.perf_counter()
+    resp = limiter.send(request)
+    assert resp.status_code == 200
+    assert calls == [429, 200]
+    assert time.perf_counter() - start >= 0.05
+    assert limiter.throttled == 1 and limiter.retries == 1
+
+
+def test_server_errors_retry_only_idempotent_calls():
+    limiter = ShopifyLimiter(retry_policy=FAST_RETRY)
+    request, calls = _responses(503, 502, 200)
+    assert limiter.send(request).status_code == 200 and len(calls) == 3
+
+    request, calls = _responses(503, 200)
+    assert limiter.send(request, idempotent=False).status_code == 503
+    assert calls == [503]
+
+    limiter = ShopifyLimiter(max_attempts=3, retry_policy=FAST_RETRY)
+    request, calls = _responses(500)
+    assert limiter.send(request).status_code == 500 and len(calls) == 3
+
+
+def test_threads_share_one_budget():
+    limiter = ShopifyLimiter(capacity=5, rate=50)
+    request, calls = _responses(200)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=limiter.send, args=(request,)) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 5 go at once, the other 15 drain at 50/s
+    assert time.perf_counter() - start >= 0.28
+    assert len(calls) == 20 and limiter.requests == 20
+
+
+def test_async_send_retries():
+    limiter = ShopifyLimiter(retry_policy=FAST_RETRY)
+    request, calls = _responses(504, 200)
+
+    async def arequest():
+        return request()
+
+    resp = asyncio.run(limiter.asend(arequest))
+    assert resp.status_code == 200 and calls == [504, 200]
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  SHOPIFY RATE LIMITER TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_bucket_queues_callers_in_order,
+        test_call_limit_header_drains_local_bucket,
+        test_429_waits_for_retry_after_then_succeeds,
+        test_server_errors_retry_only_idempotent_calls,
+        test_threads_share_one_budget,
+        test_async_send_retries,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
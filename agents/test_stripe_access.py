@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test Stripe prefix dispatch and parallel retrieval.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+stripe = pytest.importorskip("stripe")
+
+from stripe_access import resource_for, retrieve, retrieve_many
+
+
+@contextmanager
+def _fake_retrieve():
+    """Replace PaymentIntent/Account.retrieve with fakes that count calls."""
+    calls = []
+
+    def fake(kind):
+        def retrieve(object_id, **params):
+            calls.append(object_id)
+            time.sleep(0.1)
+            return {"id": object_id, "object": kind, "thread": threading.get_ident()}
+        return retrieve
+
+    classes = {stripe.PaymentIntent: "payment_intent", stripe.Account: "account"}
+    saved = {cls: cls.__dict__["retrieve"] for cls in classes}
+    for cls, kind in classes.items():
+        cls.retrieve = fake(kind)
+    try:
+        yield calls
+    finally:
+        for cls, original in saved.items():
+            cls.retrieve = original
+
+
+def test_prefix_dispatch():
+    assert resource_for("pi_123") is stripe.PaymentIntent
+    assert resource_for("acct_1Abc") is stripe.Account
+    assert resource_for("cus_9") is stripe.Customer
+    for bad in ("xyz_1", "pi", ""):
+        try:
+            resource_for(bad)
+            assert False, f"{bad!r} should be rejected"
+        except ValueError:
+            pass
+
+
+def test_retrieve_dispatches_and_never_caches():
+    with _fake_retrieve() as calls:
+        assert retrieve("pi_1")["object"] == "payment_intent"
+        assert retrieve("acct_2")["object"] == "account"
+        retrieve("pi_1")
+    assert calls == ["pi_1", "acct_2", "pi_1"]  # evidence reads always reach Stripe
+
+
+def test_retrieve_many_fetches_in_parallel():
+    with _fake_retrieve() as calls:
+        start = time.perf_counter()
+        objs = retrieve_many(["pi_1", "acct_2", "pi_3", "pi_1"])
+        elapsed = time.perf_counter() - start
+    assert list(objs) == ["pi_1", "acct_2", "pi_3"]
+    assert sorted(calls) == ["acct_2", "pi_1", "pi_3"]
+    assert objs["acct_2"]["object"] == "account"
+    assert elapsed < 0.25, f"{elapsed:.2f}s"  # three 100 ms reads overlap
+
+
+def test_retrieve_many_rejects_before_fetching():
+    with _fake_retrieve() as calls:
+        try:
+            retrieve_many(["pi_1", "xyz_2"])
+            assert False, "expected the unknown prefix to be rejected"
+        except ValueError:
+            pass
+    assert calls == []
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  STRIPE ACCESS TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_prefix_dispatch,
+        test_retrieve_dispatches_and_never_caches,
+        test_retrieve_many_fetches_in_parallel,
+        test_retrieve_many_rejects_before_fetching,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
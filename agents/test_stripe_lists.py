@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test lazy Stripe list paging, field projection and the output byte budget.
+"""
+from stripe_lists import bounded_lines, iter_projected, project
+
+
+class _FakeList:
+    """``stripe.X.list`` stand-in: ``total`` events served in pages of ``limit``."""
+
+    def __init__(self, total):
+        self.total = total
+        self.pages = 0
+        self.page_size = None
+
+    def __call__(self, limit, **params):
+        self.page_size = limit
+        return self
+
+    def auto_paging_iter(self):
+        for start in range(0, self.total, self.page_size):
+            self.pages += 1
+            for i in range(start, min(start + self.page_size, self.total)):
+                yield {
+                    "id": f"evt_{i}",
+                    "type": "charge.succeeded",
+                    "data": {"object": {"id": f"ch_{i}", "object": "charge", "blob": "x" * 10_000}},
+                }
+
+
+def test_project_keeps_only_requested_paths():
+    obj = {"id": "evt_1", "data": {"object": {"id": "ch_1", "blob": "x" * 100}}}
+    assert project(obj, ("id", "data.object.id", "data.missing.id", "type")) == {
+        "id": "evt_1",
+        "data.object.id": "ch_1",
+        "data.missing.id": None,
+        "type": None,
+    }
+
+
+def test_iter_projected_pages_lazily_up_to_limit():
+    events = _FakeList(total=50_000)
+    rows = list(iter_projected(events, ("id", "data.object.id"), limit=250))
+    assert len(rows) == 250 and rows[-1] == {"id": "evt_249", "data.object.id": "ch_249"}
+    assert events.page_size == 100 and events.pages == 3
+
+    small = _FakeList(total=50_000)
+    assert len(list(iter_projected(small, ("id",), limit=5))) == 5
+    assert small.page_size == 5 and small.pages == 1
+
+
+def test_byte_budget_stops_paging():
+    events = _FakeList(total=50_000)
+    rows = iter_projected(events, ("id", "type"), limit=50_000)
+    lines, more = bounded_lines(rows, lambda r: f"- {r['type']} id={r['id']}", max_bytes=1000)
+    assert more and sum(len(line) + 1 for line in lines) <= 1000
+    assert events.pages == 1  # the budget ran out inside the first page
+
+    lines, more = bounded_lines(iter_projected(_FakeList(3), ("id",), 10), lambda r: r["id"])
+    assert lines == ["evt_0", "evt_1", "evt_2"] and not more
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  STRIPE LIST STREAMING TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_project_keeps_only_requested_paths,
+        test_iter_projected_pages_lazily_up_to_limit,
+        test_byte_budget_stops_paging,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Test the TTL/LRU cache and its revalidation hooks.
+"""
+import asyncio
+import threading
+import time
+
+from ttl_cache import NOT_MODIFIED, TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fresh_entries_skip_the_loader():
+    cache = TTLCache(ttl=600)
+    loads = []
+
+    def load(stale):
+        loads.append(stale)
+        return {"id": 1}, None, None
+
+    assert cache.get_or_load("order", load) == {"id": 1}
+    assert cache.get_or_load("order", load) == {"id": 1}
+    assert loads == [None]
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_stale_entry_is_revalidated_not_refetched():
+    clock = _Clock()
+    cache = TTLCache(ttl=600, clock=clock)
+    cache.put("order", {"id": 1}, etag='W/"abc"', version="2026-01-01T00:00:00Z")
+    clock.now = 601
+    assert cache.get("order") is None
+
+    seen = []
+
+    def load(stale):
+        seen.append((stale.etag, stale.version))
+        return NOT_MODIFIED
+
+    assert cache.get_or_load("order", load) == {"id": 1}
+    assert seen == [('W/"abc"', "2026-01-01T00:00:00Z")]
+    assert cache.revalidated == 1
+    # refreshed: fresh again for another full TTL
+    clock.now = 1200
+    assert cache.get("order") == {"id": 1}
+
+
+def test_revalidate_checks_fresh_entries():
+    cache = TTLCache(ttl=600)
+    cache.put("order", {"financial_status": "paid"}, etag='W/"v1"')
+    seen = []
+
+    def unchanged(stale):
+        seen.append(stale.etag)
+        return NOT_MODIFIED
+
+    def refunded(stale):
+        seen.append(stale.etag)
+        return {"financial_status": "refunded"}, 'W/"v2"', None
+
+    assert cache.get_or_load("order", unchanged, revalidate=True) == {"financial_status": "paid"}
+    assert cache.get_or_load("order", refunded, revalidate=True) == {"financial_status": "refunded"}
+    assert seen == ['W/"v1"', 'W/"v1"']
+
+    async def run():
+        return await cache.aget_or_load("order", _async(unchanged), revalidate=True)
+
+    assert asyncio.run(run()) == {"financial_status": "refunded"}
+    assert seen[-1] == 'W/"v2"' and cache.revalidated == 2
+
+
+def _async(fn):
+    async def load(stale):
+        return fn(stale)
+    return load
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_async_loader():
+    cache = TTLCache()
+
+    async def load(stale):
+        await asyncio.sleep(0)
+        return [1, 2], "etag-1", None
+
+    async def run():
+        first = await cache.aget_or_load(("transactions", "1"), load)
+        second = await cache.aget_or_load(("transactions", "1"), load)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == [1, 2]
+    assert cache.entry(("transactions", "1")).etag == "etag-1"
+    assert cache.stats()["hits"] == 1
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache()
+    loads = []
+
+    def load(stale):
+        loads.append("sync")
+        time.sleep(0.1)
+        return {"id": 1}, None, None
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load(("order", "1"), load)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loads == ["sync"] and results == [{"id": 1}] * 5
+    assert cache.stats()["coalesced"] == 4
+
+    async def aload(stale):
+        loads.append("async")
+        await asyncio.sleep(0.05)
+        return [1, 2], None, None
+
+    async def run():
+        return await asyncio.gather(*(cache.aget_or_load(("transactions", "1"), aload) for _ in range(5)))
+
+    assert asyncio.run(run()) == [[1, 2]] * 5
+    assert loads == ["sync", "async"]
+    assert not cache._loading and not cache._aloading
+
+
+def test_concurrent_revalidations_share_one_load():
+    cache = TTLCache()
+    cache.put(("order", "1"), {"financial_status": "paid"}, version="v1")
+    loads = []
+
+    def load(stale):
+        loads.append("sync")
+        time.sleep(0.1)
+        return NOT_MODIFIED
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load(("order", "1"), load, revalidate=True)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loads == ["sync"] and results == [{"financial_status": "paid"}] * 5
+
+    async def aload(stale):
+        loads.append("async")
+        await asyncio.sleep(0.05)
+        return {"financial_status": "refunded"}, None, "v2"
+
+    async def run():
+        return await asyncio.gather(*(cache.aget_or_load(("order", "1"), aload, revalidate=True) for _ in range(5)))
+
+    assert asyncio.run(run()) == [{"financial_status": "refunded"}] * 5
+    assert loads == ["sync", "async"]
+
+    # a revalidation that starts after the last one finished still checks upstream
+    cache.get_or_load(("order", "1"), load, revalidate=True)
+    assert loads == ["sync", "async", "sync"]
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  TTL CACHE TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_fresh_entries_skip_the_loader,
+        test_stale_entry_is_revalidated_not_refetched,
+        test_revalidate_checks_fresh_entries,
+        test_least_recently_used_entry_is_evicted,
+        test_async_loader,
+        test_concurrent_misses_share_one_load,
+        test_concurrent_revalidations_share_one_load,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
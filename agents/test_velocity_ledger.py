@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite transfer velocity ledger.
+"""
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+from velocity_ledger import VelocityLedger
+from velocity_windows import RollingWindows
+
+NOW = datetime(2026, 10, 1, 12, tzinfo=timezone.utc).timestamp()
+
+
+def _daily(snap):
+    return snap["total_cents_today"], snap["dest_cents_today"]
+
+
+def test_snapshot_tracks_daily_totals():
+    clock = [NOW]
+    ledger = VelocityLedger(clock=lambda: clock[0])
+    ledger.commit("acct_a", 2500)
+    ledger.commit("acct_a", 1000)
+    ledger.commit("acct_b", 400)
+    assert _daily(ledger.snapshot("acct_a")) == (3900, 3500)
+    assert _daily(ledger.snapshot("acct_c")) == (3900, 0)
+
+    clock[0] += 86400  # next UTC day starts from zero
+    assert _daily(ledger.snapshot("acct_a")) == (0, 0)
+
+
+def test_rolling_windows_slide_per_minute():
+    windows = RollingWindows()
+    windows.add("acct_a", 100, NOW)
+    windows.add("acct_a", 50, NOW + 250)
+    assert windows.sums("acct_a", NOW + 250) == {"24h": 150, "1h": 150, "5m": 150}
+    assert windows.sums("acct_a", NOW + 400) == {"24h": 150, "1h": 150, "5m": 50}
+    assert windows.sums("acct_a", NOW + 3900) == {"24h": 150, "1h": 0, "5m": 0}
+    windows.add("acct_a", 25, NOW + 3000)  # late event inside the horizon
+    assert windows.sums("acct_a", NOW + 3900)["24h"] == 175
+    assert windows.sums("acct_a", NOW + 86400 + 3000)["24h"] == 0
+    assert windows.sums("acct_b", NOW) == {"24h": 0, "1h": 0, "5m": 0}
+
+
+def test_caps_roll_across_midnight():
+    midnight = datetime(2026, 10, 2, tzinfo=timezone.utc).timestamp()
+    clock = [midnight - 60]
+    ledger = VelocityLedger(clock=lambda: clock[0])
+    assert ledger.commit("acct_a", 900, total_cap=1000) is not None
+    clock[0] = midnight + 60
+    snap = ledger.snapshot("acct_a")
+    assert snap["total_cents_today"] == 0 and snap["total_cents_24h"] == 900
+    assert snap["dest_cents_5m"] == 900 and snap["dest_cents_1h"] == 900
+    assert ledger.commit("acct_a", 900, total_cap=1000) is None  # the day changed, the last 24 h didn't
+    clock[0] = midnight + 86400
+    assert ledger.commit("acct_a", 900, total_cap=1000) is not None
+
+
+def test_commit_enforces_caps_and_void_releases():
+    ledger = VelocityLedger(clock=lambda: NOW)
+    first = ledger.commit("acct_a", 400, total_cap=1000, dest_cap=500)
+    assert first is not None
+    assert ledger.commit("acct_a", 200, total_cap=1000, dest_cap=500) is None
+    assert ledger.commit("acct_b", 700, total_cap=1000, dest_cap=500) is None
+
+    ledger.void(first)
+    ledger.void(first)  # voiding twice is a no-op
+    assert ledger.snapshot("acct_a")["dest_cents_today"] == 0
+    assert ledger.commit("acct_a", 500, total_cap=1000, dest_cap=500) is not None
+
+
+def test_concurrent_writers_share_the_cap():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "velocity.sqlite3")
+        ledgers = [VelocityLedger(path, clock=lambda: NOW) for _ in range(4)]  # one connection per "agent"
+        accepted = []
+
+        def transfer(ledger):
+            for _ in range(10):
+                if ledger.commit("acct_a", 100, total_cap=2500, dest_cap=2500) is not None:
+                    accepted.append(1)
+
+        threads = [threading.Thread(target=transfer, args=(ledger,)) for ledger in ledgers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(accepted) == 25
+        snap = ledgers[0].snapshot("acct_a")
+        assert snap["total_cents_today"] == 2500 and snap["total_cents_24h"] == 2500
+        for ledger in ledgers:
+            ledger.close()
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 60)
+    print("  VELOCITY LEDGER TEST")
+    print("=" * 60 + "\n")
+
+    tests = [
+        test_snapshot_tracks_daily_totals,
+        test_rolling_windows_slide_per_minute,
+        test_caps_roll_across_midnight,
+        test_commit_enforces_caps_and_void_releases,
+        test_concurrent_writers_share_the_cap,
+    ]
+    ok = True
+    for t in tests:
+        try:
+            t()
+            print(f"✅ {t.__name__}")
+        except AssertionError as e:
+            ok = False
+            print(f"❌ {t.__name__}: {e}")
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if ok else "❌ SOME TESTS FAILED")
+    print("=" * 60 + "\n")
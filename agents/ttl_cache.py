@@ -0,0 +1,252 @@
+"""
+Bounded TTL cache with conditional revalidation.
+
+The governed tools re-read the same upstream records several times within
+one flow (an order is fetched for evidence, again for the policy params,
+again for eligibility). ``TTLCache`` keeps those records for a TTL, evicts
+the least recently used entry once ``maxsize`` is reached, and remembers a
+validator per entry - an HTTP ``ETag`` and/or a ``version`` such as the
+record's ``updated_at`` - so a stale entry can be revalidated cheaply
+(``If-None-Match`` -> 304, or comparing ``updated_at``) instead of being
+downloaded again. Concurrent misses on the same key are single-flight: one
+caller runs the loader and the others wait for its result, so a parallel
+prefetch and a tool read of the same record cost one upstream request.
+
+Usage:
+    cache = TTLCache(maxsize=512, ttl=600)
+
+    def load(stale):
+        headers = {"If-None-Match": stale.etag} if stale and stale.etag else {}
+        resp = client.get(url, headers=headers)
+        if resp.status_code == 304:
+            return NOT_MODIFIED
+        return resp.json(), resp.headers.get("etag"), None
+
+    order = cache.get_or_load(("order", order_id), load)
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+# Returned by a loader when the stale entry is still current.
+NOT_MODIFIED = object()
+
+LoadResult = Union[object, Tuple[Any, Optional[str], Optional[str]]]
+
+
+class CacheEntry:
+    """A cached value with the validators it was fetched with."""
+
+    __slots__ = ("value", "etag", "version", "stored_at")
+
+    def __init__(self, value: Any, etag: Optional[str], version: Optional[str], stored_at: float):
+        self.value = value
+        self.etag = etag
+        self.version = version
+        self.stored_at = stored_at
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries go stale after ``ttl`` seconds.
+
+    Stale entries are kept (until evicted) so loaders can revalidate them.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        # key -> [lock, holders] for loads in flight (async: keyed by (loop, key))
+        self._loading: Dict[Hashable, List[Any]] = {}
+        self._aloading: Dict[Hashable, List[Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, count=False) is not None
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self._clock() - entry.stored_at < self.ttl
+
+    def entry(self, key: Hashable) -> Optional[CacheEntry]:
+        """The entry for ``key``, fresh or stale, without touching the stats."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def get(self, key: Hashable, count: bool = True) -> Optional[Any]:
+        """The value if cached and fresh, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.is_fresh(entry):
+                self._entries.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return entry.value
+            if count:
+                self.misses += 1
+            return None
+
+    def put(
+        self,
+        key: Hashable,
+        value: Any,
+        etag: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self._entries[key] = CacheEntry(value, etag, version, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def refresh(self, key: Hashable) -> None:
+        """Mark a revalidated entry fresh again."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.stored_at = self._clock()
+                self._entries.move_to_end(key)
+                self.revalidated += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(
+        self,
+        key: Hashable,
+        after_wait: bool = False,
+        revalidate: bool = False,
+        seen: Optional[Tuple[Optional[CacheEntry], Optional[float]]] = None,
+    ) -> Tuple[Optional[Any], Optional[CacheEntry]]:
+        """Cached value (or None) and the entry a loader should revalidate.
+
+        A revalidating caller still accepts an entry that was stored or
+        refreshed after ``seen`` - its first lookup's entry and
+        ``stored_at`` - since a concurrent load checked it meanwhile.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if revalidate and entry is not None and seen is not None:
+                revalidate = entry is seen[0] and entry.stored_at == seen[1]
+            if entry is not None and not revalidate and self.is_fresh(entry):
+                self._entries.move_to_end(key)
+                if after_wait:
+                    self.coalesced += 1  # a concurrent miss loaded it meanwhile
+                else:
+                    self.hits += 1
+                return entry.value, None
+            if not after_wait:
+                self.misses += 1
+            return None, entry
+
+    def _join(self, table: Dict[Hashable, List[Any]], key: Hashable, factory: Callable[[], Any]) -> List[Any]:
+        with self._lock:
+            slot = table.get(key)
+            if slot is None:
+                slot = table[key] = [factory(), 0]
+            slot[1] += 1
+            return slot
+
+    def _leave(self, table: Dict[Hashable, List[Any]], key: Hashable, slot: List[Any]) -> None:
+        with self._lock:
+            slot[1] -= 1
+            if slot[1] == 0 and table.get(key) is slot:
+                del table[key]
+
+    def _store(self, key: Hashable, stale: Optional[CacheEntry], result: LoadResult) -> Any:
+        if result is NOT_MODIFIED:
+            if stale is None:
+                raise ValueError("loader returned NOT_MODIFIED without a cached entry")
+            self.refresh(key)
+            return stale.value
+        value, etag, version = result
+        self.put(key, value, etag=etag, version=version)
+        return value
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        load: Callable[[Optional[CacheEntry]], LoadResult],
+        revalidate: bool = False,
+    ) -> Any:
+        """Cached value, or ``load(stale_entry)``'s result stored under ``key``.
+
+        ``load`` receives the stale entry (or None) and returns either
+        ``NOT_MODIFIED`` or ``(value, etag, version)``. Threads missing the
+        same key wait for the first one's load; if it raises, the next
+        waiter tries its own. ``revalidate`` treats a fresh entry as stale,
+        so ``load`` still runs (and can answer ``NOT_MODIFIED`` cheaply);
+        callers revalidating the same key at once share one such load.
+        """
+        value, stale = self._lookup(key, revalidate=revalidate)
+        if value is not None:
+            return value
+        seen = (stale, stale.stored_at if stale else None)
+        slot = self._join(self._loading, key, threading.Lock)
+        try:
+            with slot[0]:
+                value, stale = self._lookup(key, after_wait=True, revalidate=revalidate, seen=seen)
+                if value is not None:
+                    return value
+                return self._store(key, stale, load(stale))
+        finally:
+            self._leave(self._loading, key, slot)
+
+    async def aget_or_load(
+        self,
+        key: Hashable,
+        load: Callable[[Optional[CacheEntry]], Awaitable[LoadResult]],
+        revalidate: bool = False,
+    ) -> Any:
+        """``get_or_load`` with a coroutine loader (single-flight per event loop)."""
+        value, stale = self._lookup(key, revalidate=revalidate)
+        if value is not None:
+            return value
+        seen = (stale, stale.stored_at if stale else None)
+        flight = (asyncio.get_running_loop(), key)
+        slot = self._join(self._aloading, flight, asyncio.Lock)
+        try:
+            async with slot[0]:
+                value, stale = self._lookup(key, after_wait=True, revalidate=revalidate, seen=seen)
+                if value is not None:
+                    return value
+                return self._store(key, stale, await load(stale))
+        finally:
+            self._leave(self._aloading, flight, slot)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "coalesced": self.coalesced,
+        }
+
+
+__all__ = ["CacheEntry", "NOT_MODIFIED", "TTLCache"]
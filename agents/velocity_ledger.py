@@ -0,0 +1,197 @@
+"""
+Shared, crash-safe transfer velocity ledger for daily caps.
+
+Rewriting one JSON file per transfer loses updates as soon as two agents
+transfer at once, and a crash mid-write corrupts it. ``VelocityLedger``
+keeps the numbers in SQLite (WAL mode) instead:
+
+- ``transfers`` is an append-only ledger, one row per committed transfer
+  (a failed transfer is voided by appending a reversing row, never by
+  editing history);
+- ``daily_totals`` holds running sums per UTC day, per destination and
+  overall (destination ``"*"``), incremented in the same transaction, so
+  ``snapshot()`` is two primary-key lookups however long the ledger gets;
+- rolling sums (last 24 h / 1 h / 5 min, see ``RollingWindows``) are fed
+  by tailing the ledger past the last row id seen, so transfers made by
+  other processes show up without rescanning history;
+- ``commit()`` checks the caps against the rolling 24 h sums and appends
+  inside ``BEGIN IMMEDIATE``, which serializes writers across processes:
+  two agents can no longer both squeeze under the same cap, and a burst
+  either side of midnight still counts as one day's spend.
+
+Usage:
+    ledger = VelocityLedger("velocity.sqlite3")
+    entry = ledger.commit("acct_123", 2500, total_cap=100_000, dest_cap=50_000)
+    if entry is None: ...                 # would exceed a cap
+    try:
+        stripe.Transfer.create(...)
+    except Exception:
+        ledger.void(entry)
+        raise
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from velocity_windows import RollingWindows
+
+ALL_DESTINATIONS = "*"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transfers (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts          REAL NOT NULL,
+    day         TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    cents       INTEGER NOT NULL,
+    voids       INTEGER
+);
+CREATE TABLE IF NOT EXISTS daily_totals (
+    day         TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    cents       INTEGER NOT NULL,
+    PRIMARY KEY (day, destination)
+);
+"""
+
+_ADD_TOTAL = """
+INSERT INTO daily_totals (day, destination, cents) VALUES (?, ?, ?)
+ON CONFLICT (day, destination) DO UPDATE SET cents = cents + excluded.cents
+"""
+
+
+def utc_day(ts: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(ts))
+
+
+class VelocityLedger:
+    """Append-only transfer ledger with O(1) per-day totals, shared across processes."""
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        busy_timeout: float = 10.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        # autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._db = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.windows = RollingWindows()
+        self._horizon = max(self.windows.windows.values())
+        self._seen = 0  # highest ledger id fed into the windows
+
+    def _total(self, day: str, destination: str) -> int:
+        row = self._db.execute(
+            "SELECT cents FROM daily_totals WHERE day = ? AND destination = ?", (day, destination)
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def _append(self, ts: float, day: str, destination: str, cents: int, voids: Optional[int] = None) -> int:
+        cur = self._db.execute(
+            "INSERT INTO transfers (ts, day, destination, cents, voids) VALUES (?, ?, ?, ?, ?)",
+            (ts, day, destination, cents, voids),
+        )
+        self._db.execute(_ADD_TOTAL, (day, destination, cents))
+        self._db.execute(_ADD_TOTAL, (day, ALL_DESTINATIONS, cents))
+        return int(cur.lastrowid)
+
+    def _sync(self, now: float) -> None:
+        """Feed ledger rows appended since the last sync (by any process) into the windows."""
+        rows = self._db.execute(
+            "SELECT id, ts, destination, cents FROM transfers WHERE id > ? AND ts >= ? ORDER BY id",
+            (self._seen, now - self._horizon),
+        ).fetchall()
+        for _, ts, destination, cents in rows:
+            self.windows.add(destination, cents, ts)
+            self.windows.add(ALL_DESTINATIONS, cents, ts)
+        last = self._db.execute("SELECT MAX(id) FROM transfers").fetchone()[0]
+        self._seen = max(self._seen, last or 0)
+
+    def _rolling(self, destination: str, now: float) -> Dict[str, int]:
+        total = self.windows.sums(ALL_DESTINATIONS, now)
+        dest = self.windows.sums(destination, now)
+        out = {f"total_cents_{name}": cents for name, cents in total.items()}
+        out.update({f"dest_cents_{name}": cents for name, cents in dest.items()})
+        return out
+
+    def snapshot(self, destination: str, now: Optional[float] = None) -> Dict[str, int]:
+        """Cents moved overall and to ``destination``: today (UTC) and over each rolling window."""
+        now = now if now is not None else self._clock()
+        day = utc_day(now)
+        with self._lock:
+            self._db.execute("BEGIN")  # one consistent read of totals and new rows
+            try:
+                snap = {
+                    "total_cents_today": self._total(day, ALL_DESTINATIONS),
+                    "dest_cents_today": self._total(day, destination),
+                }
+                self._sync(now)
+            finally:
+                self._db.execute("COMMIT")
+            snap.update(self._rolling(destination, now))
+            return snap
+
+    def commit(
+        self,
+        destination: str,
+        cents: int,
+        total_cap: Optional[int] = None,
+        dest_cap: Optional[int] = None,
+    ) -> Optional[int]:
+        """Append a transfer if the rolling 24 h sums stay under both caps; returns its entry id, or None."""
+        now = self._clock()
+        day = utc_day(now)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync(now)
+                rolling = self._rolling(destination, now)
+                if total_cap is not None and rolling["total_cents_24h"] + cents > total_cap:
+                    self._db.execute("ROLLBACK")
+                    return None
+                if dest_cap is not None and rolling["dest_cents_24h"] + cents > dest_cap:
+                    self._db.execute("ROLLBACK")
+                    return None
+                entry = self._append(now, day, destination, int(cents))
+                self._db.execute("COMMIT")
+                return entry
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def void(self, entry_id: int) -> None:
+        """Reverse a committed entry (the transfer failed) by appending its negation.
+
+        The reversal carries the original's day and timestamp, so it cancels
+        out of the same daily total and rolling-window buckets.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT ts, day, destination, cents FROM transfers WHERE id = ?"
+                    " AND NOT EXISTS (SELECT 1 FROM transfers WHERE voids = ?)",
+                    (entry_id, entry_id),
+                ).fetchone()
+                if row:
+                    ts, day, destination, cents = row
+                    self._append(ts, day, destination, -int(cents), voids=entry_id)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+__all__ = ["ALL_DESTINATIONS", "VelocityLedger", "utc_day"]
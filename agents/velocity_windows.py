@@ -0,0 +1,110 @@
+"""
+Rolling-window sums over per-minute ring buffers.
+
+Caps keyed on a calendar day reset at midnight, so a burst at 23:59 and
+another at 00:01 both pass. ``RollingWindows`` answers "how much in the
+last 24 h / 1 h / 5 min" instead, per key (destination) in constant time:
+
+- each key owns a ring of ``horizon / bucket`` slots (1440 one-minute
+  buckets for 24 h), slot ``minute % n`` holding that minute's total;
+- every window keeps a running sum; when time advances a minute, the
+  bucket that just left each window is subtracted from it, so reading a
+  window never scans buckets;
+- events older than the horizon are dropped; late events inside it land
+  in their own minute's bucket.
+
+Usage:
+    windows = RollingWindows()
+    windows.add("acct_123", 2500, ts)
+    windows.sums("acct_123", now)   # {"24h": 2500, "1h": 2500, "5m": 2500}
+"""
+
+import threading
+from typing import Dict, Optional
+
+WINDOWS: Dict[str, int] = {"24h": 86400, "1h": 3600, "5m": 300}
+
+
+class _Series:
+    def __init__(self, slots: int, spans: Dict[str, int]):
+        self.slots = slots
+        self.spans = spans  # window name -> width in buckets
+        self.values = [0] * slots
+        self.minutes = [-1] * slots  # bucket index each slot currently holds
+        self.sums = {name: 0 for name in spans}
+        self.head: Optional[int] = None
+
+    def advance(self, bucket: int) -> None:
+        if self.head is None:
+            self.head = bucket
+            return
+        if bucket <= self.head:
+            return
+        if bucket - self.head >= self.slots:  # idle past the horizon: everything expired
+            self.values = [0] * self.slots
+            self.minutes = [-1] * self.slots
+            self.sums = {name: 0 for name in self.spans}
+            self.head = bucket
+            return
+        for b in range(self.head + 1, bucket + 1):
+            for name, span in self.spans.items():
+                leaving = b - span
+                slot = leaving % self.slots
+                if self.minutes[slot] == leaving:
+                    self.sums[name] -= self.values[slot]
+            slot = b % self.slots
+            self.values[slot] = 0
+            self.minutes[slot] = b
+        self.head = bucket
+
+    def add(self, bucket: int, amount: int) -> None:
+        self.advance(bucket)
+        age = self.head - bucket
+        if age >= self.slots:
+            return
+        slot = bucket % self.slots
+        if self.minutes[slot] != bucket:
+            self.values[slot] = 0
+            self.minutes[slot] = bucket
+        self.values[slot] += amount
+        for name, span in self.spans.items():
+            if age < span:
+                self.sums[name] += amount
+
+
+class RollingWindows:
+    """Thread-safe per-key rolling sums for several window widths."""
+
+    def __init__(self, windows: Optional[Dict[str, int]] = None, bucket_seconds: int = 60):
+        self.windows = dict(windows or WINDOWS)
+        self.bucket_seconds = bucket_seconds
+        self._spans = {name: max(1, seconds // bucket_seconds) for name, seconds in self.windows.items()}
+        self._slots = max(self._spans.values())
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, ts: float) -> int:
+        return int(ts // self.bucket_seconds)
+
+    def add(self, key: str, amount: int, ts: float) -> None:
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self._slots, self._spans)
+            series.add(self._bucket(ts), int(amount))
+
+    def sums(self, key: str, now: float) -> Dict[str, int]:
+        """Window name -> total for ``key`` over the window ending at ``now``."""
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                return {name: 0 for name in self.windows}
+            series.advance(self._bucket(now))
+            return dict(series.sums)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+__all__ = ["RollingWindows", "WINDOWS"]
@@ -8,6 +8,9 @@ All refund operations are governed by Faramesh policy before execution.
 Usage:
     SHOPIFY_ACCESS_TOKEN=... SHOPIFY_STORE_DOMAIN=... OPENROUTER_API_KEY=... \
     python demo_ecom_agent.py
+
+    # Serve several customers concurrently on one event loop
+    python refund_bot.py "Refund order 11943318520173" "Where is order 11943323697517?"
 """
 import sys, os as _os
 from pathlib import Path as _Path
@@ -39,18 +42,24 @@ _add_faramesh_src()
 # --- end faramesh source resolution ---
 
 
+import asyncio
 import os
 import sys
 import time
 import json
 import uuid
 import re
-from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from datetime import datetime, timezone
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
 # faramesh is resolved via _add_faramesh_src() above
 _script_dir = Path(__file__).resolve().parent
+# Shared demo helpers (action waiter, poll policy, HTTP pool) live in agents/
+sys.path.insert(0, str(_script_dir.parent / "agents"))
 
 try:
     import httpx
@@ -67,6 +76,15 @@ except ImportError:
     print("\033[91m❌ Faramesh SDK not installed. git clone https://github.com/faramesh/faramesh-core.git && pip install -e ./faramesh-core\033[0m")
     sys.exit(1)
 
+from action_waiter import wait_for_decision
+from async_faramesh import shared_async_faramesh
+from http_transport import aclose_async_client, async_client, shared_client, transport_stats
+from poll_policy import PollPolicy
+from refund_index import RefundIndex
+from shopify_limiter import ShopifyLimiter
+from shopify_pages import aiter_orders, iter_orders
+from ttl_cache import NOT_MODIFIED, TTLCache
+
 try:
     from rich.console import Console
     from rich.panel import Panel
@@ -76,7 +94,6 @@ try:
     from rich.style import Style
     from rich.live import Live
     from rich.progress import Progress, SpinnerColumn, TextColumn
-    import threading
     import sys as _sys
     import select
     import termios
@@ -93,6 +110,18 @@ SHOPIFY_SESSION: Dict[str, Any] = {
     "last_order_id": None,
 }
 
+# Evidence older than this is re-fetched before a refund
+EVIDENCE_TTL = 600.0
+
+# Orders and transactions, keyed ("order" | "transactions", order_id). One
+# refund flow reads the same order several times; the TTL matches evidence.
+SHOPIFY_CACHE = TTLCache(maxsize=512, ttl=EVIDENCE_TTL)
+
+# Customer email -> refund times, synced from Shopify by updated_at deltas
+REFUND_INDEX_PATH = os.getenv("REFUNDBOT_INDEX_PATH", str(_script_dir / ".refund_index.sqlite3"))
+_REFUND_INDEX: Optional[RefundIndex] = None
+_REFUND_INDEX_LOCK = threading.Lock()
+
 # Demo orders
 DEMO_ORDERS = [
     {"id": "11943318520173", "amount": 84.85, "expected": "APPROVE"},
@@ -257,13 +286,31 @@ class RefundBotTerminalUI:
         if cmd == "/help":
             if self.console:
                 self.console.print(Text.from_markup(
-                    "\n[bold]Commands:[/bold]  [dim]/help[/dim] [dim]/status[/dim] [dim]/exit[/dim]\n"
+                    "\n[bold]Commands:[/bold]  [dim]/help[/dim] [dim]/status[/dim] [dim]/net[/dim] [dim]/exit[/dim]\n"
                 ))
             return ""
         if cmd == "/status":
             if self.console:
                 self.console.print(Text.from_markup(f"\n  [green]Faramesh[/green] http://127.0.0.1:8000  │  agent:{self.agent}  status:{self.status}\n"))
             return ""
+        if cmd == "/net":
+            if self.console:
+                st = transport_stats()
+                self.console.print(Text.from_markup(
+                    f"\n  [green]HTTP pool[/green] requests:{st['requests']}  connections:{st['connections']}  "
+                    f"tls:{st['tls_handshakes']}  reuse:{st['reuse_ratio']:.0%}  http2:{st['http2']}\n"
+                ))
+                ls = SHOPIFY_LIMITER.stats()
+                self.console.print(Text.from_markup(
+                    f"  [green]Shopify budget[/green] tokens:{ls['tokens']}  throttled:{ls['throttled']}  "
+                    f"retries:{ls['retries']}  queued:{ls['waited_s']}s\n"
+                ))
+                cs = SHOPIFY_CACHE.stats()
+                self.console.print(Text.from_markup(
+                    f"  [green]Order cache[/green] entries:{cs['entries']}  hits:{cs['hits']}  "
+                    f"misses:{cs['misses']}  revalidated:{cs['revalidated']}  coalesced:{cs['coalesced']}\n"
+                ))
+            return ""
         if cmd == "/exit":
             return "quit"
         return None
@@ -335,20 +382,150 @@ def _shopify_base_url() -> str:
     return domain.rstrip("/")
 
 
+# One call budget for every tool, thread and event loop: calls queue for a
+# slot in Shopify's leaky bucket and 429 / 5xx are retried instead of failing.
+SHOPIFY_LIMITER = ShopifyLimiter()
+
+
+def _shopify_url(path: str) -> str:
+    return f"{_shopify_base_url()}/admin/api/2024-01/{path}"
+
+
+def _shopify_get_response(path: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    url = _shopify_url(path)
+    return SHOPIFY_LIMITER.send(
+        lambda: shared_client().get(url, headers={**_shopify_headers(), **(headers or {})}, timeout=30)
+    )
+
+
+async def _shopify_aget_response(path: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    url = _shopify_url(path)
+    return await SHOPIFY_LIMITER.asend(
+        lambda: async_client().get(url, headers={**_shopify_headers(), **(headers or {})}, timeout=30)
+    )
+
+
 def _shopify_get(path: str) -> Dict[str, Any]:
-    url = f"{_shopify_base_url()}/admin/api/2024-01/{path}"
-    resp = httpx.get(url, headers=_shopify_headers(), timeout=30)
+    resp = _shopify_get_response(path)
     resp.raise_for_status()
     return resp.json()
 
 
 def _shopify_post(path: str, data: Dict[str, Any]) -> Dict[str, Any]:
-    url = f"{_shopify_base_url()}/admin/api/2024-01/{path}"
-    resp = httpx.post(url, headers=_shopify_headers(), json=data, timeout=30)
+    url = _shopify_url(path)
+    # Not idempotent: only retried when Shopify refused it (429) or never saw it
+    resp = SHOPIFY_LIMITER.send(
+        lambda: shared_client().post(url, headers=_shopify_headers(), json=data, timeout=30),
+        idempotent=False,
+    )
     resp.raise_for_status()
     return resp.json()
 
 
+async def _shopify_aget(path: str) -> Dict[str, Any]:
+    resp = await _shopify_aget_response(path)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def _shopify_apost(path: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    url = _shopify_url(path)
+    resp = await SHOPIFY_LIMITER.asend(
+        lambda: async_client().post(url, headers=_shopify_headers(), json=data, timeout=30),
+        idempotent=False,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+# =============================================================================
+# Cached Shopify reads
+# =============================================================================
+# A stale entry is revalidated before it is downloaded again: with
+# If-None-Match when Shopify sent an ETag, otherwise by comparing the order's
+# updated_at (a fields=updated_at probe). Transactions are still current while
+# their order's updated_at is unchanged.
+
+def _conditional_headers(stale) -> Dict[str, str]:
+    return {"If-None-Match": stale.etag} if stale is not None and stale.etag else {}
+
+
+def _cache_result(resp: httpx.Response, stale, version_of: Callable[[Dict[str, Any]], Optional[str]]):
+    if resp.status_code == 304 and stale is not None:
+        return NOT_MODIFIED
+    resp.raise_for_status()
+    data = resp.json()
+    return data, resp.headers.get("etag"), version_of(data)
+
+
+def _order_version(data: Dict[str, Any]) -> Optional[str]:
+    return (data.get("order") or {}).get("updated_at")
+
+
+def _needs_probe(stale) -> bool:
+    return stale is not None and not stale.etag and bool(stale.version)
+
+
+def _get_order(order_id: str, revalidate: bool = False) -> Dict[str, Any]:
+    """``orders/{id}.json`` through ``SHOPIFY_CACHE``; returns the order (or {}).
+
+    ``revalidate`` checks even a fresh entry with Shopify first, for reads
+    that decide whether money moves.
+    """
+    def load(stale):
+        if _needs_probe(stale):
+            probe = _shopify_get(f"orders/{order_id}.json?fields=updated_at")
+            if probe.get("order", {}).get("updated_at") == stale.version:
+                return NOT_MODIFIED
+        resp = _shopify_get_response(f"orders/{order_id}.json", _conditional_headers(stale))
+        return _cache_result(resp, stale, _order_version)
+
+    return SHOPIFY_CACHE.get_or_load(("order", order_id), load, revalidate=revalidate).get("order") or {}
+
+
+async def _aget_order(order_id: str, revalidate: bool = False) -> Dict[str, Any]:
+    async def load(stale):
+        if _needs_probe(stale):
+            probe = await _shopify_aget(f"orders/{order_id}.json?fields=updated_at")
+            if probe.get("order", {}).get("updated_at") == stale.version:
+                return NOT_MODIFIED
+        resp = await _shopify_aget_response(f"orders/{order_id}.json", _conditional_headers(stale))
+        return _cache_result(resp, stale, _order_version)
+
+    return (await SHOPIFY_CACHE.aget_or_load(("order", order_id), load, revalidate=revalidate)).get("order") or {}
+
+
+def _get_transactions(order_id: str, order: Dict[str, Any]):
+    """``orders/{id}/transactions.json`` through ``SHOPIFY_CACHE``."""
+    version = order.get("updated_at")
+
+    def load(stale):
+        if stale is not None and version and stale.version == version:
+            return NOT_MODIFIED
+        resp = _shopify_get_response(f"orders/{order_id}/transactions.json", _conditional_headers(stale))
+        return _cache_result(resp, stale, lambda _data: version)
+
+    return SHOPIFY_CACHE.get_or_load(("transactions", order_id), load).get("transactions", [])
+
+
+async def _aget_transactions(order_id: str, order: Dict[str, Any]):
+    version = order.get("updated_at")
+
+    async def load(stale):
+        if stale is not None and version and stale.version == version:
+            return NOT_MODIFIED
+        resp = await _shopify_aget_response(f"orders/{order_id}/transactions.json", _conditional_headers(stale))
+        return _cache_result(resp, stale, lambda _data: version)
+
+    return (await SHOPIFY_CACHE.aget_or_load(("transactions", order_id), load)).get("transactions", [])
+
+
+def _forget_order(order_id: str) -> None:
+    """Drop cached reads of an order after changing it (e.g. a refund)."""
+    SHOPIFY_CACHE.invalidate(("order", order_id))
+    SHOPIFY_CACHE.invalidate(("transactions", order_id))
+
+
 def _order_age_days(created_at: str) -> int:
     try:
         s = (created_at or "").replace("Z", "+00:00")
@@ -366,8 +543,7 @@ def _order_age_days(created_at: str) -> int:
 # =============================================================================
 
 def activate_faramesh_policy():
-    import requests
-    resp = requests.post(
+    resp = shared_client().post(
         "http://127.0.0.1:8000/v1/policies/yaml/ecom_refund_policy/activate",
         headers={"Authorization": "Bearer demo-token"},
         timeout=10,
@@ -375,43 +551,214 @@ def activate_faramesh_policy():
     print(f"{C.CYAN}[FARAMESH] Policy activated: {resp.status_code}{C.END}")
 
 
+# Refund decisions are usually instant; approvals wait on a human in the UI.
+REFUND_POLL_POLICY = PollPolicy(initial=0.005, per_status={"pending_approval": (0.25, 5.0)})
+
+
+APPROVAL_URL = "http://127.0.0.1:8000"
+
+
+def _show_pending(operation_name: str, action_data: Dict[str, Any]) -> None:
+    reason = action_data.get("reason", "Policy requires approval")
+    print(f"\n{C.YELLOW}⏸  ACTION PENDING APPROVAL{C.END}")
+    print(f"   Operation: {operation_name}")
+    print(f"   Reason: {reason}")
+    print(f"\n{C.CYAN}Go to Faramesh UI: {APPROVAL_URL}{C.END}\n")
+
+
 def wait_for_action_result(action_id: str, operation_name: str) -> Dict[str, Any]:
-    approval_url = "http://127.0.0.1:8000"
     shown_pending = False
-    for attempt in range(120):
-        time.sleep(1)
-        try:
-            action_data = get_action(action_id)
-        except Exception as e:
-            if attempt % 5 == 4:
-                print(f"   {C.YELLOW}(poll {attempt + 1}: {e}){C.END}")
-            continue
-        status = action_data.get("status")
-        if status == "pending_approval":
-            if not shown_pending:
-                reason = action_data.get("reason", "Policy requires approval")
-                print(f"\n{C.YELLOW}⏸  ACTION PENDING APPROVAL{C.END}")
-                print(f"   Operation: {operation_name}")
-                print(f"   Reason: {reason}")
-                print(f"\n{C.CYAN}Go to Faramesh UI: {approval_url}{C.END}\n")
-                shown_pending = True
-            continue
-        if status == "allowed":
-            return {"status": "allowed", "data": action_data, "reason": action_data.get("reason"), "risk_level": action_data.get("risk_level"), "id": action_id}
-        if status in ("approved", "completed", "succeeded"):
-            if shown_pending:
-                print(f"\n{C.GREEN}✅ APPROVED! Continuing...{C.END}\n")
-            return {"status": "approved", "data": action_data, "reason": action_data.get("reason"), "risk_level": action_data.get("risk_level"), "id": action_id}
-        if status == "denied":
-            reason = action_data.get("reason", "Policy denied")
-            if _refundbot_ui and _refundbot_ui.console:
-                _refundbot_ui.render_block_banner(reason, action_data.get("risk_level", "high"), operation_name)
-            else:
-                print(f"\n{C.RED}{C.BOLD}🚫 DENIED: {reason}{C.END}\n")
-            return {"status": "denied", "reason": reason, "risk_level": action_data.get("risk_level", "high"), "id": action_id}
-        if status == "failed":
-            return {"status": "failed", "reason": action_data.get("error", "Unknown"), "id": action_id}
-    return {"status": "timeout", "approval_url": approval_url}
+
+    def _on_pending(action_data: Dict[str, Any]) -> None:
+        nonlocal shown_pending
+        _show_pending(operation_name, action_data)
+        shown_pending = True
+
+    stats: Dict[str, Any] = {}
+    action_data = wait_for_decision(
+        action_id,
+        timeout=120,
+        base_url=APPROVAL_URL,
+        token="demo-token",
+        fetch=get_action,
+        on_pending=_on_pending,
+        policy=REFUND_POLL_POLICY,
+        stats=stats,
+    )
+    result = _action_outcome(action_id, action_data, operation_name, shown_pending)
+    result["polls"] = stats.get("polls", 0)
+    return result
+
+
+def _faramesh_async():
+    """This event loop's Faramesh client; its waiter batches every pending action."""
+    return shared_async_faramesh(APPROVAL_URL, token="demo-token", policy=REFUND_POLL_POLICY)
+
+
+async def await_action_result(action: Dict[str, Any], operation_name: str) -> Dict[str, Any]:
+    """``wait_for_action_result`` for coroutine tools; takes the submitted action."""
+    shown_pending = False
+
+    def _on_pending(action_data: Dict[str, Any]) -> None:
+        nonlocal shown_pending
+        _show_pending(operation_name, action_data)
+        shown_pending = True
+
+    stats: Dict[str, Any] = {}
+    action_data = await _faramesh_async().wait_for_decision(
+        action, timeout=120, on_pending=_on_pending, stats=stats
+    )
+    result = _action_outcome(action["id"], action_data, operation_name, shown_pending)
+    result["polls"] = stats.get("polls", 0)
+    return result
+
+
+async def _asubmit(operation: str, params: Dict[str, Any], action_type: str) -> Dict[str, Any]:
+    return await _faramesh_async().submit_action(
+        agent_id="refundbot",
+        tool="shopify",
+        operation=operation,
+        params=params,
+        context={"action_type": action_type},
+    )
+
+
+def _action_outcome(
+    action_id: str, action_data: Optional[Dict[str, Any]], operation_name: str, shown_pending: bool
+) -> Dict[str, Any]:
+    status = action_data.get("status") if action_data else None
+    if action_data is None:
+        result = {"status": "timeout", "approval_url": APPROVAL_URL}
+    elif status == "allowed":
+        result = {"status": "allowed", "data": action_data, "reason": action_data.get("reason"), "risk_level": action_data.get("risk_level"), "id": action_id}
+    elif status in ("approved", "completed", "succeeded"):
+        if shown_pending:
+            print(f"\n{C.GREEN}✅ APPROVED! Continuing...{C.END}\n")
+        result = {"status": "approved", "data": action_data, "reason": action_data.get("reason"), "risk_level": action_data.get("risk_level"), "id": action_id}
+    elif status == "denied":
+        reason = action_data.get("reason", "Policy denied")
+        if _refundbot_ui and _refundbot_ui.console:
+            _refundbot_ui.render_block_banner(reason, action_data.get("risk_level", "high"), operation_name)
+        else:
+            print(f"\n{C.RED}{C.BOLD}🚫 DENIED: {reason}{C.END}\n")
+        result = {"status": "denied", "reason": reason, "risk_level": action_data.get("risk_level", "high"), "id": action_id}
+    else:
+        result = {"status": "failed", "reason": action_data.get("error", "Unknown"), "id": action_id}
+    return result
+
+
+def _remember_evidence(order_id: str, action_id: str) -> None:
+    SHOPIFY_SESSION["evidence"][order_id] = {
+        "action_id": action_id,
+        "fetched_at": time.time(),
+    }
+    SHOPIFY_SESSION["last_order_id"] = order_id
+
+
+def _evidence_is_fresh(order_id: str) -> bool:
+    ev = SHOPIFY_SESSION.get("evidence", {}).get(order_id)
+    return bool(ev) and (time.time() - ev.get("fetched_at", 0)) <= EVIDENCE_TTL
+
+
+def _evidence_action_id(order_id: str) -> str:
+    ev = SHOPIFY_SESSION.get("evidence", {}).get(order_id)
+    return ev.get("action_id", "") if ev else ""
+
+
+def _order_summary(order_id: str, order: Dict[str, Any]) -> str:
+    created = order.get("created_at", "")
+    fs = order.get("financial_status", "")
+    fls = order.get("fulfillment_status") or "unfulfilled"
+    email = order.get("email", "")
+    total = order.get("total_price", "0")
+    line_items = order.get("line_items", [])
+    lines = [
+        f"Order #{order_id}",
+        f"  Total: ${total}  |  Created: {created}",
+        f"  Financial: {fs}  |  Fulfillment: {fls}  |  Email: {email}",
+        f"  Line items: {len(line_items)}",
+    ]
+    return "✅ " + "\n".join(lines)
+
+
+# Only what the search summary shows
+SEARCH_FIELDS = "id,email,created_at,total_price,financial_status,fulfillment_status"
+
+
+def _search_filters(
+    email: str, limit: int, financial_status: str, fulfillment_status: str,
+    created_after: str, created_before: str,
+) -> Dict[str, Any]:
+    """``iter_orders`` filters; one extra row per page shows whether more matches exist."""
+    return {
+        "email": email,
+        "financial_status": financial_status,
+        "fulfillment_status": fulfillment_status,
+        "created_at_min": created_after,
+        "created_at_max": created_before,
+        "fields": SEARCH_FIELDS,
+        "page_size": limit + 1,
+    }
+
+
+def _orders_summary(orders, limit: int) -> str:
+    if not orders:
+        return "✅ No orders found."
+    if len(orders) > limit:
+        lines = [f"Showing the first {limit} matching orders (more exist; narrow the filters or raise limit):"]
+    else:
+        lines = [f"Found {len(orders)} order(s):"]
+    for o in orders[:limit]:
+        if o:
+            lines.append(f"  - {o.get('id')} | ${o.get('total_price','')} | {o.get('financial_status','')} | {o.get('fulfillment_status','') or 'unfulfilled'}")
+    return "✅ " + "\n".join(lines)
+
+
+def _eligibility(order: Dict[str, Any]) -> str:
+    created = order.get("created_at", "")
+    days = _order_age_days(created)
+    fs = order.get("financial_status", "")
+    fls = order.get("fulfillment_status") or "unfulfilled"
+    eligible = days <= 30 and fls == "fulfilled" and fs != "refunded"
+    return json.dumps({
+        "days_since_order": days,
+        "is_delivered": fls == "fulfilled",
+        "is_already_refunded": fs == "refunded",
+        "eligible": eligible,
+    }, indent=2)
+
+
+def _refund_index() -> RefundIndex:
+    """The store's persistent refund index (opened on first use)."""
+    global _REFUND_INDEX
+    with _REFUND_INDEX_LOCK:
+        if _REFUND_INDEX is None:
+            _REFUND_INDEX = RefundIndex(REFUND_INDEX_PATH, store=_shopify_base_url())
+        return _REFUND_INDEX
+
+
+def _record_refund(order_id: str, order: Dict[str, Any], data: Dict[str, Any]) -> None:
+    """Count a refund just issued before the index's next refresh picks it up."""
+    refund = data.get("refund") or {}
+    if refund:
+        _refund_index().record_refund(order_id, order.get("email", ""), refund)
+
+
+def _after_refund(order_id: str, order: Dict[str, Any], data: Dict[str, Any]) -> None:
+    """Drop cached reads and index a refund Shopify has already issued.
+
+    Never raises: reporting "❌ Error" for a refund that went through would
+    invite the agent to retry it and refund twice.
+    """
+    try:
+        _forget_order(order_id)
+        _record_refund(order_id, order, data)
+    except Exception as e:
+        print(f"{C.YELLOW}⚠ Refund issued but not indexed for order {order_id}: {e}{C.END}")
+
+
+def _parse_count(count_str: str) -> int:
+    return int(count_str.strip()) if (count_str and count_str.strip().isdigit()) else 0
 
 
 # =============================================================================
@@ -431,49 +778,41 @@ def get_order_details(order_id: str) -> str:
         )
         action_id = action["id"]
         print(f"{C.CYAN}🧾 Submitted: get_order_details({order_id}) → {action_id[:8]}{C.END}")
-        time.sleep(0.5)
         result = wait_for_action_result(action_id, "get_order_details")
         if result["status"] not in ["completed", "approved", "allowed"]:
             return f"❌ Order fetch blocked: {result.get('reason', result['status'])}"
 
-        data = _shopify_get(f"orders/{order_id}.json")
-        order = data.get("order", {})
+        order = _get_order(order_id)
         if not order:
             return "❌ Order not found."
 
-        created = order.get("created_at", "")
-        fs = order.get("financial_status", "")
-        fls = order.get("fulfillment_status") or "unfulfilled"
-        email = order.get("email", "")
-        total = order.get("total_price", "0")
-        line_items = order.get("line_items", [])
-
-        SHOPIFY_SESSION["evidence"][order_id] = {
-            "action_id": action_id,
-            "fetched_at": time.time(),
-        }
-        SHOPIFY_SESSION["last_order_id"] = order_id
-
-        lines = [
-            f"Order #{order_id}",
-            f"  Total: ${total}  |  Created: {created}",
-            f"  Financial: {fs}  |  Fulfillment: {fls}  |  Email: {email}",
-            f"  Line items: {len(line_items)}",
-        ]
-        return "✅ " + "\n".join(lines)
+        _remember_evidence(order_id, action_id)
+        return _order_summary(order_id, order)
     except Exception as e:
         return f"❌ Error: {e}"
 
 
 @tool
-def search_orders(email: str = "", order_id: str = "", limit: int = 10) -> str:
-    """Search orders by customer email or order ID."""
+def search_orders(
+    email: str = "",
+    order_id: str = "",
+    limit: int = 10,
+    financial_status: str = "",
+    fulfillment_status: str = "",
+    created_after: str = "",
+    created_before: str = "",
+) -> str:
+    """Search orders by customer email or order ID. Optional filters: financial_status (e.g. paid, refunded), fulfillment_status (e.g. shipped, unshipped), created_after / created_before (ISO 8601 dates). Returns up to limit orders."""
     try:
         action = submit_action(
             agent_id="refundbot",
             tool="shopify",
             operation="search_orders",
-            params={"email": email, "order_id": order_id, "limit": limit},
+            params={
+                "email": email, "order_id": order_id, "limit": limit,
+                "financial_status": financial_status, "fulfillment_status": fulfillment_status,
+                "created_after": created_after, "created_before": created_before,
+            },
             context={"action_type": "shopify_search_orders"},
         )
         print(f"{C.CYAN}🔍 Submitted: search_orders → {action['id'][:8]}{C.END}")
@@ -482,19 +821,13 @@ def search_orders(email: str = "", order_id: str = "", limit: int = 10) -> str:
             return f"❌ Search blocked: {result.get('reason', result['status'])}"
 
         if order_id:
-            data = _shopify_get(f"orders/{order_id}.json")
-            orders = [data.get("order")] if data.get("order") else []
+            order = _get_order(order_id)
+            orders = [order] if order else []
         else:
-            data = _shopify_get(f"orders.json?limit={limit}" + (f"&email={email}" if email else ""))
-            orders = data.get("orders", [])
-
-        if not orders:
-            return "✅ No orders found."
-        lines = [f"Found {len(orders)} order(s):"]
-        for o in orders[:limit]:
-            if o:
-                lines.append(f"  - {o.get('id')} | ${o.get('total_price','')} | {o.get('financial_status','')} | {o.get('fulfillment_status','') or 'unfulfilled'}")
-        return "✅ " + "\n".join(lines)
+            filters = _search_filters(email, limit, financial_status, fulfillment_status, created_after, created_before)
+            # Stops paging as soon as limit + 1 matches have arrived
+            orders = list(islice(iter_orders(_shopify_get_response, **filters), limit + 1))
+        return _orders_summary(orders, limit)
     except Exception as e:
         return f"❌ Error: {e}"
 
@@ -503,28 +836,17 @@ def search_orders(email: str = "", order_id: str = "", limit: int = 10) -> str:
 def check_return_eligibility(order_id: str, reason: str) -> str:
     """Check if an order is eligible for refund based on age, fulfillment, and financial status."""
     try:
-        data = _shopify_get(f"orders/{order_id}.json")
-        order = data.get("order", {})
+        order = _get_order(order_id)
         if not order:
             return "❌ Order not found."
-        created = order.get("created_at", "")
-        days = _order_age_days(created)
-        fs = order.get("financial_status", "")
-        fls = order.get("fulfillment_status") or "unfulfilled"
-        eligible = days <= 30 and fls == "fulfilled" and fs != "refunded"
-        return json.dumps({
-            "days_since_order": days,
-            "is_delivered": fls == "fulfilled",
-            "is_already_refunded": fs == "refunded",
-            "eligible": eligible,
-        }, indent=2)
+        return _eligibility(order)
     except Exception as e:
         return f"❌ Error: {e}"
 
 
 @tool
 def get_customer_refund_count(customer_email: str, days: int = 90) -> str:
-    """Get count of refunded orders for a customer in the last N days."""
+    """Get count of a customer's orders with a full or partial refund issued in the last N days."""
     try:
         action = submit_action(
             agent_id="refundbot",
@@ -538,11 +860,9 @@ def get_customer_refund_count(customer_email: str, days: int = 90) -> str:
         if result["status"] not in ["completed", "approved", "allowed"]:
             return f"❌ Refund count blocked: {result.get('reason', result['status'])}"
 
-        since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%S")
-        data = _shopify_get(f"orders.json?financial_status=refunded&created_at_min={since}&limit=250")
-        orders = data.get("orders", [])
-        count = sum(1 for o in orders if (o.get("email") or "").lower() == customer_email.lower())
-        return str(count)
+        index = _refund_index()
+        index.refresh(_shopify_get_response)
+        return str(index.count(customer_email, days))
     except Exception as e:
         return f"❌ Error: {e}"
 
@@ -554,6 +874,154 @@ def _format_memo(reason: str, ticket_num: str = "10492") -> str:
     return f"REFUND-{ticket_num} - {clean}"
 
 
+def _refund_memo(reason: str) -> str:
+    digits = "".join(filter(str.isdigit, reason))
+    ticket_num = digits[:10] if len(digits) <= 10 else "10492"
+    ticket_num = ticket_num or "10492"
+    return _format_memo(reason, ticket_num)
+
+
+def _refund_params(order_id: str, amount: float, memo: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Policy params for ``refund_execute`` from the prefetched inputs."""
+    order = inputs["order"]
+    return {
+        "order_id": order_id,
+        "amount": amount,
+        "memo": memo,
+        "evidence_action_id": inputs["evidence_action_id"],
+        "order_age_days": _order_age_days(order.get("created_at", "")),
+        "financial_status": order.get("financial_status", "unknown"),
+        "fulfillment_status": order.get("fulfillment_status") or "unfulfilled",
+        "customer_refund_count_90d": inputs["customer_refund_count_90d"],
+    }
+
+
+# =============================================================================
+# Refund prefetch
+# =============================================================================
+# A refund decision needs the order, fresh evidence (a governed get_order)
+# and the customer's 90-day refund count (a governed lookup keyed by the
+# order's email). The order comes first; evidence and the refund count then
+# run side by side, so the wait is the slowest chain rather than the sum of
+# every read. The capture transaction is not prefetched: an approval can
+# take minutes, so it is read after the decision (see _capture_after_decision).
+
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="refund-prefetch")
+
+
+def _refund_count_or_zero(count_str: Any) -> int:
+    return _parse_count(count_str) if isinstance(count_str, str) else 0
+
+
+def _prefetch_refund_inputs(order_id: str) -> Dict[str, Any]:
+    """Order, evidence action ID and 90-day refund count for a refund decision."""
+    inputs: Dict[str, Any] = {
+        # policy reads financial_status from this: never trust a cached copy
+        "order": _get_order(order_id, revalidate=True),
+        "evidence_action_id": "",
+        "customer_refund_count_90d": 0,
+    }
+    order = inputs["order"]
+    if order:
+        evidence = None
+        if not _evidence_is_fresh(order_id):
+            evidence = _PREFETCH_POOL.submit(get_order_details.invoke, {"order_id": order_id})
+        try:
+            count_str = get_customer_refund_count.invoke({"customer_email": order.get("email", ""), "days": 90})
+            inputs["customer_refund_count_90d"] = _refund_count_or_zero(count_str)
+        except Exception:
+            pass
+        if evidence is not None:
+            evidence.result()
+        inputs["evidence_action_id"] = _evidence_action_id(order_id)
+    return inputs
+
+
+async def _aprefetch_refund_inputs(order_id: str) -> Dict[str, Any]:
+    inputs: Dict[str, Any] = {
+        "order": await _aget_order(order_id, revalidate=True),
+        "evidence_action_id": "",
+        "customer_refund_count_90d": 0,
+    }
+    order = inputs["order"]
+    if order:
+        reads = [get_customer_refund_count.ainvoke({"customer_email": order.get("email", ""), "days": 90})]
+        if not _evidence_is_fresh(order_id):
+            reads.append(get_order_details.ainvoke({"order_id": order_id}))
+        results = await asyncio.gather(*reads, return_exceptions=True)
+        inputs["customer_refund_count_90d"] = _refund_count_or_zero(results[0])
+        inputs["evidence_action_id"] = _evidence_action_id(order_id)
+    return inputs
+
+
+def _capture_after_decision(order_id: str, order: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Revalidated order and its capture transaction, read once the refund is approved.
+
+    The transactions cache is keyed by the order's ``updated_at``, so a
+    change during the approval wait reloads them; otherwise the cached
+    list is still current.
+    """
+    order = _get_order(order_id, revalidate=True) or order
+    return order, _capture_transaction(_get_transactions(order_id, order))
+
+
+async def _acapture_after_decision(
+    order_id: str, order: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    order = await _aget_order(order_id, revalidate=True) or order
+    return order, _capture_transaction(await _aget_transactions(order_id, order))
+
+
+def _report_blocked_refund(
+    order_id: str, amount: float, action_id: str, action: Dict[str, Any], result: Dict[str, Any]
+) -> str:
+    flag_for_human_review.invoke({
+        "order_id": order_id,
+        "reason": result.get("reason", "Policy blocked"),
+        "risk_level": result.get("risk_level", "HIGH"),
+    })
+    if _refundbot_ui and _refundbot_ui.console:
+        _refundbot_ui.render_decision_receipt(
+            action_id,
+            "denied",
+            result.get("reason", "Policy blocked"),
+            action.get("policy_version", "unknown"),
+        )
+        ww_body = Text()
+        ww_body.append("Without Faramesh, $", style="yellow")
+        ww_body.append(f"{amount}", style="yellow")
+        ww_body.append(" would have been auto-approved and processed.\n", style="yellow")
+        ww_body.append("At 1000 refund requests/month with 15% policy violations — that's ", style="yellow")
+        ww_body.append(f"${1000 * 0.15 * amount:,.0f}/month", style="bold yellow")
+        ww_body.append(" in potential leakage protected.", style="yellow")
+        _refundbot_ui.console.print(Panel(ww_body, title="What Would Have Happened Without Faramesh", border_style="yellow"))
+    return f"❌ Refund blocked: {result.get('reason', 'Policy block')}"
+
+
+def _capture_transaction(transactions) -> Optional[Dict[str, Any]]:
+    return next(
+        (t for t in transactions
+         if t.get("kind") in ("capture", "sale")
+         or (t.get("gateway") and t.get("status") == "success")),
+        transactions[0] if transactions else None,
+    )
+
+
+def _refund_body(parent_id: Any, amount: float, memo: str) -> Dict[str, Any]:
+    return {
+        "refund": {
+            "notify": True,
+            "note": memo,
+            "transactions": [{
+                "parent_id": parent_id,
+                "amount": str(amount),
+                "kind": "refund",
+                "gateway": "manual",
+            }],
+        },
+    }
+
+
 @tool
 def issue_refund(order_id: str, amount: float, reason: str) -> str:
     """Issue a refund for an order. Requires get_order_details to be called first. Policy governs execution."""
@@ -562,48 +1030,16 @@ def issue_refund(order_id: str, amount: float, reason: str) -> str:
         amount = float(amount)
         reason = (reason or "").strip()
 
-        # Ensure fresh evidence
-        ev = SHOPIFY_SESSION.get("evidence", {}).get(order_id)
-        if not ev or (time.time() - ev.get("fetched_at", 0)) > 600:
-            get_order_details.invoke({"order_id": order_id})
-            ev = SHOPIFY_SESSION.get("evidence", {}).get(order_id)
-        evidence_action_id = ev.get("action_id", "") if ev else ""
-
-        data = _shopify_get(f"orders/{order_id}.json")
-        order = data.get("order", {})
+        # Fresh evidence, the order and refund history, read concurrently
+        inputs = _prefetch_refund_inputs(order_id)
+        order = inputs["order"]
         if not order:
             return "❌ Order not found."
 
-        created = order.get("created_at", "")
-        order_age_days = _order_age_days(created)
-        financial_status = order.get("financial_status", "unknown")
-        fulfillment_status = order.get("fulfillment_status") or "unfulfilled"
-        customer_email = order.get("email", "")
-
-        try:
-            count_str = get_customer_refund_count.invoke({"customer_email": customer_email, "days": 90})
-            customer_refund_count_90d = int(count_str.strip()) if (count_str and count_str.strip().isdigit()) else 0
-        except Exception:
-            customer_refund_count_90d = 0
-
-        digits = "".join(filter(str.isdigit, reason))
-        ticket_num = digits[:10] if len(digits) <= 10 else "10492"
-        ticket_num = ticket_num or "10492"
-        memo = _format_memo(reason, ticket_num)
-
-        params = {
-            "order_id": order_id,
-            "amount": amount,
-            "memo": memo,
-            "evidence_action_id": evidence_action_id,
-            "order_age_days": order_age_days,
-            "financial_status": financial_status,
-            "fulfillment_status": fulfillment_status,
-            "customer_refund_count_90d": customer_refund_count_90d,
-        }
+        memo = _refund_memo(reason)
+        params = _refund_params(order_id, amount, memo, inputs)
 
         print(f"{C.YELLOW}📡 Submitting refund: ${amount} for order {order_id}{C.END}")
-        time.sleep(0.5)
 
         action = submit_action(
             agent_id="refundbot",
@@ -619,54 +1055,148 @@ def issue_refund(order_id: str, amount: float, reason: str) -> str:
             return f"⏱ Refund pending approval at http://127.0.0.1:8000. Do NOT retry."
 
         if result["status"] not in ["completed", "approved", "allowed"]:
-            flag_for_human_review.invoke({
-                "order_id": order_id,
-                "reason": result.get("reason", "Policy blocked"),
-                "risk_level": result.get("risk_level", "HIGH"),
-            })
-            if _refundbot_ui and _refundbot_ui.console:
-                _refundbot_ui.render_decision_receipt(
-                    action_id,
-                    "denied",
-                    result.get("reason", "Policy blocked"),
-                    action.get("policy_version", "unknown"),
-                )
-                ww_body = Text()
-                ww_body.append("Without Faramesh, $", style="yellow")
-                ww_body.append(f"{amount}", style="yellow")
-                ww_body.append(" would have been auto-approved and processed.\n", style="yellow")
-                ww_body.append("At 1000 refund requests/month with 15% policy violations — that's ", style="yellow")
-                ww_body.append(f"${1000 * 0.15 * amount:,.0f}/month", style="bold yellow")
-                ww_body.append(" in potential leakage protected.", style="yellow")
-                _refundbot_ui.console.print(Panel(ww_body, title="What Would Have Happened Without Faramesh", border_style="yellow"))
-            return f"❌ Refund blocked: {result.get('reason', 'Policy block')}"
-
-        txn_data = _shopify_get(f"orders/{order_id}/transactions.json")
-        transactions = txn_data.get("transactions", [])
-        capture = next(
-            (t for t in transactions
-             if t.get("kind") in ("capture", "sale")
-             or (t.get("gateway") and t.get("status") == "success")),
-            transactions[0] if transactions else None,
-        )
+            return _report_blocked_refund(order_id, amount, action_id, action, result)
+
+        order, capture = _capture_after_decision(order_id, order)
         if not capture:
             return "❌ No capture transaction found for refund."
 
-        parent_id = capture.get("id")
-        refund_body = {
-            "refund": {
-                "notify": True,
-                "note": memo,
-                "transactions": [{
-                    "parent_id": parent_id,
-                    "amount": str(amount),
-                    "kind": "refund",
-                    "gateway": "manual",
-                }],
+        data = _shopify_post(f"orders/{order_id}/refunds.json", _refund_body(capture.get("id"), amount, memo))
+        _after_refund(order_id, order, data)
+        refund = data.get("refund", {})
+        refund_id = refund.get("id", "unknown")
+        print(f"{C.GREEN}✅ Refund successful: {refund_id}{C.END}")
+        return f"✅ Refund successful: {refund_id} | ${amount}"
+
+    except Exception as e:
+        return f"❌ Error: {e}"
+
+
+# =============================================================================
+# Async tool implementations
+# =============================================================================
+# Same behaviour as the tools above, but every Faramesh and Shopify call is
+# awaited, so ``tool.ainvoke()`` lets one event loop serve many conversations.
+
+async def _aget_order_details(order_id: str) -> str:
+    try:
+        action = await _asubmit("get_order", {"order_id": order_id}, "shopify_get_order")
+        action_id = action["id"]
+        print(f"{C.CYAN}🧾 Submitted: get_order_details({order_id}) → {action_id[:8]}{C.END}")
+        result = await await_action_result(action, "get_order_details")
+        if result["status"] not in ["completed", "approved", "allowed"]:
+            return f"❌ Order fetch blocked: {result.get('reason', result['status'])}"
+
+        order = await _aget_order(order_id)
+        if not order:
+            return "❌ Order not found."
+
+        _remember_evidence(order_id, action_id)
+        return _order_summary(order_id, order)
+    except Exception as e:
+        return f"❌ Error: {e}"
+
+
+async def _asearch_orders(
+    email: str = "",
+    order_id: str = "",
+    limit: int = 10,
+    financial_status: str = "",
+    fulfillment_status: str = "",
+    created_after: str = "",
+    created_before: str = "",
+) -> str:
+    try:
+        action = await _asubmit(
+            "search_orders",
+            {
+                "email": email, "order_id": order_id, "limit": limit,
+                "financial_status": financial_status, "fulfillment_status": fulfillment_status,
+                "created_after": created_after, "created_before": created_before,
             },
-        }
+            "shopify_search_orders",
+        )
+        print(f"{C.CYAN}🔍 Submitted: search_orders → {action['id'][:8]}{C.END}")
+        result = await await_action_result(action, "search_orders")
+        if result["status"] not in ["completed", "approved", "allowed"]:
+            return f"❌ Search blocked: {result.get('reason', result['status'])}"
+
+        if order_id:
+            order = await _aget_order(order_id)
+            orders = [order] if order else []
+        else:
+            filters = _search_filters(email, limit, financial_status, fulfillment_status, created_after, created_before)
+            orders = []
+            async for order in aiter_orders(_shopify_aget_response, **filters):
+                orders.append(order)
+                if len(orders) > limit:
+                    break
+        return _orders_summary(orders, limit)
+    except Exception as e:
+        return f"❌ Error: {e}"
+
+
+async def _acheck_return_eligibility(order_id: str, reason: str) -> str:
+    try:
+        order = await _aget_order(order_id)
+        if not order:
+            return "❌ Order not found."
+        return _eligibility(order)
+    except Exception as e:
+        return f"❌ Error: {e}"
+
+
+async def _aget_customer_refund_count(customer_email: str, days: int = 90) -> str:
+    try:
+        action = await _asubmit(
+            "get_refund_count",
+            {"customer_email": customer_email, "days": days},
+            "shopify_get_refund_count",
+        )
+        print(f"{C.CYAN}📊 Submitted: get_customer_refund_count({customer_email}) → {action['id'][:8]}{C.END}")
+        result = await await_action_result(action, "get_customer_refund_count")
+        if result["status"] not in ["completed", "approved", "allowed"]:
+            return f"❌ Refund count blocked: {result.get('reason', result['status'])}"
+
+        index = _refund_index()
+        await index.arefresh(_shopify_aget_response)
+        return str(index.count(customer_email, days))
+    except Exception as e:
+        return f"❌ Error: {e}"
+
+
+async def _aissue_refund(order_id: str, amount: float, reason: str) -> str:
+    try:
+        order_id = str(order_id).strip()
+        amount = float(amount)
+        reason = (reason or "").strip()
 
-        data = _shopify_post(f"orders/{order_id}/refunds.json", refund_body)
+        inputs = await _aprefetch_refund_inputs(order_id)
+        order = inputs["order"]
+        if not order:
+            return "❌ Order not found."
+
+        memo = _refund_memo(reason)
+        params = _refund_params(order_id, amount, memo, inputs)
+
+        print(f"{C.YELLOW}📡 Submitting refund: ${amount} for order {order_id}{C.END}")
+
+        action = await _asubmit("refund_execute", params, "shopify_refund")
+        action_id = action["id"]
+        result = await await_action_result(action, "issue_refund")
+
+        if result["status"] in ("timeout", "error"):
+            return "⏱ Refund pending approval at http://127.0.0.1:8000. Do NOT retry."
+
+        if result["status"] not in ["completed", "approved", "allowed"]:
+            return _report_blocked_refund(order_id, amount, action_id, action, result)
+
+        order, capture = await _acapture_after_decision(order_id, order)
+        if not capture:
+            return "❌ No capture transaction found for refund."
+
+        data = await _shopify_apost(f"orders/{order_id}/refunds.json", _refund_body(capture.get("id"), amount, memo))
+        _after_refund(order_id, order, data)
         refund = data.get("refund", {})
         refund_id = refund.get("id", "unknown")
         print(f"{C.GREEN}✅ Refund successful: {refund_id}{C.END}")
@@ -676,6 +1206,13 @@ def issue_refund(order_id: str, amount: float, reason: str) -> str:
         return f"❌ Error: {e}"
 
 
+get_order_details.coroutine = _aget_order_details
+search_orders.coroutine = _asearch_orders
+check_return_eligibility.coroutine = _acheck_return_eligibility
+get_customer_refund_count.coroutine = _aget_customer_refund_count
+issue_refund.coroutine = _aissue_refund
+
+
 @tool
 def flag_for_human_review(order_id: str, reason: str, risk_level: str = "MEDIUM") -> str:
     """Flag an order for human review when policy blocks automatic refund."""
@@ -724,6 +1261,7 @@ def create_agent(api_key: str):
         temperature=0,
         max_tokens=4096,  # Free tier friendly
         http_client=httpx.Client(headers={"HTTP-Referer": "http://localhost", "X-Title": "RefundBot"}),
+        http_async_client=httpx.AsyncClient(headers={"HTTP-Referer": "http://localhost", "X-Title": "RefundBot"}),
     )
     tools = [
         get_order_details,
@@ -840,6 +1378,32 @@ def run_interactive_chat(llm, tools):
             print(f"\n{C.RED}Error: {e}{C.END}\n")
 
 
+async def arespond(llm, tools, user_input: str, chat_history: Optional[List[Any]] = None) -> str:
+    """One conversation turn without blocking the loop: ``ainvoke`` for the LLM and every tool."""
+    messages = [SystemMessage(content=SYSTEM_PROMPT), *(chat_history or []), HumanMessage(content=user_input)]
+    resp = await llm.ainvoke(messages)
+    for _ in range(12):
+        if not getattr(resp, "tool_calls", None):
+            break
+        messages.append(resp)
+        for tc in resp.tool_calls:
+            tool_func = next((t for t in tools if t.name == tc["name"]), None)
+            if tool_func:
+                out = await tool_func.ainvoke(tc.get("args", {}))
+                messages.append(ToolMessage(content=str(out), tool_call_id=tc["id"]))
+        resp = await llm.ainvoke(messages)
+    return resp.content or str(resp) or "Refund processed. I've completed the requested action."
+
+
+async def serve_conversations(llm, tools, prompts: List[str]) -> List[str]:
+    """Answer each prompt as a separate customer, all concurrently on this loop."""
+    try:
+        return await asyncio.gather(*(arespond(llm, tools, p) for p in prompts))
+    finally:
+        await _faramesh_async().close()
+        await aclose_async_client()
+
+
 # =============================================================================
 # Main
 # =============================================================================
@@ -862,6 +1426,12 @@ def main():
 
     llm, tools = create_agent(api_key)
     print(f"{C.GREEN}✓ Agent ready{C.END}\n")
+    prompts = sys.argv[1:]
+    if prompts:
+        replies = asyncio.run(serve_conversations(llm, tools, prompts))
+        for prompt, reply in zip(prompts, replies):
+            print(f"\n{C.BOLD}> {prompt}{C.END}\n{reply}")
+        return
     run_interactive_chat(llm, tools)
 
 
@@ -14,11 +14,9 @@ Usage:
 
 import os
 import sys
-import time
 import json
 import subprocess
 import webbrowser
-import requests
 from typing import Dict, Any, List
 
 
@@ -41,6 +39,13 @@ except ImportError:
     print(f"{C.RED}❌ Faramesh SDK not installed{C.END}")
     sys.exit(1)
 
+# Shared demo helpers (action waiter, poll policy, HTTP pool) live in agents/
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "agents"))
+)
+from action_waiter import wait_for_decision
+from http_transport import shared_session
+
 
 # ==============================================================================
 # Configuration
@@ -69,44 +74,54 @@ def wait_for_action_result(action_id: str, operation_name: str) -> Dict[str, Any
     approval_url = "http://localhost:3000/approvals"
     shown_pending_message = False
 
-    for attempt in range(120):  # 2 minutes max
-        time.sleep(1)
-
-        # Get action status
-        action_data = get_action(action_id)
-        status = action_data.get("status")
-
-        if status == "pending_approval":
-            if not shown_pending_message:
-                reason = action_data.get("reason", "Policy requires approval")
-                print(f"\n{C.YELLOW}⏸  ACTION PENDING APPROVAL{C.END}")
-                print(f"   Operation: {operation_name}")
-                print(f"   Reason: {reason}")
-                print(f"\n{C.CYAN}🌐 Go to Faramesh UI to approve/deny:{C.END}")
-                print(f"   {C.BOLD}{approval_url}{C.END}")
-                print(
-                    f"\n{C.YELLOW}⏳ Waiting for your decision (I'll wait here)...{C.END}\n"
-                )
-                shown_pending_message = True
-            continue
-
-        elif status in ["approved", "completed"]:
-            if shown_pending_message:
-                print(f"\n{C.GREEN}✅ APPROVED! Continuing...{C.END}\n")
-            return {"status": status, "data": action_data}
-
-        elif status == "denied":
-            reason = action_data.get("reason", "Policy denied")
-            print(f"\n{C.RED}🚫 DENIED: {reason}{C.END}")
-            print(
-                f"{C.YELLOW}I can't do this action, but I'll continue with other tasks...{C.END}\n"
-            )
-            return {"status": "denied", "reason": reason}
+    def _on_pending(action_data: Dict[str, Any]) -> None:
+        nonlocal shown_pending_message
+        reason = action_data.get("reason", "Policy requires approval")
+        print(f"\n{C.YELLOW}⏸  ACTION PENDING APPROVAL{C.END}")
+        print(f"   Operation: {operation_name}")
+        print(f"   Reason: {reason}")
+        print(f"\n{C.CYAN}🌐 Go to Faramesh UI to approve/deny:{C.END}")
+        print(f"   {C.BOLD}{approval_url}{C.END}")
+        print(
+            f"\n{C.YELLOW}⏳ Waiting for your decision (I'll wait here)...{C.END}\n"
+        )
+        shown_pending_message = True
+
+    # Returns as soon as the decision exists (2 minutes max)
+    stats: Dict[str, Any] = {}
+    action_data = wait_for_decision(
+        action_id,
+        timeout=120,
+        base_url="http://127.0.0.1:8000",
+        token="demo-token",
+        fetch=get_action,
+        on_pending=_on_pending,
+        stats=stats,
+    )
+    if os.getenv("FARAMESH_DEBUG") == "1":
+        print(f"[DEBUG] {operation_name}: {stats['polls']} polls in {stats['elapsed']:.2f}s ({stats['mode']})")
+    status = action_data.get("status") if action_data else None
+
+    if status in ["approved", "completed"]:
+        if shown_pending_message:
+            print(f"\n{C.GREEN}✅ APPROVED! Continuing...{C.END}\n")
+        return {"status": status, "data": action_data}
+
+    elif status == "denied":
+        reason = action_data.get("reason", "Policy denied")
+        print(f"\n{C.RED}🚫 DENIED: {reason}{C.END}")
+        print(
+            f"{C.YELLOW}I can't do this action, but I'll continue with other tasks...{C.END}\n"
+        )
+        return {"status": "denied", "reason": reason}
+
+    elif status == "failed":
+        error = action_data.get("error", "Unknown error")
+        print(f"\n{C.RED}❌ Action failed: {error}{C.END}\n")
+        return {"status": "failed", "error": error}
 
-        elif status == "failed":
-            error = action_data.get("error", "Unknown error")
-            print(f"\n{C.RED}❌ Action failed: {error}{C.END}\n")
-            return {"status": "failed", "error": error}
+    elif status is not None:
+        return {"status": status, "data": action_data}
 
     print(f"\n{C.YELLOW}⏱ Timeout waiting for action{C.END}\n")
     return {"status": "timeout"}
@@ -297,7 +312,7 @@ Always be conversational and helpful!""",
     messages.append({"role": "user", "content": user_message})
 
     try:
-        response = requests.post(
+        response = shared_session().post(
             "https://openrouter.ai/api/v1/chat/completions",
             headers={
                 "Authorization": f"Bearer {api_key}",
@@ -472,7 +487,7 @@ def activate_policy(policy_file: str):
     print(f"{C.CYAN}Activating policy: {policy_file}...{C.END}")
 
     try:
-        resp = requests.post(
+        resp = shared_session().post(
             f"http://127.0.0.1:8000/v1/policies/yaml/{policy_file}/activate",
             headers={"Authorization": "Bearer demo-token"},
         )
@@ -303,6 +303,15 @@ except ImportError:
     print(f"{C.RED}❌ Faramesh SDK not installed{C.END}")
     sys.exit(1)
 
+# Shared demo helpers (action waiter, poll policy, HTTP pool) live in agents/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "agents"))
+from action_waiter import wait_for_decision
+from allowlist_store import AllowlistStore
+from velocity_ledger import VelocityLedger
+from http_transport import use_for_stripe
+from stripe_access import retrieve_many as _stripe_retrieve_many
+from stripe_lists import bounded_lines, iter_projected
+
 # ==============================================================================
 # Configuration
 # ==============================================================================
@@ -331,7 +340,9 @@ def setup_stripe():
         print(f"{C.RED}❌ STRIPE_SECRET_KEY not set{C.END}")
         sys.exit(1)
     stripe.api_key = key
-    _ensure_allowlist_file()
+    # Reuse keep-alive connections to api.stripe.com across tool calls
+    use_for_stripe()
+    ALLOWLIST.ensure_file()
     print(f"{C.GREEN}✓ Stripe configured{C.END}")
 
 
@@ -387,24 +398,6 @@ def _pretty(obj) -> str:
     except Exception:
         return str(obj)[:6000]
 
-def _stripe_retrieve_any(object_id: str):
-    # Common Stripe ID prefixes
-    if object_id.startswith("cus_"):
-        return stripe.Customer.retrieve(object_id)
-    if object_id.startswith("pi_"):
-        return stripe.PaymentIntent.retrieve(object_id)
-    if object_id.startswith("ch_"):
-        return stripe.Charge.retrieve(object_id)
-    if object_id.startswith("re_"):
-        return stripe.Refund.retrieve(object_id)
-    if object_id.startswith("evt_"):
-        return stripe.Event.retrieve(object_id)
-    if object_id.startswith("acct_"):
-        return stripe.Account.retrieve(object_id)
-    if object_id.startswith("tr_"):
-        return stripe.Transfer.retrieve(object_id)
-    raise ValueError(f"Unsupported Stripe object id prefix: {object_id}")
-
 @tool
 def stripe_create_customer(email: str, name: str = "") -> str:
     """Create a Stripe Customer (email + optional name)."""
@@ -476,26 +469,25 @@ def stripe_allowlist_destination(account_id: str, label: str = "") -> str:
         if res["status"] not in ["completed", "approved", "allowed"]:
             return f"❌ Allowlist blocked: {res.get('reason', res['status'])}"
 
-        data = _load_allowlist()
-        entry = _get_allowlist_entry(acct)
-
-        if entry:
-            entry["approved"] = True
-            if lbl:
-                entry["label"] = lbl
-        else:
-            data.setdefault("destinations", []).append(
-                {
-                    "account_id": acct,
-                    "label": lbl or acct,
-                    "approved": True,
-                    "added_at": int(time.time()),
-                }
-            )
+        def approve(data: dict):
+            entry = next((d for d in data["destinations"] if d.get("account_id") == acct), None)
+            if entry:
+                entry["approved"] = True
+                if lbl:
+                    entry["label"] = lbl
+            else:
+                data["destinations"].append(
+                    {
+                        "account_id": acct,
+                        "label": lbl or acct,
+                        "approved": True,
+                        "added_at": int(time.time()),
+                    }
+                )
 
-        _save_allowlist(data)
+        allow = ALLOWLIST.update(approve)
 
-        return f"✅ Allowlisted destination: {acct}\nlabel={_destination_label(acct)}\nDo NOT call this tool again for this account."
+        return f"✅ Allowlisted destination: {acct}\nlabel={allow.label(acct)}\nDo NOT call this tool again for this account."
     except Exception as e:
         return f"Error: {e}"
 
@@ -547,39 +539,50 @@ def stripe_create_payment_intent(amount_usd: float, customer_id: str = "", curre
 
 @tool
 def stripe_get_object(object_id: str = "") -> str:
-    """Retrieve a Stripe object by ID (cus_/pi_/ch_/re_/evt_/acct_/tr_) and cache it as evidence for refund policy."""
+    """Retrieve Stripe objects by ID (cus_/pi_/ch_/re_/evt_/acct_/tr_) and cache PaymentIntents as evidence for refund policy. Pass several IDs separated by commas to fetch them in one approved call."""
     try:
-        oid = object_id.strip() or (STRIPE_SESSION["payment_intent_id"] or "")
-        if not oid:
+        ids = [oid for oid in object_id.replace(",", " ").split() if oid]
+        if not ids and STRIPE_SESSION["payment_intent_id"]:
+            ids = [STRIPE_SESSION["payment_intent_id"]]
+        if not ids:
             return "❌ Missing object_id (provide one, or create a PaymentIntent first)."
+        ids = list(dict.fromkeys(ids))
+        oid = ids[0]
 
+        # every id read goes in the governed params: the approval covers exactly these
+        params: Dict[str, Any] = {"object_id": oid}
+        if len(ids) > 1:
+            params["object_ids"] = ids
         action_id = submit_action(
             tool="stripe",
             operation="get_object",
-            params={"object_id": oid},
+            params=params,
             agent_id="interactive-ai",
             context={"action_type": "stripe_get_object"},
         )["id"]
 
-        print(f"{C.CYAN}🧾 Submitted: stripe_get_object({oid}) → {action_id[:8]}{C.END}")
+        print(f"{C.CYAN}🧾 Submitted: stripe_get_object({', '.join(ids)}) → {action_id[:8]}{C.END}")
         result = wait_for_action_result(action_id, "stripe_get_object()")
         if result["status"] not in ["completed", "approved", "allowed"]:
             return f"❌ Retrieval blocked: {result.get('reason', result['status'])}"
 
-        obj = _stripe_retrieve_any(oid)
+        objs = _stripe_retrieve_many(ids)  # in parallel, after the one approval
 
         # cache evidence for PI only (refund policy needs these fields)
-        if oid.startswith("pi_"):
-            STRIPE_SESSION["payment_intent_id"] = oid
-            STRIPE_SESSION.setdefault("evidence", {})
-            STRIPE_SESSION["evidence"][oid] = {
-                "action_id": action_id,
-                "fetched_at": time.time(),
-                "pi_status": obj.get("status", ""),
-                "amount": obj.get("amount", 0),
-            }
+        for oid, obj in objs.items():
+            if oid.startswith("pi_"):
+                STRIPE_SESSION["payment_intent_id"] = oid
+                STRIPE_SESSION.setdefault("evidence", {})
+                STRIPE_SESSION["evidence"][oid] = {
+                    "action_id": action_id,
+                    "fetched_at": time.time(),
+                    "pi_status": obj.get("status", ""),
+                    "amount": obj.get("amount", 0),
+                }
 
-        return f"✅ Retrieved {oid}\n(evidence_action_id={action_id})\n{_pretty(obj)}"
+        return "\n".join(
+            f"✅ Retrieved {oid}\n(evidence_action_id={action_id})\n{_pretty(obj)}" for oid, obj in objs.items()
+        )
     except Exception as e:
         return f"Error: {e}"
 
@@ -709,6 +712,17 @@ def stripe_refund(payment_intent_id: str = "", amount_usd: float = 0.0, memo: st
     except Exception as e:
         return f"❌ Error: {str(e)}"
         
+# Stripe list tools stream pages and stop once this much text is ready for the LLM
+_LIST_OUTPUT_BYTES = 4000
+
+
+def _list_output(title: str, lines: list, more: bool) -> str:
+    out = [f"✅ {title} ({len(lines)}):"] + lines
+    if more:
+        out.append("… more not shown (output limit reached)")
+    return "\n".join(out)
+
+
 @tool
 def stripe_list_recent_events(limit: int = 10) -> str:
     """List recent Stripe Events."""
@@ -728,12 +742,18 @@ def stripe_list_recent_events(limit: int = 10) -> str:
                 return f"❌ Events list blocked. Reason: {result.get('reason','Policy denied')}"
             return f"⚠️ Events list not completed: {result['status']}"
 
-        ev = stripe.Event.list(limit=int(limit))
-        # human-friendly summary + full payload (bounded)
-        lines = []
-        for e in ev.get("data", [])[:int(limit)]:
-            lines.append(f"- {e.get('type')}  id={e.get('id')}  created={e.get('created')}")
-        return "✅ Recent Stripe events:\n" + "\n".join(lines) + "\n\n" + _pretty(ev)
+        rows = iter_projected(
+            stripe.Event.list, ("id", "type", "created", "data.object.object", "data.object.id"), int(limit)
+        )
+        lines, more = bounded_lines(
+            rows,
+            lambda e: f"- {e['type']}  id={e['id']}  created={e['created']}"
+            f"  object={e['data.object.object']}:{e['data.object.id']}",
+            _LIST_OUTPUT_BYTES,
+        )
+        if not lines:
+            return "✅ No events found."
+        return _list_output("Recent Stripe events", lines, more)
     except Exception as e:
         return f"Error: {e}"
 
@@ -761,19 +781,20 @@ def stripe_connect_create_account(email: str, country: str = "US", account_type:
 
 
         # store as pending (not approved)
-        data = _load_allowlist()
-        existing = _get_allowlist_entry(acct["id"])
-        if not existing:
-            data.setdefault("destinations", []).append(
-                {
-                    "account_id": acct["id"],
-                    "label": acct["id"],
-                    "email": (email or "").strip().lower(),
-                    "approved": False,
-                    "added_at": int(time.time()),
-                }
-            )
-            _save_allowlist(data)
+        def add_pending(data: dict):
+            if not any(d.get("account_id") == acct["id"] for d in data["destinations"]):
+                data["destinations"].append(
+                    {
+                        "account_id": acct["id"],
+                        "label": acct["id"],
+                        "email": (email or "").strip().lower(),
+                        "approved": False,
+                        "added_at": int(time.time()),
+                    }
+                )
+
+        if not _get_allowlist_entry(acct["id"]):
+            ALLOWLIST.update(add_pending)
 
         return f"✅ Connected account created: {acct['id']}\nStatus: pending allowlist approval\n{_pretty(acct)}"
     except Exception as e:
@@ -784,65 +805,26 @@ def _allowlist_path() -> Path:
     return Path(__file__).with_name("stripe_allowlist.json")
 
 
-def _ensure_allowlist_file():
-    p = _allowlist_path()
-    if not p.exists():
-        p.write_text(json.dumps({"destinations": []}, indent=2))
-
-
-def _load_allowlist() -> dict:
-    _ensure_allowlist_file()
-    p = _allowlist_path()
-    try:
-        return json.loads(p.read_text())
-    except Exception:
-        return {"destinations": []}
-
-
-def _save_allowlist(data: dict):
-    p = _allowlist_path()
-    p.write_text(json.dumps(data, indent=2))
+# Parsed + indexed allowlist; re-read only when the file changes on disk
+ALLOWLIST = AllowlistStore(_allowlist_path())
 
 
 def _get_allowlist_entry(acct_id: str) -> Optional[dict]:
-    data = _load_allowlist()
-    for d in data.get("destinations", []):
-        if d.get("account_id") == acct_id:
-            return d
-    return None
+    return ALLOWLIST.current().entry(acct_id)
 
 
-def _is_allowlisted_destination(acct_id: str) -> bool:
-    entry = _get_allowlist_entry(acct_id)
-    return bool(entry and entry.get("approved") is True)
-
-
-def _destination_label(acct_id: str) -> str:
-    entry = _get_allowlist_entry(acct_id)
-    if entry and entry.get("label"):
-        return entry["label"]
-    return acct_id
-
-
-def _resolve_destination(dest_input: str) -> str:
+def _resolve_destination(dest_input: str, allow=None) -> str:
     """Resolve destination_id, label (vendor-bob), or email (john@test.com) to account_id."""
     s = (dest_input or "").strip()
     if not s:
         return ""
     if s.startswith("acct_"):
         return s
-    lower = s.lower()
     if "@" in s:
-        acct = CONNECT_ACCOUNT_BY_EMAIL.get(lower)
+        acct = CONNECT_ACCOUNT_BY_EMAIL.get(s.lower())
         if acct:
             return acct
-    data = _load_allowlist()
-    for d in data.get("destinations", []):
-        if d.get("approved") and (
-            (d.get("label") or "").lower() == lower or (d.get("email") or "").lower() == lower
-        ):
-            return d.get("account_id", "")
-    return s
+    return (allow or ALLOWLIST.current()).account_for(s) or s
 
 
 DEST_CREATED_AT: Dict[str, float] = {}
@@ -893,7 +875,8 @@ def stripe_transfer_test(amount_usd: float, destination_id: str = "", currency:
     """
     try:
         raw = (destination_id or "").strip()
-        dest = _resolve_destination(raw) or raw or STRIPE_SESSION.get("connected_account_id", "")
+        allow = ALLOWLIST.current()  # one snapshot for every allowlist lookup below
+        dest = _resolve_destination(raw, allow) or raw or STRIPE_SESSION.get("connected_account_id", "")
         if not dest.startswith("acct_") and STRIPE_SESSION.get("connected_account_id"):
             if not raw or "that" in raw.lower() or "the" in raw.lower() or "this" in raw.lower():
                 dest = STRIPE_SESSION["connected_account_id"]
@@ -909,11 +892,11 @@ def stripe_transfer_test(amount_usd: float, destination_id: str = "", currency:
         ev_check = _require_fresh_evidence_for_money_move()
         if not ev_check["ok"]:
             return f"❌ Transfer blocked: {ev_check['reason']}"
-        ev = ev_check["ev"]
+        ev = ev_check["ev"]  # pi_status comes only from the gated stripe_get_object read
 
         # Allowlist + label (submit to Faramesh even when not allowlisted; policy will deny)
-        destination_allowlisted = _is_allowlisted_destination(dest)
-        destination_label = _destination_label(dest)
+        destination_allowlisted = allow.is_allowlisted(dest)
+        destination_label = allow.label(dest)
         destination_age_sec = _destination_age_sec(dest)
 
         # Format memo
@@ -928,14 +911,15 @@ def stripe_transfer_test(amount_usd: float, destination_id: str = "", currency:
 
         # Velocity snapshot (policy also checks; we only block locally for allowlisted dests)
         snap = _velocity_snapshot(dest)
-        daily_total_cap = 100_000   # $1,000
-        daily_dest_cap = 50_000     # $500
+        daily_total_cap = snap["daily_total_cap_cents"]
+        daily_dest_cap = snap["daily_dest_cap_cents"]
 
+        # Caps apply to the rolling last 24 h, so a burst either side of midnight still adds up
         if destination_allowlisted:
-            if snap["total_cents_today"] + amount_cents > daily_total_cap:
-                return f"❌ Transfer blocked: daily total cap exceeded (${daily_total_cap/100})"
-            if snap["dest_cents_today"] + amount_cents > daily_dest_cap:
-                return f"❌ Transfer blocked: daily cap for {destination_label} exceeded (${daily_dest_cap/100})"
+            if snap["total_cents_24h"] + amount_cents > daily_total_cap:
+                return f"❌ Transfer blocked: rolling 24 h total cap exceeded (${daily_total_cap/100})"
+            if snap["dest_cents_24h"] + amount_cents > daily_dest_cap:
+                return f"❌ Transfer blocked: rolling 24 h cap for {destination_label} exceeded (${daily_dest_cap/100})"
 
         # Build params
         params = {
@@ -955,6 +939,12 @@ def stripe_transfer_test(amount_usd: float, destination_id: str = "", currency:
             "daily_dest_cents_today": snap["dest_cents_today"],
             "daily_total_cap_cents": daily_total_cap,
             "daily_dest_cap_cents": daily_dest_cap,
+            "total_cents_24h": snap["total_cents_24h"],
+            "total_cents_1h": snap["total_cents_1h"],
+            "total_cents_5m": snap["total_cents_5m"],
+            "dest_cents_24h": snap["dest_cents_24h"],
+            "dest_cents_1h": snap["dest_cents_1h"],
+            "dest_cents_5m": snap["dest_cents_5m"],
         }
 
         # Single-step execution
@@ -974,20 +964,27 @@ def stripe_transfer_test(amount_usd: float, destination_id: str = "", currency:
         if exec_res["status"] not in ["completed", "approved", "allowed"]:
             return f"❌ Transfer blocked: {exec_res.get('reason', exec_res['status'])}"
 
-        # Create Stripe Transfer
-        tr = stripe.Transfer.create(
-            amount=amount_cents,
-            currency=currency.lower(),
-            destination=dest,
-            metadata={
-                "memo": clean_desc,
-                "ticket": clean_ticket,
-                "break_glass_code": break_glass_code.strip(),
-                "destination_label": destination_label,
-            }
-        )
+        # Claim the amount in the shared ledger first so concurrent agents can't overshoot the caps
+        entry = _velocity_commit(dest, amount_cents, enforce_caps=destination_allowlisted)
+        if entry is None:
+            return "❌ Transfer blocked: rolling 24 h cap reached by concurrent transfers"
 
-        _record_transfer(dest, amount_cents)
+        # Create Stripe Transfer
+        try:
+            tr = stripe.Transfer.create(
+                amount=amount_cents,
+                currency=currency.lower(),
+                destination=dest,
+                metadata={
+                    "memo": clean_desc,
+                    "ticket": clean_ticket,
+                    "break_glass_code": break_glass_code.strip(),
+                    "destination_label": destination_label,
+                }
+            )
+        except Exception:
+            _velocity().void(entry)  # the money never moved
+            raise
 
         return f"✅ Transfer created: {tr['id']}\nDestination={destination_label}\n{_pretty(tr)}"
 
@@ -1003,60 +1000,62 @@ def wait_for_action_result(action_id: str, operation_name: str) -> Dict[str, Any
     """
     approval_url = "http://127.0.0.1:8000"
     shown_pending_message = False
-    consecutive_failures = 0
     max_consecutive_failures = 5
 
-    for attempt in range(120):  # 2 minutes max
-        time.sleep(1)
+    def _on_pending(action_data: Dict[str, Any]) -> None:
+        nonlocal shown_pending_message
+        reason = action_data.get("reason", "Policy requires approval")
+        print(f"\n{C.YELLOW}⏸  ACTION PENDING APPROVAL{C.END}")
+        print(f"   Operation: {operation_name}")
+        print(f"   Reason: {reason}")
+        print(f"\n{C.CYAN}🌐 Go to Faramesh UI to approve/deny:{C.END}")
+        print(f"   {C.BOLD}{approval_url}{C.END}")
+        print(
+            f"\n{C.YELLOW}⏳ Waiting for your decision (I'll wait here)...{C.END}\n"
+        )
+        shown_pending_message = True
 
-        try:
-            action_data = get_action(action_id)
-            consecutive_failures = 0
-        except Exception as e:
-            consecutive_failures += 1
-            if consecutive_failures >= max_consecutive_failures:
-                print(f"\n{C.RED}❌ Polling failed: {e}{C.END}\n")
-                return {"status": "error", "reason": str(e), "approval_url": approval_url}
-            if attempt % 5 == 4:
-                print(f"   {C.YELLOW}(poll {attempt + 1}: retrying after error){C.END}")
-            continue
-
-        status = action_data.get("status")
-
-        if status == "pending_approval":
-            if not shown_pending_message:
-                reason = action_data.get("reason", "Policy requires approval")
-                print(f"\n{C.YELLOW}⏸  ACTION PENDING APPROVAL{C.END}")
-                print(f"   Operation: {operation_name}")
-                print(f"   Reason: {reason}")
-                print(f"\n{C.CYAN}🌐 Go to Faramesh UI to approve/deny:{C.END}")
-                print(f"   {C.BOLD}{approval_url}{C.END}")
-                print(
-                    f"\n{C.YELLOW}⏳ Waiting for your decision (I'll wait here)...{C.END}\n"
-                )
-                shown_pending_message = True
-            continue
-
-        elif status == "allowed":
-            return {"status": "allowed", "data": action_data}
-
-        elif status in ("approved", "completed", "succeeded"):
-            if shown_pending_message:
-                print(f"\n{C.GREEN}✅ APPROVED! Continuing...{C.END}\n")
-            return {"status": "approved", "data": action_data}
-
-        elif status == "denied":
-            reason = action_data.get("reason", "Policy denied")
-            print(f"\n{C.RED}🚫 DENIED: {reason}{C.END}")
-            print(
-                f"{C.YELLOW}I can't do this action, but I'll continue with other tasks...{C.END}\n"
-            )
-            return {"status": "denied", "reason": reason}
+    stats: Dict[str, Any] = {}
+    try:
+        # Returns as soon as the decision exists (2 minutes max)
+        action_data = wait_for_decision(
+            action_id,
+            timeout=120,
+            base_url=approval_url,
+            token="demo-token",
+            fetch=get_action,
+            on_pending=_on_pending,
+            max_failures=max_consecutive_failures,
+            stats=stats,
+        )
+    except Exception as e:
+        print(f"\n{C.RED}❌ Polling failed: {e}{C.END}\n")
+        return {"status": "error", "reason": str(e), "approval_url": approval_url}
+
+    if os.getenv("FARAMESH_DEBUG") == "1":
+        print(f"[DEBUG] {operation_name}: {stats['polls']} polls in {stats['elapsed']:.2f}s ({stats['mode']})")
+    status = action_data.get("status") if action_data else None
 
-        elif status == "failed":
-            error = action_data.get("error", "Unknown error")
-            print(f"\n{C.RED}❌ Action failed: {error}{C.END}\n")
-            return {"status": "failed", "error": error}
+    if status == "allowed":
+        return {"status": "allowed", "data": action_data}
+
+    elif status in ("approved", "completed", "succeeded"):
+        if shown_pending_message:
+            print(f"\n{C.GREEN}✅ APPROVED! Continuing...{C.END}\n")
+        return {"status": "approved", "data": action_data}
+
+    elif status == "denied":
+        reason = action_data.get("reason", "Policy denied")
+        print(f"\n{C.RED}🚫 DENIED: {reason}{C.END}")
+        print(
+            f"{C.YELLOW}I can't do this action, but I'll continue with other tasks...{C.END}\n"
+        )
+        return {"status": "denied", "reason": reason}
+
+    elif status == "failed":
+        error = action_data.get("error", "Unknown error")
+        print(f"\n{C.RED}❌ Action failed: {error}{C.END}\n")
+        return {"status": "failed", "error": error}
 
     # Timeout
     print(f"\n{C.YELLOW}⏱ Timeout (2 min) waiting for approval.{C.END}")
@@ -1169,16 +1168,16 @@ def stripe_list_transfers(limit: int = 5) -> str:
         if result["status"] not in ["completed", "approved", "allowed"]:
             return f"❌ List blocked: {result.get('reason', result['status'])}"
 
-        res = stripe.Transfer.list(limit=limit)
-        data = res.get("data", [])
-        if not data:
+        rows = iter_projected(stripe.Transfer.list, ("id", "amount", "currency", "destination"), limit)
+        lines, more = bounded_lines(
+            rows,
+            lambda t: f"- {t['id']} | ${(t['amount'] or 0) / 100:.2f} {(t['currency'] or '').upper()}"
+            f" | dest={t['destination'] or ''}",
+            _LIST_OUTPUT_BYTES,
+        )
+        if not lines:
             return "✅ No transfers found."
-
-        lines = [f"✅ Recent transfers ({len(data)}):"]
-        for t in data:
-            amt = (t["amount"] or 0) / 100
-            lines.append(f"- {t['id']} | ${amt:.2f} {t.get('currency','').upper()} | dest={t.get('destination','')}")
-        return "\n".join(lines)
+        return _list_output("Recent transfers", lines, more)
 
     except Exception as e:
         return f"Error: {e}"
@@ -1204,16 +1203,16 @@ def stripe_list_refunds(limit: int = 5) -> str:
         if result["status"] not in ["completed", "approved", "allowed"]:
             return f"❌ List blocked: {result.get('reason', result['status'])}"
 
-        res = stripe.Refund.list(limit=limit)
-        data = res.get("data", [])
-        if not data:
+        rows = iter_projected(stripe.Refund.list, ("id", "amount", "currency", "status"), limit)
+        lines, more = bounded_lines(
+            rows,
+            lambda r: f"- {r['id']} | ${(r['amount'] or 0) / 100:.2f} {(r['currency'] or '').upper()}"
+            f" | status={r['status'] or ''}",
+            _LIST_OUTPUT_BYTES,
+        )
+        if not lines:
             return "✅ No refunds found."
-
-        lines = [f"✅ Recent refunds ({len(data)}):"]
-        for r in data:
-            amt = (r["amount"] or 0) / 100
-            lines.append(f"- {r['id']} | ${amt:.2f} {r.get('currency','').upper()} | status={r.get('status','')}")
-        return "\n".join(lines)
+        return _list_output("Recent refunds", lines, more)
 
     except Exception as e:
         return f"Error: {e}"
@@ -1656,61 +1655,45 @@ Be conversational, helpful, and respectful of security decisions!"""
 
 
 def _velocity_path() -> Path:
-    return Path(__file__).with_name("stripe_velocity.json")
+    return Path(__file__).with_name("stripe_velocity.sqlite3")
 
 
-def _load_velocity() -> dict:
-    p = _velocity_path()
-    if not p.exists():
-        return {"day": "", "total_cents": 0, "by_destination": {}}
-    try:
-        return json.loads(p.read_text())
-    except Exception:
-        return {"day": "", "total_cents": 0, "by_destination": {}}
+# Transfer caps over any rolling 24 h, shared by every agent process through the ledger
+DAILY_TOTAL_CAP_CENTS = 100_000   # $1,000
+DAILY_DEST_CAP_CENTS = 50_000     # $500
 
+_velocity_lock = threading.Lock()
+_velocity_ledger: Optional[VelocityLedger] = None
 
-def _save_velocity(v: dict):
-    _velocity_path().write_text(json.dumps(v, indent=2))
 
-
-def _today_key() -> str:
-    return time.strftime("%Y-%m-%d", time.gmtime())
+def _velocity() -> VelocityLedger:
+    global _velocity_ledger
+    with _velocity_lock:
+        if _velocity_ledger is None:
+            _velocity_ledger = VelocityLedger(str(_velocity_path()))
+        return _velocity_ledger
 
 
 def _velocity_snapshot(acct_id: str) -> dict:
-    """
-    Return a demo snapshot with all limits essentially ignored,
-    so the demo can run in <60s without hitting first-time destination or daily caps.
-    """
-    return {
-        "total_cents_today": 0,
-        "dest_cents_today": 0,
-        "daily_total_cap_cents": 10**9,
-        "daily_dest_cap_cents": 10**9,
-        "destination_age_sec": 0,  # immediately allow new destination
-    }
-
-def _record_transfer(destination_id: str, amount_cents: int):
-    """Update velocity snapshot after a successful transfer (in-memory)."""
-    STRIPE_SESSION.setdefault("_velocity_state", {"total_cents_today": 0, "per_dest": {}})
-    state = STRIPE_SESSION["_velocity_state"]
-    state["total_cents_today"] += int(amount_cents)
-    state["per_dest"][destination_id] = state["per_dest"].get(destination_id, 0) + int(amount_cents)
-
+    """Cents moved overall and to acct_id (today, last 24 h / 1 h / 5 min) plus the caps."""
+    snap = _velocity().snapshot(acct_id)
+    snap["daily_total_cap_cents"] = DAILY_TOTAL_CAP_CENTS
+    snap["daily_dest_cap_cents"] = DAILY_DEST_CAP_CENTS
+    return snap
 
 
-def _velocity_commit(destination_id: str, amount_cents: int):
-    v = _load_velocity()
-    today = _today_key()
-    if v.get("day") != today:
-        v = {"day": today, "total_cents": 0, "by_destination": {}}
-
-    v["total_cents"] = int(v.get("total_cents") or 0) + int(amount_cents)
-    v.setdefault("by_destination", {})
-    v["by_destination"][destination_id] = int(v["by_destination"].get(destination_id) or 0) + int(amount_cents)
-
-    _save_velocity(v)
+def _velocity_commit(destination_id: str, amount_cents: int, enforce_caps: bool = True) -> Optional[int]:
+    """Count a transfer against the rolling 24 h caps before it is sent.
 
+    Returns the ledger entry (void it if the transfer fails), or None when
+    another agent used up the cap since the snapshot was taken.
+    """
+    return _velocity().commit(
+        destination_id,
+        int(amount_cents),
+        total_cap=DAILY_TOTAL_CAP_CENTS if enforce_caps else None,
+        dest_cap=DAILY_DEST_CAP_CENTS if enforce_caps else None,
+    )
 
 
 def run_test_scenarios(llm_with_tools, tools):